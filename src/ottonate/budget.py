@@ -0,0 +1,149 @@
+"""Per-stage prompt budgets.
+
+Prompt builders inline whatever context they are given: a whole PR diff, every
+comment on an issue, the full project rules. ``fit_context`` caps the variable
+sections of a stage's prompt at a token limit. Sections are ranked by
+priority; while the total is over the limit the least valuable section is cut
+first, deterministically and on line (or file, or item) boundaries, leaving a
+marker that says what was left out. The returned ``BudgetReport`` lists what
+was dropped so it can be recorded in the stage metadata.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from enum import StrEnum
+
+# Rough and deliberately conservative; only used for budgeting, never billing.
+CHARS_PER_TOKEN = 4
+
+# Room left for the "[... omitted ...]" marker a cut section gains.
+_MARKER_CHARS = 80
+
+_DIFF_FILE = re.compile(r"^diff --git ", re.MULTILINE)
+_DIFF_PATH = re.compile(r"^diff --git a/(\S+)")
+
+
+class Trim(StrEnum):
+    HEAD = "head"  # keep the beginning (descriptions, specs, rules)
+    TAIL = "tail"  # keep the end (comment threads, logs: the latest matters most)
+    DIFF = "diff"  # keep whole files in order, list the files left out
+
+
+@dataclass
+class Section:
+    """A piece of prompt context. Lower ``priority`` is kept first.
+
+    ``content`` is text, or a list of items (e.g. comments) that are dropped whole.
+    """
+
+    name: str
+    content: str | list[str]
+    priority: int = 1
+    trim: Trim = Trim.HEAD
+
+
+@dataclass
+class BudgetReport:
+    stage: str
+    limit_tokens: int
+    tokens: int
+    # section name -> estimated tokens dropped from it
+    trimmed: dict[str, int] = field(default_factory=dict)
+
+
+def estimate_tokens(content: str | list[str]) -> int:
+    chars = len(content) if isinstance(content, str) else sum(len(item) for item in content)
+    return -(-chars // CHARS_PER_TOKEN)
+
+
+def fit_context(
+    stage: str, sections: list[Section], limit_tokens: int
+) -> tuple[dict[str, str | list[str]], BudgetReport]:
+    """Fit ``sections`` into ``limit_tokens`` (0 = unlimited). Returns content by name."""
+    fitted = {section.name: section.content for section in sections}
+    total = sum(estimate_tokens(section.content) for section in sections)
+    report = BudgetReport(stage=stage, limit_tokens=limit_tokens, tokens=total)
+    if limit_tokens <= 0 or total <= limit_tokens:
+        return fitted, report
+
+    # Least valuable first; among equals, the later section goes first.
+    order = sorted(enumerate(sections), key=lambda pair: (-pair[1].priority, -pair[0]))
+    for _, section in order:
+        excess = total - limit_tokens
+        if excess <= 0:
+            break
+        before = estimate_tokens(section.content)
+        keep_chars = max(0, (before - excess) * CHARS_PER_TOKEN - _MARKER_CHARS)
+        fitted[section.name] = _cut(section.content, keep_chars, section.trim)
+        after = estimate_tokens(fitted[section.name])
+        if after < before:
+            report.trimmed[section.name] = before - after
+            total -= before - after
+    report.tokens = total
+    return fitted, report
+
+
+def _cut(content: str | list[str], keep_chars: int, trim: Trim) -> str | list[str]:
+    if isinstance(content, list):
+        return _cut_items(content, keep_chars, trim)
+    if trim == Trim.DIFF:
+        return _cut_diff(content, keep_chars)
+    return _cut_text(content, keep_chars, trim)
+
+
+def _cut_text(text: str, keep_chars: int, trim: Trim) -> str:
+    if keep_chars <= 0:
+        return f"[{len(text)} chars omitted to fit the prompt budget]"
+    if trim == Trim.TAIL:
+        start = len(text) - keep_chars
+        newline = text.find("\n", start)
+        if newline != -1 and newline - start < keep_chars // 2:
+            start = newline + 1
+        return f"[... {start} chars omitted ...]\n{text[start:]}"
+    end = keep_chars
+    newline = text.rfind("\n", 0, end)
+    if newline > end // 2:
+        end = newline
+    return f"{text[:end]}\n[... {len(text) - end} chars omitted ...]"
+
+
+def _cut_items(items: list[str], keep_chars: int, trim: Trim) -> list[str]:
+    ordered = list(reversed(items)) if trim == Trim.TAIL else list(items)
+    kept: list[str] = []
+    used = 0
+    for item in ordered:
+        if used + len(item) > keep_chars:
+            break
+        kept.append(item)
+        used += len(item)
+    omitted = len(items) - len(kept)
+    if not omitted:
+        return items
+    if trim == Trim.TAIL:
+        kept.reverse()
+    marker = f"[{omitted} more omitted to fit the prompt budget]"
+    return [marker, *kept] if trim == Trim.TAIL else [*kept, marker]
+
+
+def _cut_diff(diff: str, keep_chars: int) -> str:
+    starts = [m.start() for m in _DIFF_FILE.finditer(diff)]
+    if not starts:
+        return _cut_text(diff, keep_chars, Trim.HEAD)
+    files = [diff[a:b] for a, b in zip(starts, [*starts[1:], len(diff)], strict=True)]
+    kept: list[str] = []
+    omitted: list[str] = []
+    used = starts[0]
+    for file_diff in files:
+        if not omitted and used + len(file_diff) <= keep_chars:
+            kept.append(file_diff)
+            used += len(file_diff)
+        else:
+            match = _DIFF_PATH.match(file_diff)
+            omitted.append(match.group(1) if match else "?")
+    if not kept:
+        # Not even the first file fits: show as much of it as allowed.
+        return _cut_text(diff, keep_chars, Trim.HEAD)
+    note = f"[diff of {len(omitted)} more file(s) omitted to fit the prompt budget: "
+    return diff[: starts[0]] + "".join(kept) + note + ", ".join(omitted) + "]\n"
@@ -0,0 +1,103 @@
+"""Wait for CI without re-dispatching the ticket on every poll.
+
+A ticket in ``agentPR`` whose checks are still running has nothing to do. When
+``_handle_pr`` sees a pending status it hands the PR's head SHA to
+``CIWatcher``, and the scheduler then leaves the ticket out of its polls. It is
+not dispatched and not included in the snapshot batch until its next check is
+due. Checks back off exponentially per head SHA. When a check comes due, the
+poll snapshot is compared with the watch: CI still pending on the same SHA
+means another backoff step and no dispatch. Only a status that has left pending
+(or a new push) wakes the handler. With webhooks, a ``check_suite`` or
+``pull_request`` delivery wakes the ticket at once, so the timer only matters
+for missed deliveries.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+import structlog
+
+from ottonate.config import OttonateConfig
+from ottonate.models import CIStatus, TicketSnapshot
+
+log = structlog.get_logger()
+
+
+@dataclass
+class CIWatch:
+    head_sha: str | None
+    since: float
+    next_check: float
+    checks: int = 0
+
+
+class CIWatcher:
+    def __init__(self, initial_delay_s: float = 60.0, max_delay_s: float = 600.0) -> None:
+        self.initial_delay_s = initial_delay_s
+        self.max_delay_s = max_delay_s
+        self._watches: dict[str, CIWatch] = {}
+
+    @classmethod
+    def from_config(cls, config: OttonateConfig) -> CIWatcher:
+        return cls(config.ci_watch_initial_s, config.ci_watch_max_s)
+
+    def _delay(self, checks: int) -> float:
+        return min(self.max_delay_s, self.initial_delay_s * 2**checks)
+
+    def watch(self, issue_ref: str, head_sha: str | None) -> None:
+        """CI is pending for ``head_sha``: wait before looking again."""
+        now = time.monotonic()
+        current = self._watches.get(issue_ref)
+        if current is not None and current.head_sha == head_sha:
+            current.checks += 1
+            current.next_check = now + self._delay(current.checks)
+        else:
+            self._watches[issue_ref] = CIWatch(head_sha, now, now + self._delay(0))
+        log.debug(
+            "ci_watch_waiting",
+            issue=issue_ref,
+            head_sha=head_sha,
+            next_check_s=round(self._watches[issue_ref].next_check - now),
+        )
+
+    def wake(self, issue_ref: str) -> None:
+        """Stop waiting: CI finished, the PR changed, or the stage moved on."""
+        watch = self._watches.pop(issue_ref, None)
+        if watch is not None:
+            log.debug(
+                "ci_watch_woken", issue=issue_ref, waited_s=round(time.monotonic() - watch.since)
+            )
+
+    def watching(self, issue_ref: str) -> bool:
+        return issue_ref in self._watches
+
+    def due(self, issue_ref: str) -> bool:
+        """Whether a poll should look at the ticket (always, unless it is waiting)."""
+        watch = self._watches.get(issue_ref)
+        return watch is None or time.monotonic() >= watch.next_check
+
+    def settled(self, issue_ref: str, snapshot: TicketSnapshot | None) -> bool:
+        """For a due ticket, whether the snapshot shows something for the handler to act on.
+
+        A snapshot that shows CI still pending on the watched SHA backs the watch off
+        instead. Without a snapshot the handler runs and checks for itself.
+        """
+        watch = self._watches.get(issue_ref)
+        if watch is None or snapshot is None or snapshot.ci_status is None:
+            return True
+        same_head = watch.head_sha is None or snapshot.pr_head_sha == watch.head_sha
+        if snapshot.ci_status == CIStatus.PENDING and same_head:
+            self.watch(issue_ref, watch.head_sha)
+            return False
+        return True
+
+    def retain(self, issue_refs: set[str]) -> None:
+        """Forget watches for tickets that are no longer waiting in ``agentPR``."""
+        for issue_ref in set(self._watches) - issue_refs:
+            del self._watches[issue_ref]
+
+    @property
+    def waiting(self) -> int:
+        return len(self._watches)
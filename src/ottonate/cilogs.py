@@ -0,0 +1,143 @@
+"""Pull the error signal out of failed CI logs.
+
+A failed run's log is mostly setup: checkout, dependency installs, cache
+restores. The part the CI fixer needs, a traceback or a failed assertion or a
+compiler error, is usually near the end. ``LogScanner`` reads a log line by
+line, keeping only a short ring of recent lines. When a line looks like an
+error, it opens a window with a few lines of context before it, and the window
+stays open while more error or indented continuation lines follow. Logs in
+which nothing matches fall back to their last lines. ``failure_report`` fits
+the windows of every failed check into a token budget, and the first check
+ranks highest.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from dataclasses import dataclass
+
+from ottonate.budget import Section, Trim, fit_context
+
+# "job<TAB>step<TAB>" (gh run view --log-failed), then the runner's timestamp
+_LINE_PREFIX = re.compile(r"^(?:[^\t\n]*\t[^\t\n]*\t)?\ufeff?(?:\d{4}-\d\d-\d\dT[\d:.]+Z ?)?")
+_ANSI = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
+_ERROR_LINE = re.compile(
+    r"Traceback \(most recent call last\)"
+    r"|^E {2,}"  # pytest assertion detail
+    r"|\b(?:FAILED|ERROR)\b"
+    r"|^\s*(?:[\w.]+\.)?\w*(?:Error|Exception)\b(?::|$)"
+    r"|\b[Ee]rror(?:\[\w+\])?:"  # gcc/clang/rustc, node
+    r"|\berror [A-Z]+\d+:"  # tsc, msbuild
+    r"|^##\[error\]"
+    r"|^npm ERR!"
+    r"|^--- FAIL:"
+    r"|^panic:"
+    r"|^make(?:\[\d+\])?: \*\*\*"
+    r"|\b[Aa]ssert(?:ion)? failed\b"
+)
+
+CONTEXT_BEFORE = 3
+CONTEXT_AFTER = 6
+FALLBACK_LINES = 40
+
+
+def _clean(line: str) -> str:
+    return _ANSI.sub("", _LINE_PREFIX.sub("", line, count=1)).rstrip()
+
+
+class LogScanner:
+    """Streaming extractor of error windows; feed text in chunks, then ``finish``."""
+
+    def __init__(
+        self,
+        *,
+        context_before: int = CONTEXT_BEFORE,
+        context_after: int = CONTEXT_AFTER,
+        max_windows: int = 20,
+        max_window_lines: int = 80,
+    ) -> None:
+        self.windows: list[str] = []
+        self._before: deque[str] = deque(maxlen=context_before)
+        self._tail: deque[str] = deque(maxlen=FALLBACK_LINES)
+        self._context_after = context_after
+        self._max_windows = max_windows
+        self._max_window_lines = max_window_lines
+        self._window: list[str] = []
+        self._remaining = 0
+        self._partial = ""
+        self._truncated = 0
+
+    def feed(self, text: str) -> None:
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._line(_clean(line))
+
+    def finish(self) -> list[str]:
+        if self._partial:
+            self._line(_clean(self._partial))
+            self._partial = ""
+        self._close()
+        if not self.windows and self._tail:
+            self.windows.append("\n".join(self._tail))
+        if self._truncated:
+            self.windows.append(f"[{self._truncated} more error window(s) omitted]")
+        return self.windows
+
+    def _line(self, line: str) -> None:
+        self._tail.append(line)
+        if _ERROR_LINE.search(line):
+            if not self._window:
+                if len(self.windows) >= self._max_windows:
+                    self._truncated += 1
+                    self._before.append(line)
+                    return
+                self._window.extend(self._before)
+            self._window.append(line)
+            self._remaining = self._context_after
+        elif self._window and (self._remaining > 0 or line[:1].isspace()):
+            self._window.append(line)
+            self._remaining -= 1
+        else:
+            self._close()
+            self._before.append(line)
+        if len(self._window) >= self._max_window_lines:
+            self._close()
+
+    def _close(self) -> None:
+        if self._window:
+            self.windows.append("\n".join(self._window))
+            self._window = []
+            self._before.clear()
+
+
+def error_windows(log: str, **kwargs: int) -> list[str]:
+    scanner = LogScanner(**kwargs)
+    scanner.feed(log)
+    return scanner.finish()
+
+
+@dataclass
+class FailedCheck:
+    name: str
+    log: str = ""
+    details_url: str = ""
+
+
+def failure_report(checks: list[FailedCheck], limit_tokens: int) -> str:
+    """One section per failed check: its error windows, or a link when there is no log."""
+    sections: list[Section] = []
+    for index, check in enumerate(checks):
+        if check.log:
+            content = error_windows(check.log)
+        else:
+            content = [f"Details: {check.details_url or 'N/A'}"]
+        sections.append(Section(f"{index}:{check.name}", content, priority=index, trim=Trim.HEAD))
+    fitted, _ = fit_context("ci_fix", sections, limit_tokens)
+    parts = []
+    for section, check in zip(sections, checks, strict=True):
+        windows = fitted[section.name]
+        parts.append(f"## Failed check: {check.name}\n" + "\n\n...\n\n".join(windows))
+    return "\n\n".join(parts)
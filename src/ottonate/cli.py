@@ -41,15 +41,22 @@ def main() -> None:
 
 
 @main.command()
-def run() -> None:
+@click.option(
+    "--webhooks",
+    is_flag=True,
+    help="Drive dispatch from GitHub webhooks; polling becomes a slow reconciliation sweep.",
+)
+def run(webhooks: bool) -> None:
     """Start the scheduler daemon."""
     from ottonate.agents import sync_agent_definitions
 
-    sync_agent_definitions()
     config = _get_config()
+    if webhooks and not config.webhook_secret:
+        raise click.UsageError("--webhooks requires OTTONATE_WEBHOOK_SECRET to be set.")
+    sync_agent_definitions()
     scheduler = Scheduler(config)
     try:
-        asyncio.run(scheduler.start())
+        asyncio.run(scheduler.start(webhooks=webhooks))
     except KeyboardInterrupt:
         click.echo("Shutting down...")
 
@@ -78,15 +85,16 @@ def process_idea(pr_ref: str) -> None:
     PR_REF should be in the format owner/repo#number (e.g. smereddy/engineering#1).
     """
     from ottonate.agents import sync_agent_definitions
-    from ottonate.github import GitHubClient
+    from ottonate.github import create_github_client
     from ottonate.models import IdeaPR
     from ottonate.pipeline import Pipeline
     from ottonate.rules import load_rules
+    from ottonate.state import StateStore
 
     sync_agent_definitions()
     owner, repo, number = _parse_issue_ref(pr_ref)
     config = _get_config()
-    github = GitHubClient()
+    github = create_github_client(config)
 
     async def _process() -> None:
         # Fetch PR details to get branch, labels, title
@@ -130,7 +138,7 @@ def process_idea(pr_ref: str) -> None:
 
         click.echo(f"Processing idea PR: {idea_pr.pr_ref} (project: {project_name})")
 
-        pipeline = Pipeline(config, github)
+        pipeline = Pipeline(config, github, state=StateStore(config.state_db_path))
         rules = await load_rules(owner, repo, config, github)
         await pipeline.handle_idea_pr(idea_pr, rules)
         click.echo("Done.")
@@ -229,8 +237,12 @@ def setup() -> None:
 
         # Step 7: Ensure labels
         click.echo(f"\nCreating pipeline labels in {org}/{eng_repo}...")
-        count = await ensure_labels(github, org, eng_repo, entry_label)
-        result.add("Pipeline labels", f"{count} created" if count else "all exist")
+        try:
+            count = await ensure_labels(github, org, eng_repo, entry_label)
+        except RuntimeError as e:
+            result.add("Pipeline labels", f"failed ({e})")
+        else:
+            result.add("Pipeline labels", f"{count} created" if count else "all exist")
 
         # Step 8: Sync agents
         click.echo("Syncing agent definitions...")
@@ -265,12 +277,12 @@ def sync_agents() -> None:
 def init_engineering_cmd() -> None:
     """Bootstrap the engineering repo with scaffolding and auto-discovered architecture docs."""
     from ottonate.agents import sync_agent_definitions
-    from ottonate.github import GitHubClient
+    from ottonate.github import create_github_client
     from ottonate.init_engineering import init_engineering
 
     sync_agent_definitions()
     config = _get_config()
-    github = GitHubClient()
+    github = create_github_client(config)
     pr_url = asyncio.run(init_engineering(config, github))
     click.echo(f"PR created: {pr_url}")
 
@@ -289,6 +301,149 @@ def dashboard(port: int) -> None:
     uvicorn.run(app, host="127.0.0.1", port=port, log_level="info")
 
 
+@main.group()
+def workspaces() -> None:
+    """Manage ticket workspaces."""
+
+
+@workspaces.command("gc")
+@click.option("--dry-run", is_flag=True, help="Show what would be removed without deleting.")
+@click.option(
+    "--force", is_flag=True, help="Run even though in-use workspaces cannot be detected."
+)
+def workspaces_gc(dry_run: bool, force: bool) -> None:
+    """Reclaim workspaces of finished tickets and enforce the disk quota.
+
+    Workspaces of leased tickets are kept. With the memory lease backend a
+    running scheduler's leases are invisible, so removal requires --force.
+    """
+    from ottonate.github import create_github_client
+    from ottonate.leases import create_lease_backend
+    from ottonate.workspaces import WorkspaceManager
+
+    config = _get_config()
+    if config.lease_backend == "memory" and not (dry_run or force):
+        raise click.ClickException(
+            "Cannot see which tickets a running scheduler is working on with "
+            "OTTONATE_LEASE_BACKEND=memory. Stop the scheduler or pass --force."
+        )
+    backend = create_lease_backend(config)
+    try:
+        protected = {lease.key for lease in backend.active()}
+    finally:
+        backend.close()
+    manager = WorkspaceManager(config)
+    report = asyncio.run(
+        manager.gc(create_github_client(config), dry_run=dry_run, protected=protected)
+    )
+
+    verb = "Would remove" if dry_run else "Removed"
+    for path, reason, size in report.removed:
+        click.echo(f"{verb} {path} ({reason}, {_format_bytes(size)})")
+    if not report.removed:
+        click.echo("Nothing to reclaim.")
+    reclaimed = "Reclaimable" if dry_run else "Reclaimed"
+    click.echo(f"{reclaimed}: {_format_bytes(report.reclaimed_bytes)}")
+    click.echo(
+        f"Remaining: {_format_bytes(report.kept_bytes)} "
+        f"(mirrors {_format_bytes(report.mirror_bytes)})"
+    )
+
+
+@main.group()
+def labels() -> None:
+    """Manage pipeline labels across repos."""
+
+
+@labels.command("sync")
+@click.option(
+    "--repo", "repos", multiple=True, help="Repo name to sync (repeatable; default: whole org)."
+)
+@click.option("--force", is_flag=True, help="Re-verify repos already synced at this version.")
+@click.option("--concurrency", default=8, show_default=True, help="Repos synced in parallel.")
+def labels_sync(repos: tuple[str, ...], force: bool, concurrency: int) -> None:
+    """Pre-provision pipeline labels in every repo of the org."""
+    from ottonate.github import create_github_client
+    from ottonate.labels import pipeline_labels, sync_org_labels
+    from ottonate.state import StateStore
+
+    config = _get_config()
+    if not config.github_org:
+        raise click.ClickException("OTTONATE_GITHUB_ORG is not set")
+    state = StateStore(config.state_db_path)
+    try:
+        results = asyncio.run(
+            sync_org_labels(
+                create_github_client(config),
+                state,
+                config.github_org,
+                pipeline_labels(config.github_agent_label),
+                repos=list(repos) or None,
+                concurrency=concurrency,
+                force=force,
+            )
+        )
+    finally:
+        state.close()
+
+    for repo, created in sorted(results.items()):
+        if created is None:
+            click.echo(f"{config.github_org}/{repo}: up to date")
+        elif isinstance(created, RuntimeError):
+            click.echo(f"{config.github_org}/{repo}: {created}")
+        else:
+            click.echo(f"{config.github_org}/{repo}: created {len(created)} label(s)")
+    if not results:
+        click.echo("No repos found.")
+
+
+def _format_bytes(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KB", "MB"):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+
+@main.command("replay-webhook")
+@click.argument("event")
+@click.argument("payload_file", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--url", default=None, help="Receiver URL (default: local webhook port).")
+def replay_webhook(event: str, payload_file: Path, url: str | None) -> None:
+    """Sign and POST a recorded webhook payload to a running receiver.
+
+    EVENT is the X-GitHub-Event name (e.g. issues, pull_request, check_suite).
+    """
+    import urllib.error
+    import urllib.request
+    import uuid
+
+    from ottonate.webhooks import sign
+
+    config = _get_config()
+    if not config.webhook_secret:
+        raise click.UsageError("OTTONATE_WEBHOOK_SECRET must be set to sign the payload.")
+    url = url or f"http://127.0.0.1:{config.webhook_port}/webhook"
+    body = payload_file.read_bytes()
+    request = urllib.request.Request(
+        url,
+        data=body,
+        method="POST",
+        headers={
+            "Content-Type": "application/json",
+            "X-GitHub-Event": event,
+            "X-GitHub-Delivery": str(uuid.uuid4()),
+            "X-Hub-Signature-256": sign(config.webhook_secret, body),
+        },
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=30) as resp:
+            click.echo(f"{resp.status} {resp.read().decode()}")
+    except urllib.error.HTTPError as e:
+        raise click.ClickException(f"{e.code} {e.read().decode()}") from None
+
+
 @main.command("rules-check")
 @click.argument("repo_ref")
 def rules_check(repo_ref: str) -> None:
@@ -296,7 +451,7 @@ def rules_check(repo_ref: str) -> None:
 
     REPO_REF should be in the format owner/repo (e.g. appfire/flow-api).
     """
-    from ottonate.github import GitHubClient
+    from ottonate.github import create_github_client
     from ottonate.rules import load_rules
 
     parts = repo_ref.split("/", 1)
@@ -305,7 +460,7 @@ def rules_check(repo_ref: str) -> None:
     owner, repo = parts
 
     config = _get_config()
-    github = GitHubClient()
+    github = create_github_client(config)
 
     async def _check() -> None:
         rules = await load_rules(owner, repo, config, github)
@@ -315,6 +470,10 @@ def rules_check(repo_ref: str) -> None:
         click.echo(f"Entry label:    {rules.entry_label}")
         click.echo(f"Reviewers:      {rules.required_reviewers}")
         click.echo(f"Repo catalog:   {len(rules.repo_catalog)} repos")
+        click.echo(
+            f"Scheduling:     max_concurrent={rules.max_concurrent or 'unlimited'} "
+            f"weight={rules.share_weight:g}"
+        )
         if rules.agent_context:
             click.echo(f"\n--- Agent Context ({len(rules.agent_context)} chars) ---")
             click.echo(rules.agent_context[:2000])
@@ -0,0 +1,42 @@
+"""Completion predicates: when an agent session's outcome is already final.
+
+``run_agent`` evaluates a stage's predicate after every assistant message and
+closes the session once it returns True, saving the turns (and cost) an agent
+spends after it has emitted its verdict or a terminal sentinel. Predicates are
+only attached to stages whose handler reads nothing but the verdict; agents that
+act after their sentinel (the planner stores its plan in memory) run to the end.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from ottonate.jsonscan import JsonValue, Schema
+
+# (text of the latest assistant message, JSON values scanned so far) -> stop now?
+CompletionCheck = Callable[[str, list[JsonValue]], bool]
+
+
+def on_sentinel(*sentinels: str) -> CompletionCheck:
+    """Stop once any of ``sentinels`` appears in an assistant message."""
+
+    def check(text: str, values: list[JsonValue]) -> bool:
+        return any(sentinel in text for sentinel in sentinels)
+
+    return check
+
+
+def on_json(schema: Schema) -> CompletionCheck:
+    """Stop once a JSON value matching ``schema`` has been emitted."""
+
+    def check(text: str, values: list[JsonValue]) -> bool:
+        return any(schema.matches(value) for value in values)
+
+    return check
+
+
+def all_of(*checks: CompletionCheck) -> CompletionCheck:
+    def check(text: str, values: list[JsonValue]) -> bool:
+        return all(c(text, values) for c in checks)
+
+    return check
@@ -0,0 +1,126 @@
+"""Adaptive agent concurrency (AIMD).
+
+The number of agent sessions allowed at once moves between configured bounds at
+runtime: it grows by one slot after a full "round" of clean sessions (as many
+as the current limit) and halves on congestion signals -- a rate-limit event, an
+error rate above threshold over recent sessions, or a session taking much longer
+than its agent's usual duration. Every change is logged as
+``agent_concurrency_adjusted`` for tuning.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import structlog
+
+log = structlog.get_logger()
+
+_MIN_SAMPLES = 5
+_BASELINE_SAMPLES = 3
+_EWMA_ALPHA = 0.2
+
+
+class AdaptiveConcurrency:
+    def __init__(
+        self,
+        initial: int,
+        *,
+        min_limit: int = 1,
+        max_limit: int | None = None,
+        window: int = 20,
+        error_threshold: float = 0.25,
+        latency_factor: float = 2.0,
+        cooldown_s: float = 60.0,
+    ) -> None:
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit or initial)
+        self._limit = min(self.max_limit, max(self.min_limit, initial))
+        self.error_threshold = error_threshold
+        self.latency_factor = latency_factor
+        self.cooldown_s = cooldown_s
+        self.in_use = 0
+        self._changed = asyncio.Condition()
+        self._notifiers: set[asyncio.Task] = set()
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._baseline: dict[str, tuple[float, int]] = {}
+        self._successes = 0
+        self._last_decrease = float("-inf")
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.in_use < self._limit)
+            self.in_use += 1
+        try:
+            yield
+        finally:
+            async with self._changed:
+                self.in_use -= 1
+                self._changed.notify_all()
+
+    def record(self, agent: str, duration_s: float, is_error: bool) -> None:
+        """Feed one finished session into the controller."""
+        self._outcomes.append(is_error)
+        slow = self._update_baseline(agent, duration_s)
+        error_rate = sum(self._outcomes) / len(self._outcomes)
+        if len(self._outcomes) >= _MIN_SAMPLES and error_rate > self.error_threshold:
+            self._decrease("error_rate", error_rate=round(error_rate, 2))
+            self._outcomes.clear()
+        elif slow:
+            self._decrease("latency", agent=agent, duration_s=round(duration_s, 1))
+        elif not is_error:
+            self._successes += 1
+            if self._successes >= self._limit and self._limit < self.max_limit:
+                self._set_limit(self._limit + 1, "additive_increase")
+
+    def on_rate_limit(self) -> None:
+        self._decrease("rate_limit")
+
+    def _update_baseline(self, agent: str, duration_s: float) -> bool:
+        """Track a per-agent EWMA of duration; True if this session was abnormally slow."""
+        if duration_s <= 0:
+            return False
+        baseline, samples = self._baseline.get(agent, (duration_s, 0))
+        slow = samples >= _BASELINE_SAMPLES and duration_s > baseline * self.latency_factor
+        self._baseline[agent] = (baseline + _EWMA_ALPHA * (duration_s - baseline), samples + 1)
+        return slow
+
+    def _decrease(self, reason: str, **details: object) -> None:
+        now = time.monotonic()
+        self._successes = 0
+        # One congestion episode usually produces several signals; react once.
+        if now - self._last_decrease < self.cooldown_s:
+            return
+        self._last_decrease = now
+        self._set_limit(max(self.min_limit, self._limit // 2), reason, **details)
+
+    def _set_limit(self, new_limit: int, reason: str, **details: object) -> None:
+        self._successes = 0
+        if new_limit == self._limit:
+            return
+        log.info(
+            "agent_concurrency_adjusted",
+            old=self._limit,
+            new=new_limit,
+            reason=reason,
+            in_use=self.in_use,
+            **details,
+        )
+        self._limit = new_limit
+        # Wake waiters for the new limit; hold the task so it is not collected first.
+        task = asyncio.get_running_loop().create_task(self._notify())
+        self._notifiers.add(task)
+        task.add_done_callback(self._notifiers.discard)
+
+    async def _notify(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
@@ -18,6 +18,16 @@ class OttonateConfig(BaseSettings):
     github_agent_label: str = "otto"
     github_notify_team: str = ""
 
+    # GitHub transport: "gh" shells out to the gh CLI per call, "http" talks to the
+    # REST/GraphQL API over a pooled keep-alive connection.
+    github_transport: str = "gh"
+    github_token: str = ""
+    github_api_url: str = "https://api.github.com"
+    github_http_pool_size: int = 8
+    # ETag/Last-Modified response cache for the http transport (0 disables).
+    github_cache_path: Path = Path("~/.ottonate/github-cache.sqlite")
+    github_cache_max_mb: int = 64
+
     # Claude
     claude_model: str = "sonnet"
     claude_permission_mode: str = "bypassPermissions"
@@ -34,26 +44,87 @@ class OttonateConfig(BaseSettings):
     idea_poll_enabled: bool = True
 
     # Scheduler
+    # Agent sessions run concurrently (LLM capacity); GitHub-only gate checks have their own pool
     max_concurrent_tickets: int = 3
+    # Adaptive (AIMD) agent concurrency starts at max_concurrent_tickets and moves within
+    # [min, max] on latency, error rate and rate limits; max 0 = max_concurrent_tickets
+    agent_concurrency_min: int = 1
+    agent_concurrency_max: int = 0
+    max_concurrent_github_checks: int = 4
+    # Backlog stories enriched and filed at once (each enrichment is an agent session)
+    backlog_story_concurrency: int = 4
+    # Stories enriched per agent session, sharing one copy of the spec (1 = one session each)
+    story_enrichment_batch_size: int = 1
+    # Fair-share weight of idea PRs vs each repo's issues (repo weights/caps: .ottonate/config.yml)
+    idea_share_weight: float = 1.0
     poll_interval_s: int = 30
+    snapshot_batch_size: int = 20
+    rules_cache_ttl_s: int = 300
+    # Close gate/reviewer sessions as soon as their verdict or terminal sentinel is emitted
+    agent_early_stop: bool = True
+    # Token cap on the variable context of each prompt (diffs, specs, rules, comments);
+    # per-stage overrides as JSON, e.g. {"self_review": 40000}; 0 = unlimited
+    prompt_token_budget: int = 60000
+    prompt_stage_budgets: dict[str, int] = {}
+    # A PR with CI pending is not re-dispatched until its next check: the delay starts here
+    # and doubles per check of the same head SHA up to the max (0 = check every poll)
+    ci_watch_initial_s: int = 60
+    ci_watch_max_s: int = 600
+    # Self-reviews of diffs over this many tokens are split into chunks of about this size,
+    # reviewed by parallel sessions and merged into one verdict; 0 = always one session
+    self_review_chunk_tokens: int = 20000
+    self_review_chunk_concurrency: int = 3
+    # Retries (re-plan, CI fix, self-review fix-up) continue the stage's previous agent session
+    agent_session_resume: bool = True
+
+    # Scale-out: workers sharing an org coordinate through ticket leases ("memory" = single worker)
+    worker_id: str = ""
+    lease_backend: str = "memory"
+    lease_db_path: Path = Path("~/.ottonate/leases.sqlite")
+    lease_ttl_s: int = 120
+
+    # Webhooks (`ottonate run --webhooks`): events drive dispatch, polling reconciles
+    webhook_secret: str = ""
+    webhook_host: str = "0.0.0.0"
+    webhook_port: int = 8090
+    reconcile_interval_s: int = 600
 
     # Retries
     max_plan_retries: int = 2
     max_implement_retries: int = 2
     max_ci_fix_retries: int = 3
     max_review_retries: int = 5
+    max_story_retries: int = 2
 
     # Rate limiting
     rate_limit_base_delay_s: int = 60
     rate_limit_max_delay_s: int = 600
     rate_limit_cooldown_s: int = 300
+    # GitHub API budget: fraction held back for essential calls; polls stretch up to the max
+    github_budget_reserve: float = 0.1
+    poll_interval_max_s: int = 900
+    # Shared limiter for agent sessions (0 = unlimited until the endpoint pushes back)
+    agent_requests_per_min: float = 0
+    agent_tokens_per_min: float = 0
 
     # Paths
     workspace_dir: Path = Path("~/.ottonate/workspaces")
+    # Ticket workspaces are worktrees of one bare mirror per repo; False = full clones
+    workspace_worktrees: bool = True
+    # Workspace GC: reclaim finished tickets every interval (0 = off); quota 0 = unlimited
+    workspace_gc_interval_s: int = 3600
+    workspace_quota_gb: float = 0
+    state_db_path: Path = Path("~/.ottonate/state.sqlite")
 
     def resolved_workspace_dir(self) -> Path:
         return self.workspace_dir.expanduser()
 
+    def prompt_budget(self, stage: str) -> int:
+        return self.prompt_stage_budgets.get(stage, self.prompt_token_budget)
+
+    def agent_concurrency_ceiling(self) -> int:
+        return max(self.agent_concurrency_max, self.max_concurrent_tickets)
+
     @property
     def engineering_repo_full(self) -> str:
         return f"{self.github_org}/{self.github_engineering_repo}"
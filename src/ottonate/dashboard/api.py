@@ -108,6 +108,13 @@ async def attention_queue(request: Request) -> list[dict]:
     return items
 
 
+@router.get("/github-budget")
+async def github_budget(request: Request) -> dict:
+    github = request.app.state.github
+    await github.refresh_rate_limit()
+    return github.budget.snapshot()
+
+
 class UnstickRequest(BaseModel):
     target_stage: str
 
@@ -9,7 +9,7 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
 from ottonate.config import OttonateConfig
-from ottonate.github import GitHubClient
+from ottonate.github import create_github_client
 
 from .api import router as api_router
 from .views import router as views_router
@@ -24,7 +24,7 @@ def create_app(config: OttonateConfig | None = None) -> FastAPI:
     app = FastAPI(title="Ottonate Dashboard")
 
     app.state.config = config
-    app.state.github = GitHubClient()
+    app.state.github = create_github_client(config)
     app.state.templates = Jinja2Templates(directory=str(_HERE / "templates"))
 
     app.mount("/static", StaticFiles(directory=str(_HERE / "static")), name="static")
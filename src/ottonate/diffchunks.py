@@ -0,0 +1,165 @@
+"""Split large PR diffs into reviewable chunks and merge per-chunk verdicts.
+
+A unified diff is split per file (``diff --git``) and, for files too big on
+their own, per hunk (``@@``) with the file header repeated. Related files stay
+together: a test lands next to the module it tests, then files are grouped by
+directory, and groups are packed in diff order into chunks of a bounded size.
+Every step is deterministic so a re-review of the same diff gets the same
+chunks.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from pathlib import PurePosixPath
+
+_FILE_START = re.compile(r"^diff --git ", re.MULTILINE)
+_FILE_PATH = re.compile(r"^diff --git a/(\S+) b/(\S+)")
+_HUNK_START = re.compile(r"^@@ ", re.MULTILINE)
+
+
+@dataclass
+class FileDiff:
+    path: str
+    text: str
+
+
+@dataclass
+class DiffChunk:
+    files: list[str] = field(default_factory=list)
+    text: str = ""
+
+
+def split_diff(diff: str) -> list[FileDiff]:
+    starts = [m.start() for m in _FILE_START.finditer(diff)]
+    if not starts:
+        return []
+    files: list[FileDiff] = []
+    for start, end in zip(starts, [*starts[1:], len(diff)], strict=True):
+        text = diff[start:end]
+        match = _FILE_PATH.match(text)
+        files.append(FileDiff(match.group(2) if match else "?", text))
+    return files
+
+
+def _split_hunks(file_diff: FileDiff, max_chars: int) -> list[FileDiff]:
+    """Pieces of one file's diff no larger than ``max_chars`` where hunks allow."""
+    starts = [m.start() for m in _HUNK_START.finditer(file_diff.text)]
+    if len(file_diff.text) <= max_chars or not starts:
+        return [file_diff]
+    header = file_diff.text[: starts[0]]
+    hunks = [file_diff.text[a:b] for a, b in zip(starts, [*starts[1:], None], strict=True)]
+    pieces: list[FileDiff] = []
+    current = ""
+    for hunk in hunks:
+        if current and len(header) + len(current) + len(hunk) > max_chars:
+            pieces.append(FileDiff(file_diff.path, header + current))
+            current = ""
+        current += hunk
+    pieces.append(FileDiff(file_diff.path, header + current))
+    return pieces
+
+
+_TEST_DIRS = {"test", "tests", "__tests__", "spec"}
+
+
+def _bare_stem(path: PurePosixPath) -> tuple[str, bool]:
+    """The file's stem without test affixes, and whether it had any."""
+    stem = path.stem
+    bare = stem.removeprefix("test_")
+    for suffix in ("_test", ".test", ".spec", "_spec", "Test"):
+        bare = bare.removesuffix(suffix)
+    return bare, bare != stem
+
+
+def _relation_keys(paths: list[str]) -> list[tuple[str, str]]:
+    """Files sharing a key are reviewed together: ``foo.py`` with ``test_foo.py``.
+
+    A module keys on its directory and stem, so same-named files in different
+    packages (two ``utils.py``) stay apart. A test (``test_foo.py``, ``foo.test.ts``,
+    or anything under ``tests/``) takes the key of the first module with its stem
+    whose directory ends with the test's directory minus the test folders, so
+    ``tests/pkg/test_foo.py`` joins ``src/pkg/foo.py``.
+    """
+    files = []
+    for path in paths:
+        pure = PurePosixPath(path)
+        stem, affixed = _bare_stem(pure)
+        parts = pure.parent.parts
+        source_parts = tuple(part for part in parts if part not in _TEST_DIRS)
+        is_test = affixed or len(source_parts) != len(parts)
+        files.append((str(pure.parent), stem, parts, source_parts, is_test))
+
+    keys: list[tuple[str, str]] = []
+    for directory, stem, _, source_parts, is_test in files:
+        key = (directory, stem)
+        if is_test:
+            for other_dir, other_stem, other_parts, _, other_is_test in files:
+                if (
+                    not other_is_test
+                    and other_stem == stem
+                    and other_parts[len(other_parts) - len(source_parts) :] == source_parts
+                ):
+                    key = (other_dir, other_stem)
+                    break
+        keys.append(key)
+    return keys
+
+
+def chunk_diff(diff: str, max_chars: int) -> list[DiffChunk]:
+    """Group a diff into chunks of at most ``max_chars`` (a single hunk may exceed it)."""
+    files = split_diff(diff)
+    if not files:
+        return [DiffChunk(text=diff)] if diff.strip() else []
+
+    # A module and its tests form a unit; units are then grouped by the directory of
+    # their first file. Both keep first-appearance order.
+    units: dict[tuple[str, str], list[FileDiff]] = {}
+    keys = _relation_keys([file_diff.path for file_diff in files])
+    for key, file_diff in zip(keys, files, strict=True):
+        units.setdefault(key, []).append(file_diff)
+    groups: dict[str, list[FileDiff]] = {}
+    for unit in units.values():
+        groups.setdefault(str(PurePosixPath(unit[0].path).parent), []).extend(unit)
+
+    chunks: list[DiffChunk] = []
+    current = DiffChunk()
+    for group in groups.values():
+        for file_diff in group:
+            for piece in _split_hunks(file_diff, max_chars):
+                if current.text and len(current.text) + len(piece.text) > max_chars:
+                    chunks.append(current)
+                    current = DiffChunk()
+                if piece.path not in current.files:
+                    current.files.append(piece.path)
+                current.text += piece.text
+    if current.text:
+        chunks.append(current)
+    return chunks
+
+
+def merge_review_verdicts(verdicts: list[dict | None]) -> dict:
+    """One review verdict from per-chunk verdicts.
+
+    Clean only if every chunk returned a clean verdict; a chunk with no usable
+    verdict counts as ``issues_found`` so nothing slips through unreviewed.
+    """
+    issues: list = []
+    clean = True
+    for index, verdict in enumerate(verdicts):
+        if verdict is None:
+            clean = False
+            issues.append(
+                {
+                    "severity": "major",
+                    "description": f"Review of diff part {index + 1} produced no verdict",
+                }
+            )
+            continue
+        if verdict.get("verdict") != "clean":
+            clean = False
+        chunk_issues = verdict.get("issues") or []
+        if isinstance(chunk_issues, list):
+            issues.extend(chunk_issues)
+    return {"verdict": "clean" if clean else "issues_found", "issues": issues}
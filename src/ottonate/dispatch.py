@@ -0,0 +1,312 @@
+"""Priority dispatch queue for ticket and idea-PR handlers.
+
+Polls and webhooks submit work here instead of spawning a task per ticket.
+Items are ordered by how close the ticket is to done (merge-ready and CI fixes
+before new planning) and run in one of two independently sized pools: the agent
+pool, bounded by LLM capacity, and the GitHub pool for handlers that only read
+GitHub and swap labels, bounded by API quota. Gate checks therefore advance
+within a poll interval even while every agent slot is busy.
+
+Within a priority level, items are picked by weighted fair queuing across
+flows (one per repo, plus one per repo for idea PRs), so a repo with thirty
+open stories cannot take every slot from the others. Flows can also carry a
+hard cap on running items.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from enum import StrEnum
+
+import structlog
+
+from ottonate.models import CIStatus, Label, ReviewStatus, Ticket
+
+log = structlog.get_logger()
+
+# Lower runs first. Near-done work outranks new planning so finished PRs land
+# before the pipeline starts more of them.
+STAGE_PRIORITY: dict[Label, int] = {
+    Label.MERGE_READY: 0,
+    Label.PR: 1,
+    Label.REVIEW: 1,
+    Label.SELF_REVIEW: 2,
+    Label.IDEA_PENDING: 2,
+    Label.SPEC_REVIEW: 2,
+    Label.BACKLOG_REVIEW: 2,
+    Label.PLAN: 3,
+    Label.PLAN_REVIEW: 3,
+    Label.SPEC_APPROVED: 4,
+    Label.IDEA_REVIEW: 4,
+    Label.RETRO: 5,
+}
+IDEA_PR_PRIORITY = 4
+NEW_TICKET_PRIORITY = 6
+
+# Stages whose handler only reads GitHub and swaps labels. agentPR and agentReview
+# can escalate to the CI fixer / review responder, so they only run on a GitHub
+# worker when the snapshot shows they won't (see ticket_priority).
+GITHUB_POOL_LABELS = {
+    Label.IDEA_PENDING,
+    Label.SPEC_REVIEW,
+    Label.BACKLOG_REVIEW,
+    Label.PR,
+    Label.REVIEW,
+    Label.MERGE_READY,
+}
+
+_WAIT_WINDOW = 200
+
+
+class Pool(StrEnum):
+    AGENT = "agent"
+    GITHUB = "github"
+
+
+@dataclass
+class WorkItem:
+    key: str
+    run: Callable[[], Awaitable[None]]
+    priority: int
+    pool: Pool = Pool.AGENT
+    flow: str = ""
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class PoolStats:
+    workers: int
+    queued: int
+    running: int
+    completed: int
+    oldest_wait_s: float
+    avg_wait_s: float
+    max_wait_s: float
+
+
+@dataclass
+class FlowStats:
+    weight: float
+    max_running: int
+    queued: int
+    running: int
+
+
+@dataclass
+class _Flow:
+    weight: float = 1.0
+    max_running: int = 0
+    running: int = 0
+    # Virtual finish time of the flow's last dispatched item (WFQ).
+    vtime: float = 0.0
+
+    @property
+    def at_cap(self) -> bool:
+        return bool(self.max_running) and self.running >= self.max_running
+
+
+def ticket_priority(ticket: Ticket, *, new_ticket: bool = False) -> tuple[int, Pool]:
+    """Priority and pool for a ticket at its current stage."""
+    stage = ticket.agent_label
+    if new_ticket or stage is None:
+        return NEW_TICKET_PRIORITY, Pool.AGENT
+    priority = STAGE_PRIORITY.get(stage, NEW_TICKET_PRIORITY)
+    if stage not in GITHUB_POOL_LABELS or _may_run_agent(ticket):
+        return priority, Pool.AGENT
+    return priority, Pool.GITHUB
+
+
+def _may_run_agent(ticket: Ticket) -> bool:
+    """Whether an agentPR/agentReview handler may escalate to an agent run.
+
+    Failed CI runs the CI fixer and requested changes run the review responder.
+    Without a snapshot (e.g. a webhook-enqueued ticket) the outcome is unknown, so
+    the ticket goes to the agent pool rather than risk holding a GitHub worker.
+    """
+    snapshot = ticket.snapshot
+    if ticket.agent_label == Label.PR:
+        return snapshot is None or snapshot.ci_status in (None, CIStatus.FAILED)
+    if ticket.agent_label == Label.REVIEW:
+        return snapshot is None or snapshot.review_status in (
+            None,
+            ReviewStatus.CHANGES_REQUESTED,
+        )
+    return False
+
+
+class DispatchQueue:
+    """Bounded worker pools draining priority queues with per-flow fair share.
+
+    Workers start lazily on the first submit, so the queue can be built outside
+    a running event loop. With ``github_workers=0`` GitHub-pool items run in the
+    agent pool.
+    """
+
+    def __init__(self, agent_workers: int, github_workers: int = 0) -> None:
+        self._sizes = {Pool.AGENT: max(1, agent_workers), Pool.GITHUB: max(0, github_workers)}
+        self._items: dict[Pool, list[WorkItem]] = {pool: [] for pool in Pool}
+        self._flows: dict[str, _Flow] = {}
+        self._vclock = 0.0
+        self._tasks: list[asyncio.Task] = []
+        self._notifiers: set[asyncio.Task] = set()
+        self._running: dict[Pool, set[str]] = {pool: set() for pool in Pool}
+        self._completed: dict[Pool, int] = {pool: 0 for pool in Pool}
+        self._waits: dict[Pool, deque[float]] = {pool: deque(maxlen=_WAIT_WINDOW) for pool in Pool}
+        self._queued: dict[str, WorkItem] = {}
+        self._seq: dict[str, int] = {}
+        self._counter = itertools.count()
+        self._changed: asyncio.Condition | None = None
+        self._idle: asyncio.Event | None = None
+        self._unfinished = 0
+
+    def configure_flow(self, flow: str, *, weight: float = 1.0, max_running: int = 0) -> None:
+        """Set a flow's fair-share weight and running cap (0 = uncapped)."""
+        state = self._flows.setdefault(flow, _Flow())
+        state.weight = weight if weight > 0 else 1.0
+        state.max_running = max(0, max_running)
+        self._notify()
+
+    def submit(self, item: WorkItem) -> bool:
+        """Queue ``item``. Returns False if an item with the same key is already queued."""
+        if item.key in self._queued:
+            return False
+        if item.pool == Pool.GITHUB and not self._sizes[Pool.GITHUB]:
+            item.pool = Pool.AGENT
+        self._start()
+        self._flows.setdefault(item.flow, _Flow())
+        self._queued[item.key] = item
+        self._seq[item.key] = next(self._counter)
+        self._items[item.pool].append(item)
+        self._unfinished += 1
+        self._idle.clear()
+        self._notify()
+        log.debug(
+            "dispatch_queued",
+            key=item.key,
+            pool=item.pool.value,
+            flow=item.flow,
+            priority=item.priority,
+            depth=len(self._items[item.pool]),
+        )
+        return True
+
+    async def join(self) -> None:
+        """Wait until every queued item has finished running."""
+        if self._idle is not None:
+            await self._idle.wait()
+
+    async def close(self) -> None:
+        tasks = [*self._tasks, *self._notifiers]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def stats(self) -> dict[str, PoolStats]:
+        now = time.monotonic()
+        result: dict[str, PoolStats] = {}
+        for pool in Pool:
+            if not self._sizes[pool]:
+                continue
+            queued = self._items[pool]
+            waits = self._waits[pool]
+            result[pool.value] = PoolStats(
+                workers=self._sizes[pool],
+                queued=len(queued),
+                running=len(self._running[pool]),
+                completed=self._completed[pool],
+                oldest_wait_s=round(max((now - i.enqueued_at for i in queued), default=0.0), 3),
+                avg_wait_s=round(sum(waits) / len(waits), 3) if waits else 0.0,
+                max_wait_s=round(max(waits, default=0.0), 3),
+            )
+        return result
+
+    def flow_stats(self) -> dict[str, FlowStats]:
+        queued: dict[str, int] = {}
+        for item in self._queued.values():
+            queued[item.flow] = queued.get(item.flow, 0) + 1
+        return {
+            name: FlowStats(
+                weight=flow.weight,
+                max_running=flow.max_running,
+                queued=queued.get(name, 0),
+                running=flow.running,
+            )
+            for name, flow in self._flows.items()
+            if name and (flow.running or queued.get(name))
+        }
+
+    def _start(self) -> None:
+        if self._tasks:
+            return
+        self._changed = asyncio.Condition()
+        self._idle = asyncio.Event()
+        for pool, size in self._sizes.items():
+            for i in range(size):
+                self._tasks.append(
+                    asyncio.create_task(self._worker(pool), name=f"dispatch-{pool}-{i}")
+                )
+
+    def _notify(self) -> None:
+        """Wake the workers from sync code; the task is kept until it has run."""
+        if self._changed is not None:
+            task = asyncio.get_running_loop().create_task(self._notify_all())
+            self._notifiers.add(task)
+            task.add_done_callback(self._notifiers.discard)
+
+    async def _notify_all(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+    def _pick(self, pool: Pool) -> WorkItem | None:
+        """Most urgent item whose flow is under its cap; WFQ breaks priority ties."""
+        best: WorkItem | None = None
+        best_key: tuple[int, float, int] | None = None
+        for item in self._items[pool]:
+            flow = self._flows[item.flow]
+            if flow.at_cap:
+                continue
+            key = (item.priority, max(flow.vtime, self._vclock), self._seq[item.key])
+            if best_key is None or key < best_key:
+                best, best_key = item, key
+        if best is None:
+            return None
+        flow = self._flows[best.flow]
+        start = max(flow.vtime, self._vclock)
+        self._vclock = start
+        flow.vtime = start + 1 / flow.weight
+        flow.running += 1
+        self._items[pool].remove(best)
+        self._queued.pop(best.key, None)
+        self._seq.pop(best.key, None)
+        return best
+
+    async def _worker(self, pool: Pool) -> None:
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: self._has_eligible(pool))
+                item = self._pick(pool)
+            if item is None:
+                continue
+            self._waits[pool].append(time.monotonic() - item.enqueued_at)
+            self._running[pool].add(item.key)
+            try:
+                await item.run()
+            except Exception:
+                log.exception("dispatch_item_error", key=item.key)
+            finally:
+                self._running[pool].discard(item.key)
+                self._completed[pool] += 1
+                self._flows[item.flow].running -= 1
+                self._unfinished -= 1
+                if not self._unfinished:
+                    self._idle.set()
+                await self._notify_all()
+
+    def _has_eligible(self, pool: Pool) -> bool:
+        return any(not self._flows[item.flow].at_cap for item in self._items[pool])
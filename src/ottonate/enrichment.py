@@ -3,9 +3,12 @@
 from __future__ import annotations
 
 import json
-import re
 from dataclasses import dataclass
 
+from ottonate.jsonscan import Schema, find_json, scan_json
+
+_STORY = Schema({"title": str})
+
 
 @dataclass
 class EnrichedStory:
@@ -70,21 +73,72 @@ Respond with ONLY the JSON object.
 """
 
 
+def enrich_stories_prompt(stories: list[dict], spec_context: str = "") -> str:
+    """Prompt to enrich several stories of one backlog in a single session."""
+    ctx = f"\n### Spec Context\n{spec_context}\n" if spec_context else ""
+    numbered = [{"index": i, **story} for i, story in enumerate(stories)]
+    return f"""You are enriching GitHub issues to make them execution-grade.
+{ctx}
+### Original Stories
+{json.dumps(numbered, indent=2)}
+
+For each story, produce a JSON object with these fields:
+- "index": integer (the story's index from the list above)
+- "title": string (refined title)
+- "repo": string (target repository name, e.g. "flow-api")
+- "description": string (clear, actionable description)
+- "acceptance_criteria": array of strings (testable criteria)
+- "technical_notes": array of strings (implementation guidance)
+- "test_expectations": array of strings (specific tests to write)
+- "estimate": string (S/M/L with justification)
+- "dependencies": array of strings (issue refs or descriptions)
+
+Be specific and actionable. Each acceptance criterion must be independently testable.
+Respond with ONLY a JSON array holding one object per story, in the same order.
+"""
+
+
 def parse_enriched_story(text: str) -> EnrichedStory | None:
-    match = re.search(r"\{[\s\S]*\}", text)
-    if not match:
-        return None
-    try:
-        data = json.loads(match.group())
-        return EnrichedStory(
-            title=data.get("title", ""),
-            description=data.get("description", ""),
-            acceptance_criteria=data.get("acceptance_criteria", []),
-            technical_notes=data.get("technical_notes", []),
-            test_expectations=data.get("test_expectations", []),
-            estimate=data.get("estimate", "M"),
-            dependencies=data.get("dependencies", []),
-            repo=data.get("repo", ""),
-        )
-    except (json.JSONDecodeError, KeyError):
-        return None
+    data = find_json(scan_json(text), _STORY)
+    return _story_from_dict(data) if data else None
+
+
+def parse_enriched_stories(text: str, count: int) -> list[EnrichedStory | None]:
+    """Parse a batch response into ``count`` slots, None where an entry is unusable.
+
+    When the array does not decode as a whole (a malformed or truncated entry),
+    its objects are recovered one at a time, so only the bad entry is lost.
+    Entries are placed by their ``index`` field, falling back to their position.
+    """
+    values = scan_json(text)
+    # The last array holding any object is the batch; entries that are not objects
+    # (null, a stray string) are skipped without losing the others.
+    batch = next((v for v in reversed(values) if _is_batch(v)), None)
+    entries = batch if batch is not None else [v for v in values if isinstance(v, dict)]
+    results: list[EnrichedStory | None] = [None] * count
+    for position, data in enumerate(entries):
+        if not isinstance(data, dict) or not _STORY.matches(data):
+            continue
+        index = data.get("index", position)
+        if not isinstance(index, int) or not 0 <= index < count or results[index]:
+            index = position
+        if index < count and results[index] is None:
+            results[index] = _story_from_dict(data)
+    return results
+
+
+def _is_batch(value: object) -> bool:
+    return isinstance(value, list) and any(isinstance(item, dict) for item in value)
+
+
+def _story_from_dict(data: dict) -> EnrichedStory:
+    return EnrichedStory(
+        title=data.get("title", ""),
+        description=data.get("description", ""),
+        acceptance_criteria=data.get("acceptance_criteria", []),
+        technical_notes=data.get("technical_notes", []),
+        test_expectations=data.get("test_expectations", []),
+        estimate=data.get("estimate", "M"),
+        dependencies=data.get("dependencies", []),
+        repo=data.get("repo", ""),
+    )
@@ -8,12 +8,24 @@ import re
 
 import structlog
 
-from ottonate.models import CIStatus, Label, ReviewComment, ReviewStatus
+from ottonate.cilogs import FailedCheck, failure_report
+from ottonate.config import OttonateConfig
+from ottonate.github_budget import RateBudget
+from ottonate.models import CIStatus, Label, ReviewComment, ReviewStatus, TicketSnapshot
 
 log = structlog.get_logger()
 
 
 class GitHubClient:
+    def __init__(self, budget: RateBudget | None = None) -> None:
+        self.budget = budget or RateBudget()
+
+    async def refresh_rate_limit(self) -> None:
+        """Update ``budget`` from ``GET /rate_limit`` (does not count against the quota)."""
+        stdout = await self._gh("api", "rate_limit")
+        if stdout:
+            self.budget.update_from_rate_limit(json.loads(stdout))
+
     # -- Issue operations --
 
     async def search_issues(self, owner: str, label: str) -> list[dict]:
@@ -181,23 +193,7 @@ class GitHubClient:
         )
         if not stdout:
             return []
-        events = json.loads(stdout)
-        result = []
-        for e in events:
-            event_type = e.get("event")
-            if event_type not in ("labeled", "unlabeled"):
-                continue
-            label_data = e.get("label")
-            if not label_data or "name" not in label_data:
-                continue
-            result.append(
-                {
-                    "event": event_type,
-                    "label": label_data["name"],
-                    "created_at": e.get("created_at", ""),
-                }
-            )
-        return result
+        return _label_events(json.loads(stdout))
 
     async def get_comments(self, owner: str, repo: str, number: int) -> list[str]:
         stdout = await self._gh(
@@ -286,36 +282,48 @@ class GitHubClient:
     async def get_ci_status(self, owner: str, repo: str, pr_number: int | None) -> CIStatus:
         if pr_number is None:
             return CIStatus.PENDING
-
-        stdout = await self._gh(
-            "pr",
-            "checks",
-            str(pr_number),
-            "--repo",
-            f"{owner}/{repo}",
-            "--json",
-            "name,state",
-        )
-        if not stdout:
-            return CIStatus.PENDING
-
-        checks = json.loads(stdout)
-        if not checks:
-            return CIStatus.PENDING
-
-        for check in checks:
-            state = check.get("state", "").upper()
-            if state in ("PENDING", "QUEUED", "IN_PROGRESS"):
-                return CIStatus.PENDING
-            if state in ("FAILURE", "ERROR", "TIMED_OUT"):
-                return CIStatus.FAILED
-
-        return CIStatus.PASSED
-
-    async def get_ci_failure_logs(self, owner: str, repo: str, pr_number: int | None) -> str:
+        checks = await self._pr_checks(owner, repo, pr_number)
+        return _ci_status_from_checks(checks)
+
+    async def get_ci_failure_logs(
+        self,
+        owner: str,
+        repo: str,
+        pr_number: int | None,
+        *,
+        max_checks: int = 3,
+        limit_tokens: int = 0,
+    ) -> str:
+        """Error windows from the failed checks' run logs, fetched concurrently (see cilogs)."""
         if pr_number is None:
             return "No PR number"
 
+        checks = await self._pr_checks(owner, repo, pr_number)
+        if not checks:
+            return "Could not fetch checks"
+
+        failed = [
+            FailedCheck(c.get("name", "unknown"), details_url=c.get("link", ""))
+            for c in checks
+            if c.get("state", "").upper() in ("FAILURE", "ERROR")
+        ][:max_checks]
+        if not failed:
+            return "No failure details available"
+
+        # Checks of one workflow run share its log: fetch each run once.
+        run_ids = [re.search(r"/actions/runs/(\d+)", check.details_url) for check in failed]
+        unique = list(dict.fromkeys(m.group(1) for m in run_ids if m))
+        logs = await asyncio.gather(
+            *(self._failed_run_log(owner, repo, run_id) for run_id in unique)
+        )
+        by_run = dict(zip(unique, logs, strict=True))
+        for check, match in zip(failed, run_ids, strict=True):
+            if match:
+                check.log = by_run[match.group(1)] or ""
+        return failure_report(failed, limit_tokens)
+
+    async def _pr_checks(self, owner: str, repo: str, pr_number: int) -> list[dict]:
+        """List a PR's checks as ``{"name", "state", "link"}`` dicts (gh's vocabulary)."""
         stdout = await self._gh(
             "pr",
             "checks",
@@ -326,35 +334,18 @@ class GitHubClient:
             "name,state,link",
         )
         if not stdout:
-            return "Could not fetch checks"
+            return []
+        return json.loads(stdout)
 
-        checks = json.loads(stdout)
-        failed = [c for c in checks if c.get("state", "").upper() in ("FAILURE", "ERROR")]
-
-        logs_parts = []
-        for check in failed[:3]:
-            name = check.get("name", "unknown")
-            logs_parts.append(f"## Failed check: {name}")
-
-            details_url = check.get("link", "")
-            run_id_match = re.search(r"/actions/runs/(\d+)", details_url)
-            if run_id_match:
-                run_stdout = await self._gh(
-                    "run",
-                    "view",
-                    run_id_match.group(1),
-                    "--repo",
-                    f"{owner}/{repo}",
-                    "--log-failed",
-                )
-                if run_stdout:
-                    logs_parts.append(run_stdout[:5000])
-                else:
-                    logs_parts.append(f"Details: {details_url}")
-            else:
-                logs_parts.append(f"Details: {details_url or 'N/A'}")
-
-        return "\n\n".join(logs_parts) or "No failure details available"
+    async def _failed_run_log(self, owner: str, repo: str, run_id: str) -> str:
+        return await self._gh(
+            "run",
+            "view",
+            run_id,
+            "--repo",
+            f"{owner}/{repo}",
+            "--log-failed",
+        )
 
     async def get_pr_diff(self, owner: str, repo: str, pr_number: int | None) -> str:
         if pr_number is None:
@@ -385,25 +376,7 @@ class GitHubClient:
             return ReviewStatus.PENDING
 
         data = json.loads(stdout)
-        reviews = data.get("reviews", [])
-        if not reviews:
-            return ReviewStatus.PENDING
-
-        latest_by_author: dict[str, str] = {}
-        for review in reviews:
-            author = review.get("author", {}).get("login", "")
-            state = review.get("state", "").upper()
-            if author:
-                latest_by_author[author] = state
-
-        states = set(latest_by_author.values())
-        if "APPROVED" in states and "CHANGES_REQUESTED" not in states:
-            return ReviewStatus.APPROVED
-        if "CHANGES_REQUESTED" in states:
-            return ReviewStatus.CHANGES_REQUESTED
-        if "COMMENTED" in states:
-            return ReviewStatus.COMMENTED
-        return ReviewStatus.PENDING
+        return _review_status_from_reviews(data.get("reviews", []))
 
     async def get_unaddressed_comments(
         self, owner: str, repo: str, pr_number: int | None, bot_username: str
@@ -419,31 +392,7 @@ class GitHubClient:
         if not stdout:
             return []
 
-        all_comments = json.loads(stdout)
-        bot_replied_ids = {
-            c.get("in_reply_to_id")
-            for c in all_comments
-            if c.get("user", {}).get("login") == bot_username and c.get("in_reply_to_id")
-        }
-
-        result = []
-        for c in all_comments:
-            if c.get("user", {}).get("login") == bot_username:
-                continue
-            if c.get("id") in bot_replied_ids:
-                continue
-            result.append(
-                ReviewComment(
-                    id=c["id"],
-                    author=c.get("user", {}).get("login", "unknown"),
-                    body=c.get("body", ""),
-                    path=c.get("path"),
-                    line=c.get("line") or c.get("original_line"),
-                    created_at=c.get("created_at"),
-                )
-            )
-
-        return result
+        return _unaddressed_comments(json.loads(stdout), bot_username)
 
     async def get_default_branch(self, owner: str, repo: str) -> str:
         stdout = await self._gh(
@@ -460,6 +409,15 @@ class GitHubClient:
                 return branch
         return "main"
 
+    async def get_branch_sha(self, owner: str, repo: str, branch: str) -> str | None:
+        stdout = await self._gh(
+            "api",
+            "-H",
+            "Accept: application/vnd.github.sha",
+            f"repos/{owner}/{repo}/commits/{branch}",
+        )
+        return stdout.strip() or None
+
     # -- Project operations --
 
     async def create_project(self, owner: str, title: str) -> str:
@@ -506,6 +464,15 @@ class GitHubClient:
         data = json.loads(stdout)
         return data.get("items", data) if isinstance(data, dict) else data
 
+    async def list_org_repos(self, owner: str) -> list[str]:
+        """Names of the org's (or user's) non-archived repos."""
+        stdout = await self._gh(
+            "repo", "list", owner, "--no-archived", "--json", "name", "--limit", "1000"
+        )
+        if not stdout:
+            return []
+        return [item["name"] for item in json.loads(stdout) if item.get("name")]
+
     # -- Idea PR operations --
 
     async def list_open_prs(self, owner: str, repo: str) -> list[dict]:
@@ -698,40 +665,307 @@ class GitHubClient:
     ) -> list[str]:
         """Create any missing labels in a repo. Returns list of labels created.
 
-        ``labels`` maps label name to hex color (without #).
+        ``labels`` maps label name to hex color (without #). Raises RuntimeError
+        if the labels cannot be listed or any of the missing ones is not created.
         """
         stdout = await self._gh(
-            "label", "list", "--repo", f"{owner}/{repo}", "--json", "name", "--limit", "200"
+            "label", "list", "--repo", f"{owner}/{repo}", "--json", "name", "--limit", "200",
+            check=True,
         )
-        existing = set()
-        if stdout:
-            existing = {item.get("name", "") for item in json.loads(stdout)}
+        existing = {item.get("name", "") for item in json.loads(stdout or "[]")}
 
         created: list[str] = []
+        failed: list[str] = []
         for name, color in labels.items():
             if name not in existing:
-                result = await self._gh(
-                    "label", "create", name,
-                    "--repo", f"{owner}/{repo}",
-                    "--color", color,
-                    "--force",
-                )
-                if result or result == "":
-                    created.append(name)
-                    log.info("label_created", repo=f"{owner}/{repo}", label=name)
+                try:
+                    await self._gh(
+                        "label", "create", name,
+                        "--repo", f"{owner}/{repo}",
+                        "--color", color,
+                        "--force",
+                        check=True,
+                    )
+                except RuntimeError:
+                    failed.append(name)
+                    continue
+                created.append(name)
+                log.info("label_created", repo=f"{owner}/{repo}", label=name)
+        if failed:
+            raise RuntimeError(f"Failed to create labels in {owner}/{repo}: {', '.join(failed)}")
         return created
 
+    # -- Batched ticket state --
+
+    async def get_ticket_snapshots(
+        self, owner: str, refs: list[tuple[str, int]], *, batch_size: int = 20
+    ) -> dict[tuple[str, int], TicketSnapshot]:
+        """Fetch labels, comments, linked PR, CI rollup and reviews for many issues.
+
+        ``refs`` are ``(repo, issue_number)`` pairs. Issues are fetched in GraphQL
+        batches of ``batch_size`` aliased lookups; missing issues are omitted.
+        """
+        batches = [refs[i : i + batch_size] for i in range(0, len(refs), batch_size)]
+        results = await asyncio.gather(
+            *(self._fetch_snapshot_batch(owner, batch) for batch in batches)
+        )
+        snapshots: dict[tuple[str, int], TicketSnapshot] = {}
+        for batch_result in results:
+            snapshots.update(batch_result)
+        return snapshots
+
+    async def _fetch_snapshot_batch(
+        self, owner: str, batch: list[tuple[str, int]]
+    ) -> dict[tuple[str, int], TicketSnapshot]:
+        params: list[str] = []
+        selections: list[str] = []
+        variables: dict = {"owner": owner}
+        for i, (repo, number) in enumerate(batch):
+            params.append(f"$r{i}: String!, $n{i}: Int!")
+            selections.append(
+                f"t{i}: repository(owner: $owner, name: $r{i}) "
+                f"{{ issue(number: $n{i}) {{ ...ticket }} }}"
+            )
+            variables[f"r{i}"] = repo
+            variables[f"n{i}"] = number
+        query = (
+            f"query($owner: String!, {', '.join(params)}) {{\n"
+            + "\n".join(selections)
+            + f"\n}}\n{_SNAPSHOT_FRAGMENTS}"
+        )
+        data = await self._graphql(query, variables)
+
+        snapshots: dict[tuple[str, int], TicketSnapshot] = {}
+        for i, (repo, number) in enumerate(batch):
+            issue = (data.get(f"t{i}") or {}).get("issue")
+            if issue:
+                snapshots[(repo, number)] = _snapshot_from_issue(owner, repo, issue)
+        return snapshots
+
     # -- Internal --
 
-    async def _gh(self, *args: str) -> str:
+    async def _graphql(self, query: str, variables: dict | None = None) -> dict:
+        stdout = await self._gh(
+            "api",
+            "graphql",
+            "--input",
+            "-",
+            stdin=json.dumps({"query": query, "variables": variables or {}}),
+        )
+        if not stdout:
+            return {}
+        data = json.loads(stdout)
+        if data.get("errors"):
+            log.warning("github_graphql_error", errors=data["errors"])
+        return data.get("data") or {}
+
+    async def _gh(self, *args: str, stdin: str | None = None, check: bool = False) -> str:
+        """Run ``gh`` and return its stdout; on failure "" (or RuntimeError with ``check``)."""
         proc = await asyncio.create_subprocess_exec(
             "gh",
             *args,
+            stdin=asyncio.subprocess.PIPE if stdin is not None else None,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
-        stdout, stderr = await proc.communicate()
+        stdout, stderr = await proc.communicate(stdin.encode() if stdin is not None else None)
         if proc.returncode != 0:
-            log.warning("gh_error", args=args, stderr=stderr.decode())
+            error = stderr.decode()
+            if "rate limit" in error.lower():
+                self.budget.mark_exhausted("search" if args[:1] == ("search",) else "core")
+                log.warning("github_rate_limited", args=args)
+            log.warning("gh_error", args=args, stderr=error)
+            if check:
+                raise RuntimeError(f"gh {' '.join(args[:2])} failed: {error.strip()}")
             return ""
         return stdout.decode()
+
+
+def create_github_client(config: OttonateConfig) -> GitHubClient:
+    """Build the GitHub client for the configured transport (``gh`` or ``http``)."""
+    budget = RateBudget(config.github_budget_reserve)
+    if config.github_transport == "http":
+        from ottonate.github_http import HttpGitHubClient
+        from ottonate.http_cache import ResponseCache
+
+        cache = None
+        if config.github_cache_max_mb > 0:
+            cache = ResponseCache(
+                config.github_cache_path, max_bytes=config.github_cache_max_mb * 1024 * 1024
+            )
+        return HttpGitHubClient(
+            config.github_token,
+            api_url=config.github_api_url,
+            pool_size=config.github_http_pool_size,
+            cache=cache,
+            budget=budget,
+        )
+    return GitHubClient(budget)
+
+
+# -- Response interpretation (shared by all transports) --
+
+_SNAPSHOT_FRAGMENTS = """
+fragment ticket on Issue {
+  number title body state
+  labels(first: 50) { nodes { name } }
+  comments(last: 100) { nodes { body } }
+  timelineItems(itemTypes: [CROSS_REFERENCED_EVENT, CONNECTED_EVENT], last: 25) {
+    nodes {
+      __typename
+      ... on CrossReferencedEvent { source { ... on PullRequest { ...linkedPr } } }
+      ... on ConnectedEvent { subject { ... on PullRequest { ...linkedPr } } }
+    }
+  }
+}
+fragment linkedPr on PullRequest {
+  number state headRefName headRefOid
+  repository { name owner { login } }
+  reviews(last: 50) { nodes { author { login } state } }
+  commits(last: 1) { nodes { commit { statusCheckRollup { contexts(first: 100) { nodes {
+    __typename
+    ... on CheckRun { name status conclusion detailsUrl }
+    ... on StatusContext { context state targetUrl }
+  } } } } } }
+}
+"""
+
+
+def _snapshot_from_issue(owner: str, repo: str, issue: dict) -> TicketSnapshot:
+    snapshot = TicketSnapshot(
+        title=issue.get("title", ""),
+        body=issue.get("body") or "",
+        state=(issue.get("state") or "").upper(),
+        labels={n.get("name", "") for n in (issue.get("labels") or {}).get("nodes", [])},
+        comments=[n.get("body", "") for n in (issue.get("comments") or {}).get("nodes", [])],
+    )
+    pr = _pick_linked_pr(owner, repo, issue)
+    if pr:
+        snapshot.pr_number = pr.get("number")
+        snapshot.pr_state = (pr.get("state") or "").upper() or None
+        snapshot.pr_head_sha = pr.get("headRefOid")
+        commits = (pr.get("commits") or {}).get("nodes") or []
+        rollup = ((commits[0].get("commit") or {}).get("statusCheckRollup") if commits else None)
+        contexts = ((rollup or {}).get("contexts") or {}).get("nodes", [])
+        snapshot.ci_status = _ci_status_from_checks([_check_from_context(c) for c in contexts])
+        snapshot.review_status = _review_status_from_reviews(
+            (pr.get("reviews") or {}).get("nodes", [])
+        )
+    return snapshot
+
+
+def _pick_linked_pr(owner: str, repo: str, issue: dict) -> dict | None:
+    """Choose the issue's PR from its timeline, preferring a branch named after it."""
+    candidates: list[dict] = []
+    for node in (issue.get("timelineItems") or {}).get("nodes", []):
+        pr = (node or {}).get("source") or (node or {}).get("subject")
+        if not pr or not pr.get("number"):
+            continue
+        pr_repo = pr.get("repository") or {}
+        if pr_repo.get("name") != repo or (pr_repo.get("owner") or {}).get("login") != owner:
+            continue
+        candidates.append(pr)
+    if not candidates:
+        return None
+    number = issue.get("number")
+    if number:
+        # branch_pattern puts the issue number in its own path segment ("42/...", "fix/42-...")
+        named = re.compile(rf"(?:^|/){number}(?:[/_-]|$)")
+        for pr in reversed(candidates):
+            if named.search(pr.get("headRefName", "")):
+                return pr
+    return candidates[-1]
+
+
+def _check_from_context(node: dict) -> dict:
+    """Translate a GraphQL rollup context into gh's ``pr checks`` shape."""
+    if node.get("__typename") == "StatusContext":
+        return {
+            "name": node.get("context", ""),
+            "state": (node.get("state") or "").upper(),
+            "link": node.get("targetUrl") or "",
+        }
+    status = (node.get("status") or "").upper()
+    state = (node.get("conclusion") or "").upper() if status == "COMPLETED" else status
+    return {"name": node.get("name", ""), "state": state, "link": node.get("detailsUrl") or ""}
+
+
+def _label_events(events: list[dict]) -> list[dict]:
+    """Reduce raw timeline events to labeled/unlabeled entries."""
+    result = []
+    for e in events:
+        event_type = e.get("event")
+        if event_type not in ("labeled", "unlabeled"):
+            continue
+        label_data = e.get("label")
+        if not label_data or "name" not in label_data:
+            continue
+        result.append(
+            {
+                "event": event_type,
+                "label": label_data["name"],
+                "created_at": e.get("created_at", ""),
+            }
+        )
+    return result
+
+
+def _ci_status_from_checks(checks: list[dict]) -> CIStatus:
+    if not checks:
+        return CIStatus.PENDING
+
+    for check in checks:
+        state = check.get("state", "").upper()
+        if state in ("PENDING", "QUEUED", "IN_PROGRESS"):
+            return CIStatus.PENDING
+        if state in ("FAILURE", "ERROR", "TIMED_OUT"):
+            return CIStatus.FAILED
+
+    return CIStatus.PASSED
+
+
+def _review_status_from_reviews(reviews: list[dict]) -> ReviewStatus:
+    if not reviews:
+        return ReviewStatus.PENDING
+
+    latest_by_author: dict[str, str] = {}
+    for review in reviews:
+        author = (review.get("author") or {}).get("login", "")
+        state = review.get("state", "").upper()
+        if author:
+            latest_by_author[author] = state
+
+    states = set(latest_by_author.values())
+    if "APPROVED" in states and "CHANGES_REQUESTED" not in states:
+        return ReviewStatus.APPROVED
+    if "CHANGES_REQUESTED" in states:
+        return ReviewStatus.CHANGES_REQUESTED
+    if "COMMENTED" in states:
+        return ReviewStatus.COMMENTED
+    return ReviewStatus.PENDING
+
+
+def _unaddressed_comments(all_comments: list[dict], bot_username: str) -> list[ReviewComment]:
+    bot_replied_ids = {
+        c.get("in_reply_to_id")
+        for c in all_comments
+        if c.get("user", {}).get("login") == bot_username and c.get("in_reply_to_id")
+    }
+
+    result = []
+    for c in all_comments:
+        if c.get("user", {}).get("login") == bot_username:
+            continue
+        if c.get("id") in bot_replied_ids:
+            continue
+        result.append(
+            ReviewComment(
+                id=c["id"],
+                author=c.get("user", {}).get("login", "unknown"),
+                body=c.get("body", ""),
+                path=c.get("path"),
+                line=c.get("line") or c.get("original_line"),
+                created_at=c.get("created_at"),
+            )
+        )
+    return result
@@ -0,0 +1,131 @@
+"""GitHub API rate-limit budget tracking and quota-aware pacing.
+
+The client records the remaining ``core``, ``search`` and ``graphql`` budgets
+from ``X-RateLimit-*`` response headers (http transport) and from the free
+``/rate_limit`` endpoint (both transports). The scheduler uses the budget to
+stretch its poll interval when a poll would otherwise run the quota dry before
+the window resets, and handlers skip non-essential calls while the budget is
+below the reserve.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+import structlog
+
+log = structlog.get_logger()
+
+TRACKED_RESOURCES = ("core", "search", "graphql")
+
+
+@dataclass
+class RateBucket:
+    limit: int
+    remaining: int
+    reset_at: float
+
+    @property
+    def fraction_remaining(self) -> float:
+        return self.remaining / self.limit if self.limit else 1.0
+
+    def seconds_to_reset(self, now: float | None = None) -> float:
+        return max(0.0, self.reset_at - (now if now is not None else time.time()))
+
+
+class RateBudget:
+    def __init__(self, reserve: float = 0.1) -> None:
+        self.reserve = reserve
+        self.buckets: dict[str, RateBucket] = {}
+
+    def update(self, resource: str, limit: int, remaining: int, reset_at: float) -> None:
+        self.buckets[resource] = RateBucket(limit, remaining, reset_at)
+
+    def update_from_headers(self, headers: dict[str, str]) -> None:
+        """Record ``X-RateLimit-*`` headers (keys lower-cased) from any API response."""
+        try:
+            limit = int(headers["x-ratelimit-limit"])
+            remaining = int(headers["x-ratelimit-remaining"])
+            reset_at = float(headers["x-ratelimit-reset"])
+        except (KeyError, ValueError):
+            return
+        self.update(headers.get("x-ratelimit-resource", "core"), limit, remaining, reset_at)
+
+    def update_from_rate_limit(self, payload: dict) -> None:
+        """Record the ``resources`` section of a ``GET /rate_limit`` response."""
+        resources = payload.get("resources") or {}
+        for name in TRACKED_RESOURCES:
+            data = resources.get(name)
+            if not isinstance(data, dict):
+                continue
+            try:
+                self.update(name, int(data["limit"]), int(data["remaining"]), float(data["reset"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    def mark_exhausted(self, resource: str = "core") -> None:
+        """A call failed with a rate-limit error: treat the bucket as empty until reset."""
+        bucket = self.buckets.get(resource)
+        if bucket is not None:
+            bucket.remaining = 0
+        else:
+            self.update(resource, 1, 0, time.time() + 60)
+
+    def allow_optional(self, resource: str = "core") -> bool:
+        """Whether a non-essential call fits without eating into the reserve."""
+        bucket = self.buckets.get(resource)
+        if bucket is None or bucket.seconds_to_reset() == 0:
+            return True
+        return bucket.fraction_remaining > self.reserve
+
+    def poll_interval(
+        self, base_s: float, max_s: float, poll_cost: dict[str, int] | None = None
+    ) -> float:
+        """Seconds until the next poll so each bucket lasts until its reset.
+
+        ``poll_cost`` is the number of calls the last poll consumed per resource.
+        With ample budget the base interval is used; as a bucket drains the
+        interval stretches to spread what is left (minus the reserve) over the
+        time remaining in its window.
+        """
+        interval = base_s
+        now = time.time()
+        for name, bucket in self.buckets.items():
+            window_s = bucket.seconds_to_reset(now)
+            if not window_s:
+                continue
+            spendable = bucket.remaining - bucket.limit * self.reserve
+            if spendable <= 0:
+                interval = max(interval, window_s)
+                continue
+            cost = (poll_cost or {}).get(name, 0)
+            if cost:
+                interval = max(interval, window_s * cost / spendable)
+        return min(interval, max_s)
+
+    def snapshot(self) -> dict[str, dict]:
+        now = time.time()
+        return {
+            name: {
+                "limit": bucket.limit,
+                "remaining": bucket.remaining,
+                "reset_in_s": round(bucket.seconds_to_reset(now)),
+            }
+            for name, bucket in self.buckets.items()
+        }
+
+    def remaining(self) -> dict[str, int]:
+        return {name: bucket.remaining for name, bucket in self.buckets.items()}
+
+
+def poll_cost(before: dict[str, int], after: dict[str, int]) -> dict[str, int]:
+    """Calls consumed per resource between two ``RateBudget.remaining()`` readings.
+
+    A reading that went up means the window reset mid-poll; that resource is skipped.
+    """
+    return {
+        name: before[name] - after[name]
+        for name in after
+        if name in before and before[name] >= after[name]
+    }
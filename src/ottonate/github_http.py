@@ -0,0 +1,831 @@
+"""GitHub integration over the REST/GraphQL API with a pooled keep-alive transport.
+
+Drop-in alternative to the ``gh``-backed :class:`GitHubClient`: every public method
+keeps the same signature and return shape, but requests share a small pool of
+persistent HTTP/1.1 connections instead of forking a ``gh`` process per call.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import http.client
+import json
+import queue
+import re
+import threading
+import urllib.request
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import quote, urlencode, urlsplit
+
+import structlog
+
+from ottonate.github import (
+    GitHubClient,
+    _check_from_context,
+    _label_events,
+    _review_status_from_reviews,
+    _unaddressed_comments,
+)
+from ottonate.github_budget import RateBudget
+from ottonate.http_cache import ResponseCache
+from ottonate.models import Label, ReviewComment, ReviewStatus
+
+log = structlog.get_logger()
+
+DEFAULT_API_URL = "https://api.github.com"
+ACCEPT_JSON = "application/vnd.github+json"
+ACCEPT_DIFF = "application/vnd.github.v3.diff"
+ACCEPT_SHA = "application/vnd.github.sha"
+API_VERSION = "2022-11-28"
+
+_RETRYABLE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+# A POST or PATCH may have been applied before the socket dropped; never resend those.
+_IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE"}
+_CACHED_HEADERS = ("content-type", "link", "etag", "last-modified")
+_LINK_NEXT = re.compile(r'<([^>]+)>;\s*rel="next"')
+
+
+@dataclass
+class HttpResponse:
+    status: int
+    headers: dict[str, str]
+    body: bytes
+
+    def json(self) -> Any:
+        return json.loads(self.body) if self.body else None
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+
+class ConnectionPool:
+    """Bounded pool of keep-alive connections to a single host.
+
+    Blocking by design: callers run ``request`` in a worker thread. At most ``size``
+    connections are open at once; idle ones are reused LIFO so the warmest socket
+    serves the next request.
+    """
+
+    def __init__(self, base_url: str, size: int = 8, timeout: float = 30.0) -> None:
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "https"
+        self.host = parts.hostname or ""
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._idle: queue.LifoQueue[http.client.HTTPConnection] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(1, size))
+        self.connections_opened = 0
+
+    def request(
+        self, method: str, path: str, headers: dict[str, str], body: bytes | None = None
+    ) -> HttpResponse:
+        with self._slots:
+            conn, reused = self._checkout()
+            try:
+                response = self._send(conn, method, path, headers, body)
+            except _RETRYABLE_ERRORS:
+                conn.close()
+                if not reused or method not in _IDEMPOTENT_METHODS:
+                    raise
+                # The server dropped an idle keep-alive socket; retry once on a fresh one.
+                conn = self._connect()
+                try:
+                    response = self._send(conn, method, path, headers, body)
+                except Exception:
+                    conn.close()
+                    raise
+            except Exception:
+                conn.close()
+                raise
+            if response.headers.get("connection", "").lower() == "close":
+                conn.close()
+            else:
+                self._idle.put(conn)
+            return response
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _checkout(self) -> tuple[http.client.HTTPConnection, bool]:
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._connect(), False
+
+    def _connect(self) -> http.client.HTTPConnection:
+        self.connections_opened += 1
+        if self.scheme == "http":
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+
+    def _send(
+        self,
+        conn: http.client.HTTPConnection,
+        method: str,
+        path: str,
+        headers: dict[str, str],
+        body: bytes | None,
+    ) -> HttpResponse:
+        conn.request(method, self.prefix + path, body=body, headers=headers)
+        resp = conn.getresponse()
+        data = resp.read()
+        return HttpResponse(
+            status=resp.status,
+            headers={k.lower(): v for k, v in resp.getheaders()},
+            body=data,
+        )
+
+
+class HttpGitHubClient(GitHubClient):
+    """GitHubClient that speaks to the API directly over a connection pool."""
+
+    def __init__(
+        self,
+        token: str = "",
+        *,
+        api_url: str = DEFAULT_API_URL,
+        pool_size: int = 8,
+        timeout: float = 30.0,
+        cache: ResponseCache | None = None,
+        budget: RateBudget | None = None,
+    ) -> None:
+        super().__init__(budget)
+        self._token = token
+        self._token_resolved = bool(token)
+        self._token_lock = asyncio.Lock()
+        self._pool = ConnectionPool(api_url, size=pool_size, timeout=timeout)
+        self._cache = cache
+
+    def close(self) -> None:
+        self._pool.close()
+        if self._cache is not None:
+            self._cache.close()
+
+    async def refresh_rate_limit(self) -> None:
+        data = await self._api("GET", "/rate_limit")
+        if data:
+            self.budget.update_from_rate_limit(data)
+
+    # -- Issue operations --
+
+    async def search_issues(self, owner: str, label: str) -> list[dict]:
+        query = f'user:{owner} label:"{label}" state:open is:issue'
+        data = await self._api("GET", "/search/issues", params={"q": query, "per_page": 100})
+        if not data:
+            return []
+        return [
+            {
+                "repository": {
+                    "name": _repo_name(item.get("repository_url", "")),
+                    "nameWithOwner": _repo_full_name(item.get("repository_url", "")),
+                },
+                "number": item.get("number"),
+                "labels": _labels(item),
+                "title": item.get("title", ""),
+            }
+            for item in data.get("items", [])
+        ]
+
+    async def list_issues(self, owner: str, repo: str, label: str) -> list[dict]:
+        data = await self._api(
+            "GET",
+            f"/repos/{owner}/{repo}/issues",
+            params={"labels": label, "state": "open", "per_page": 50},
+        )
+        return [
+            {"number": item.get("number"), "labels": _labels(item), "title": item.get("title", "")}
+            for item in data or []
+            if "pull_request" not in item
+        ]
+
+    async def get_issue(self, owner: str, repo: str, number: int) -> dict:
+        data = await self._api("GET", f"/repos/{owner}/{repo}/issues/{number}")
+        if not data:
+            return {}
+        return {
+            "number": data.get("number"),
+            "title": data.get("title", ""),
+            "body": data.get("body") or "",
+            "labels": _labels(data),
+            "state": (data.get("state") or "").upper(),
+        }
+
+    async def create_issue(
+        self, owner: str, repo: str, title: str, body: str, labels: list[str] | None = None
+    ) -> int:
+        data = await self._api(
+            "POST",
+            f"/repos/{owner}/{repo}/issues",
+            body={"title": title, "body": body, "labels": labels or []},
+        )
+        if data and data.get("number"):
+            number = int(data["number"])
+            log.info("issue_created", owner=owner, repo=repo, number=number)
+            return number
+        raise RuntimeError(f"Failed to create issue in {owner}/{repo}: {title}")
+
+    async def close_issue(self, owner: str, repo: str, number: int) -> None:
+        await self._api("PATCH", f"/repos/{owner}/{repo}/issues/{number}", body={"state": "closed"})
+
+    # -- Label operations --
+
+    async def add_label(self, owner: str, repo: str, number: int, label: str) -> None:
+        await self._add_labels(owner, repo, number, [label])
+        log.info("label_added", repo=f"{owner}/{repo}", number=number, label=label)
+
+    async def remove_label(self, owner: str, repo: str, number: int, label: str) -> None:
+        await self._remove_label(owner, repo, number, label)
+        log.info("label_removed", repo=f"{owner}/{repo}", number=number, label=label)
+
+    async def swap_label(
+        self, owner: str, repo: str, number: int, remove: Label, add: Label
+    ) -> None:
+        await self._remove_label(owner, repo, number, remove.value)
+        await self._add_labels(owner, repo, number, [add.value])
+        log.info(
+            "label_swap",
+            repo=f"{owner}/{repo}",
+            number=number,
+            removed=remove.value,
+            added=add.value,
+        )
+
+    # -- Comment operations --
+
+    async def add_comment(self, owner: str, repo: str, number: int, body: str) -> None:
+        await self._api(
+            "POST", f"/repos/{owner}/{repo}/issues/{number}/comments", body={"body": body}
+        )
+
+    async def get_issue_timeline(self, owner: str, repo: str, number: int) -> list[dict]:
+        """Fetch label events from the issue timeline API."""
+        events = await self._paginate(f"/repos/{owner}/{repo}/issues/{number}/timeline")
+        return _label_events(events)
+
+    async def get_comments(self, owner: str, repo: str, number: int) -> list[str]:
+        comments = await self._paginate(f"/repos/{owner}/{repo}/issues/{number}/comments")
+        return [c.get("body", "") for c in comments]
+
+    # -- PR operations --
+
+    async def find_pr(self, owner: str, repo: str, issue_key: str) -> tuple[int | None, str | None]:
+        data = await self._graphql(
+            """
+            query($q: String!) {
+              search(query: $q, type: ISSUE, first: 30) {
+                nodes { ... on PullRequest { number headRefName state } }
+              }
+            }
+            """,
+            {"q": f"repo:{owner}/{repo} is:pr {issue_key}"},
+        )
+        prs = [n for n in (data.get("search") or {}).get("nodes", []) if n and n.get("number")]
+        for pr in prs:
+            if issue_key.lower() in pr.get("headRefName", "").lower():
+                return pr["number"], pr.get("state")
+        if prs:
+            return prs[0]["number"], prs[0].get("state")
+        return None, None
+
+    async def get_pr_state(self, owner: str, repo: str, pr_number: int) -> str:
+        data = await self._api("GET", f"/repos/{owner}/{repo}/pulls/{pr_number}")
+        if not data:
+            return "UNKNOWN"
+        return _pr_state(data)
+
+    async def create_pr(self, owner: str, repo: str, branch: str, title: str, body: str) -> int:
+        base = await self.get_default_branch(owner, repo)
+        data = await self._api(
+            "POST",
+            f"/repos/{owner}/{repo}/pulls",
+            body={"head": branch, "base": base, "title": title, "body": body},
+        )
+        if data and data.get("number"):
+            return int(data["number"])
+        raise RuntimeError(f"Failed to create PR for {owner}/{repo}:{branch}")
+
+    async def request_review(self, owner: str, repo: str, pr_number: int, reviewer: str) -> None:
+        if "/" in reviewer:
+            payload = {"team_reviewers": [reviewer.split("/", 1)[1]]}
+        else:
+            payload = {"reviewers": [reviewer]}
+        await self._api(
+            "POST", f"/repos/{owner}/{repo}/pulls/{pr_number}/requested_reviewers", body=payload
+        )
+
+    async def _pr_checks(self, owner: str, repo: str, pr_number: int) -> list[dict]:
+        data = await self._graphql(
+            """
+            query($owner: String!, $repo: String!, $number: Int!) {
+              repository(owner: $owner, name: $repo) {
+                pullRequest(number: $number) {
+                  commits(last: 1) { nodes { commit { statusCheckRollup {
+                    contexts(first: 100) { nodes {
+                      __typename
+                      ... on CheckRun { name status conclusion detailsUrl }
+                      ... on StatusContext { context state targetUrl }
+                    } }
+                  } } } }
+                }
+              }
+            }
+            """,
+            {"owner": owner, "repo": repo, "number": pr_number},
+        )
+        pr = (data.get("repository") or {}).get("pullRequest") or {}
+        commits = (pr.get("commits") or {}).get("nodes") or []
+        if not commits:
+            return []
+        rollup = (commits[0].get("commit") or {}).get("statusCheckRollup") or {}
+        return [_check_from_context(c) for c in (rollup.get("contexts") or {}).get("nodes", [])]
+
+    async def _failed_run_log(self, owner: str, repo: str, run_id: str) -> str:
+        data = await self._api(
+            "GET", f"/repos/{owner}/{repo}/actions/runs/{run_id}/jobs", params={"per_page": 100}
+        )
+        jobs = [
+            job
+            for job in (data or {}).get("jobs", [])
+            if job.get("conclusion") in ("failure", "timed_out")
+        ]
+        texts = await asyncio.gather(*(self._job_log(owner, repo, job["id"]) for job in jobs))
+        return "\n\n".join(
+            f"{job.get('name', 'job')}\n{text}"
+            for job, text in zip(jobs, texts, strict=True)
+            if text is not None
+        )
+
+    async def _job_log(self, owner: str, repo: str, job_id: int) -> str | None:
+        response = await self._request("GET", f"/repos/{owner}/{repo}/actions/jobs/{job_id}/logs")
+        if response is None:
+            return None
+        if response.status in (301, 302, 307) and response.headers.get("location"):
+            return await asyncio.to_thread(_fetch_external, response.headers["location"])
+        if response.status < 300:
+            return response.text
+        return None
+
+    async def get_pr_diff(self, owner: str, repo: str, pr_number: int | None) -> str:
+        if pr_number is None:
+            return ""
+        response = await self._request(
+            "GET", f"/repos/{owner}/{repo}/pulls/{pr_number}", accept=ACCEPT_DIFF
+        )
+        if response is None or response.status >= 300:
+            return ""
+        return response.text
+
+    async def get_review_status(self, owner: str, repo: str, pr_number: int | None) -> ReviewStatus:
+        if pr_number is None:
+            return ReviewStatus.PENDING
+        reviews = await self._paginate(f"/repos/{owner}/{repo}/pulls/{pr_number}/reviews")
+        return _review_status_from_reviews(
+            [{"author": r.get("user") or {}, "state": r.get("state", "")} for r in reviews]
+        )
+
+    async def get_unaddressed_comments(
+        self, owner: str, repo: str, pr_number: int | None, bot_username: str
+    ) -> list[ReviewComment]:
+        if pr_number is None:
+            return []
+        comments = await self._paginate(f"/repos/{owner}/{repo}/pulls/{pr_number}/comments")
+        return _unaddressed_comments(comments, bot_username)
+
+    async def get_default_branch(self, owner: str, repo: str) -> str:
+        data = await self._api("GET", f"/repos/{owner}/{repo}")
+        if data and data.get("default_branch"):
+            return data["default_branch"]
+        return "main"
+
+    async def get_branch_sha(self, owner: str, repo: str, branch: str) -> str | None:
+        response = await self._request(
+            "GET", f"/repos/{owner}/{repo}/commits/{quote(branch, safe='')}", accept=ACCEPT_SHA
+        )
+        if response is None or response.status >= 300:
+            return None
+        return response.text.strip() or None
+
+    # -- Project operations --
+
+    async def create_project(self, owner: str, title: str) -> str:
+        owner_data = await self._graphql(
+            "query($login: String!) { repositoryOwner(login: $login) { id } }", {"login": owner}
+        )
+        owner_id = (owner_data.get("repositoryOwner") or {}).get("id")
+        if not owner_id:
+            raise RuntimeError(f"Failed to create project: {title}")
+        data = await self._graphql(
+            """
+            mutation($ownerId: ID!, $title: String!) {
+              createProjectV2(input: {ownerId: $ownerId, title: $title}) {
+                projectV2 { number }
+              }
+            }
+            """,
+            {"ownerId": owner_id, "title": title},
+        )
+        project = (data.get("createProjectV2") or {}).get("projectV2") or {}
+        if not project.get("number"):
+            raise RuntimeError(f"Failed to create project: {title}")
+        project_id = str(project["number"])
+        log.info("project_created", owner=owner, title=title, id=project_id)
+        return project_id
+
+    async def add_to_project(self, owner: str, project_number: str, issue_url: str) -> None:
+        data = await self._graphql(
+            """
+            query($login: String!, $number: Int!, $url: URI!) {
+              repositoryOwner(login: $login) {
+                ... on Organization { projectV2(number: $number) { id } }
+                ... on User { projectV2(number: $number) { id } }
+              }
+              resource(url: $url) {
+                ... on Issue { id }
+                ... on PullRequest { id }
+              }
+            }
+            """,
+            {"login": owner, "number": int(project_number), "url": issue_url},
+        )
+        project = ((data.get("repositoryOwner") or {}).get("projectV2")) or {}
+        content = data.get("resource") or {}
+        if not project.get("id") or not content.get("id"):
+            log.warning("project_item_add_failed", project=project_number, url=issue_url)
+            return
+        await self._graphql(
+            """
+            mutation($projectId: ID!, $contentId: ID!) {
+              addProjectV2ItemById(input: {projectId: $projectId, contentId: $contentId}) {
+                item { id }
+              }
+            }
+            """,
+            {"projectId": project["id"], "contentId": content["id"]},
+        )
+
+    async def list_project_items(self, owner: str, project_number: str) -> list[dict]:
+        data = await self._graphql(
+            """
+            query($login: String!, $number: Int!) {
+              repositoryOwner(login: $login) {
+                ... on Organization { projectV2(number: $number) { ...items } }
+                ... on User { projectV2(number: $number) { ...items } }
+              }
+            }
+            fragment items on ProjectV2 {
+              items(first: 100) { nodes { id content {
+                __typename
+                ... on Issue { number title url repository { nameWithOwner } }
+                ... on PullRequest { number title url repository { nameWithOwner } }
+                ... on DraftIssue { title }
+              } } }
+            }
+            """,
+            {"login": owner, "number": int(project_number)},
+        )
+        project = ((data.get("repositoryOwner") or {}).get("projectV2")) or {}
+        items = []
+        for node in (project.get("items") or {}).get("nodes", []):
+            content = node.get("content") or {}
+            items.append(
+                {
+                    "id": node.get("id"),
+                    "title": content.get("title", ""),
+                    "content": {
+                        "type": content.get("__typename", ""),
+                        "number": content.get("number"),
+                        "title": content.get("title", ""),
+                        "url": content.get("url", ""),
+                        "repository": (content.get("repository") or {}).get("nameWithOwner", ""),
+                    },
+                }
+            )
+        return items
+
+    async def list_org_repos(self, owner: str) -> list[str]:
+        repos = await self._paginate(f"/orgs/{owner}/repos")
+        if not repos:
+            repos = await self._paginate(f"/users/{owner}/repos")
+        return [r["name"] for r in repos if r.get("name") and not r.get("archived")]
+
+    # -- Idea PR operations --
+
+    async def list_open_prs(self, owner: str, repo: str) -> list[dict]:
+        data = await self._api(
+            "GET", f"/repos/{owner}/{repo}/pulls", params={"state": "open", "per_page": 50}
+        )
+        return [
+            {
+                "number": pr.get("number"),
+                "headRefName": (pr.get("head") or {}).get("ref", ""),
+                "labels": _labels(pr),
+                "title": pr.get("title", ""),
+            }
+            for pr in data or []
+        ]
+
+    async def get_pr_files(self, owner: str, repo: str, pr_number: int) -> list[dict]:
+        data = await self._api(
+            "GET", f"/repos/{owner}/{repo}/pulls/{pr_number}/files", params={"per_page": 100}
+        )
+        return data or []
+
+    async def get_pr_details(self, owner: str, repo: str, pr_number: int) -> dict:
+        pr = await self._api("GET", f"/repos/{owner}/{repo}/pulls/{pr_number}")
+        if not pr:
+            return {}
+        comments = await self._paginate(f"/repos/{owner}/{repo}/issues/{pr_number}/comments")
+        return {
+            "number": pr.get("number"),
+            "headRefName": (pr.get("head") or {}).get("ref", ""),
+            "labels": _labels(pr),
+            "title": pr.get("title", ""),
+            "body": pr.get("body") or "",
+            "comments": [
+                {
+                    "author": {"login": (c.get("user") or {}).get("login", "")},
+                    "body": c.get("body", ""),
+                }
+                for c in comments
+            ],
+            "state": _pr_state(pr),
+        }
+
+    async def add_pr_label(self, owner: str, repo: str, pr_number: int, label: str) -> None:
+        await self._add_labels(owner, repo, pr_number, [label])
+        log.info("pr_label_added", repo=f"{owner}/{repo}", pr=pr_number, label=label)
+
+    async def remove_pr_label(self, owner: str, repo: str, pr_number: int, label: str) -> None:
+        await self._remove_label(owner, repo, pr_number, label)
+        log.info("pr_label_removed", repo=f"{owner}/{repo}", pr=pr_number, label=label)
+
+    async def swap_pr_label(
+        self, owner: str, repo: str, pr_number: int, remove: Label, add: Label
+    ) -> None:
+        await self._remove_label(owner, repo, pr_number, remove.value)
+        await self._add_labels(owner, repo, pr_number, [add.value])
+        log.info(
+            "pr_label_swap",
+            repo=f"{owner}/{repo}",
+            pr=pr_number,
+            removed=remove.value,
+            added=add.value,
+        )
+
+    async def get_directory_contents(
+        self, owner: str, repo: str, path: str, ref: str = "main"
+    ) -> list[dict]:
+        data = await self._api(
+            "GET", f"/repos/{owner}/{repo}/contents/{quote(path)}", params={"ref": ref}
+        )
+        if not data:
+            return []
+        if isinstance(data, list):
+            return data
+        return [data]
+
+    async def edit_issue_body(self, owner: str, repo: str, number: int, body: str) -> None:
+        await self._api("PATCH", f"/repos/{owner}/{repo}/issues/{number}", body={"body": body})
+        log.info("issue_body_edited", repo=f"{owner}/{repo}", number=number)
+
+    # -- File content --
+
+    async def get_file_content(
+        self, owner: str, repo: str, path: str, ref: str = "main"
+    ) -> str | None:
+        data = await self._api(
+            "GET", f"/repos/{owner}/{repo}/contents/{quote(path)}", params={"ref": ref}
+        )
+        if not isinstance(data, dict) or data.get("content") is None:
+            return None
+        try:
+            return base64.b64decode(data["content"]).decode("utf-8")
+        except Exception:
+            return data["content"]
+
+    async def merge_pr(self, owner: str, repo: str, pr_number: int) -> None:
+        pr = await self._api("GET", f"/repos/{owner}/{repo}/pulls/{pr_number}")
+        response = await self._request(
+            "PUT",
+            f"/repos/{owner}/{repo}/pulls/{pr_number}/merge",
+            body={"merge_method": "squash"},
+        )
+        if response is None or response.status >= 300:
+            detail = response.text if response is not None else "request failed"
+            raise RuntimeError(f"Failed to merge PR #{pr_number} in {owner}/{repo}: {detail}")
+        branch = ((pr or {}).get("head") or {}).get("ref")
+        if branch:
+            await self._api("DELETE", f"/repos/{owner}/{repo}/git/refs/heads/{quote(branch)}")
+        log.info("pr_merged", repo=f"{owner}/{repo}", pr=pr_number)
+
+    async def assign_issue(self, owner: str, repo: str, number: int, assignee: str) -> None:
+        await self._api(
+            "POST",
+            f"/repos/{owner}/{repo}/issues/{number}/assignees",
+            body={"assignees": [assignee]},
+        )
+
+    # -- Label management --
+
+    async def ensure_labels(self, owner: str, repo: str, labels: dict[str, str]) -> list[str]:
+        existing = {
+            item.get("name", "") for item in await self._paginate(f"/repos/{owner}/{repo}/labels")
+        }
+        created: list[str] = []
+        failed: list[str] = []
+        for name, color in labels.items():
+            if name in existing:
+                continue
+            response = await self._request(
+                "POST", f"/repos/{owner}/{repo}/labels", body={"name": name, "color": color}
+            )
+            # 422 means the label already exists (e.g. created concurrently, or the
+            # listing failed part way), so every label is verified either way.
+            if response is not None and (response.status < 300 or response.status == 422):
+                created.append(name)
+                log.info("label_created", repo=f"{owner}/{repo}", label=name)
+            else:
+                failed.append(name)
+        if failed:
+            raise RuntimeError(f"Failed to create labels in {owner}/{repo}: {', '.join(failed)}")
+        return created
+
+    # -- Internal --
+
+    async def _add_labels(self, owner: str, repo: str, number: int, labels: list[str]) -> None:
+        await self._api(
+            "POST", f"/repos/{owner}/{repo}/issues/{number}/labels", body={"labels": labels}
+        )
+
+    async def _remove_label(self, owner: str, repo: str, number: int, label: str) -> None:
+        await self._api(
+            "DELETE", f"/repos/{owner}/{repo}/issues/{number}/labels/{quote(label, safe='')}"
+        )
+
+    async def _graphql(self, query: str, variables: dict | None = None) -> dict:
+        data = await self._api(
+            "POST", "/graphql", body={"query": query, "variables": variables or {}}
+        )
+        if not data:
+            return {}
+        if data.get("errors"):
+            log.warning("github_graphql_error", errors=data["errors"])
+        return data.get("data") or {}
+
+    async def _paginate(self, path: str, params: dict | None = None) -> list:
+        """GET every page of a list endpoint by following ``Link: rel="next"``."""
+        items: list = []
+        query = {"per_page": 100, **(params or {})}
+        next_path: str | None = f"{path}?{urlencode(query)}"
+        while next_path:
+            response = await self._request("GET", next_path)
+            if response is None or response.status >= 300:
+                break
+            page = response.json()
+            if not isinstance(page, list):
+                break
+            items.extend(page)
+            next_path = _next_page(response.headers.get("link", ""), self._pool.prefix)
+        return items
+
+    async def _api(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: dict | None = None,
+        body: Any = None,
+        accept: str = ACCEPT_JSON,
+    ) -> Any:
+        """Issue a request and return the decoded JSON body, or None on failure."""
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        response = await self._request(method, path, body=body, accept=accept)
+        if response is None or response.status >= 300:
+            return None
+        try:
+            return response.json()
+        except json.JSONDecodeError:
+            log.warning("github_http_bad_json", method=method, path=path)
+            return None
+
+    async def _request(
+        self, method: str, path: str, *, body: Any = None, accept: str = ACCEPT_JSON
+    ) -> HttpResponse | None:
+        headers = {
+            "Accept": accept,
+            "User-Agent": "ottonate",
+            "X-GitHub-Api-Version": API_VERSION,
+        }
+        token = await self._resolve_token()
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        try:
+            if method == "GET" and self._cache is not None:
+                response = await asyncio.to_thread(self._conditional_get, path, headers)
+            else:
+                response = await asyncio.to_thread(
+                    self._pool.request, method, path, headers, payload
+                )
+        except (OSError, http.client.HTTPException) as e:
+            log.warning("github_http_error", method=method, path=path, error=str(e))
+            return None
+        self.budget.update_from_headers(response.headers)
+        if response.status >= 400:
+            log.warning(
+                "github_http_error",
+                method=method,
+                path=path,
+                status=response.status,
+                body=response.text[:500],
+            )
+        return response
+
+    def _conditional_get(self, path: str, headers: dict[str, str]) -> HttpResponse:
+        """GET with If-None-Match/If-Modified-Since, serving the cached body on 304."""
+        assert self._cache is not None
+        key = f"{headers['Accept']} {path}"
+        cached = self._cache.get(key)
+        if cached is not None:
+            headers = {**headers, **cached.conditional_headers()}
+        response = self._pool.request("GET", path, headers)
+        if response.status == 304 and cached is not None:
+            self._cache.hits += 1
+            # Keep fresh rate-limit headers but restore the cached entity's Link etc.
+            return HttpResponse(200, {**cached.headers, **response.headers}, cached.body)
+        self._cache.misses += 1
+        if response.status == 200:
+            self._cache.put(
+                key,
+                response.body,
+                {k: v for k, v in response.headers.items() if k in _CACHED_HEADERS},
+                etag=response.headers.get("etag"),
+                last_modified=response.headers.get("last-modified"),
+            )
+        return response
+
+    async def _resolve_token(self) -> str:
+        """Use the configured token, falling back once to ``gh auth token``."""
+        if self._token_resolved:
+            return self._token
+        async with self._token_lock:
+            if not self._token_resolved:
+                self._token = (await GitHubClient._gh(self, "auth", "token")).strip()
+                self._token_resolved = True
+                if not self._token:
+                    log.warning("github_http_no_token")
+        return self._token
+
+
+def _labels(item: dict) -> list[dict]:
+    return [{"name": lbl.get("name", "")} for lbl in item.get("labels", []) or []]
+
+
+def _repo_full_name(repository_url: str) -> str:
+    return repository_url.split("/repos/", 1)[-1] if "/repos/" in repository_url else ""
+
+
+def _repo_name(repository_url: str) -> str:
+    return _repo_full_name(repository_url).rsplit("/", 1)[-1]
+
+
+def _pr_state(pr: dict) -> str:
+    if pr.get("merged") or pr.get("merged_at"):
+        return "MERGED"
+    return (pr.get("state") or "UNKNOWN").upper()
+
+
+def _next_page(link_header: str, prefix: str) -> str | None:
+    match = _LINK_NEXT.search(link_header)
+    if not match:
+        return None
+    parts = urlsplit(match.group(1))
+    path = parts.path
+    if prefix and path.startswith(prefix):
+        path = path[len(prefix) :]
+    return f"{path}?{parts.query}" if parts.query else path
+
+
+def _fetch_external(url: str, timeout: float = 60.0) -> str | None:
+    """Fetch a pre-signed redirect target (e.g. job logs) outside the API pool.
+
+    Returns None when the URL has expired or the fetch fails, like other reads.
+    """
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            return resp.read().decode("utf-8", errors="replace")
+    except (OSError, TimeoutError) as e:
+        log.warning("github_external_fetch_error", url=urlsplit(url).path, error=str(e))
+        return None
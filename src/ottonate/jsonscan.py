@@ -0,0 +1,144 @@
+"""Extract JSON values embedded in agent output.
+
+Agents wrap their structured answers in prose and markdown, and the prose may
+itself contain braces. ``JsonScanner`` walks the text once, tracking bracket
+depth and JSON strings, and decodes every balanced top-level ``{...}`` or
+``[...]`` it closes. A candidate that does not decode (prose like ``{see
+below}``) is rescanned from its next character, so a valid value nested inside
+it is still found. Text can be fed in chunks as messages stream in.
+
+Callers pick the value they want with a ``Schema``: the last object carrying a
+``verdict`` string, the first array of objects, and so on.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+
+JsonValue = dict | list
+
+_OPENER = re.compile(r"[\[{]")
+_STRUCTURAL = re.compile(r'[\[\]{}"]')
+_STRING_END = re.compile(r'["\\]')
+_CLOSER = {"{": "}", "[": "]"}
+
+
+class JsonScanner:
+    """Incremental single-pass scanner; ``values`` holds everything decoded so far."""
+
+    def __init__(self) -> None:
+        self.values: list[JsonValue] = []
+        self._pending: list[str] = []
+        self._closers: list[str] = []
+        self._in_string = False
+        self._skip = 0
+
+    def feed(self, text: str) -> list[JsonValue]:
+        """Scan the next chunk. Returns the values completed by it."""
+        found: list[JsonValue] = []
+        while text:
+            text = self._scan(text, found)
+        self.values.extend(found)
+        return found
+
+    def finish(self) -> list[JsonValue]:
+        """End of input: rescan any candidate left open (e.g. an unbalanced ``{`` in prose)."""
+        found: list[JsonValue] = []
+        while self._closers:
+            candidate = self._take("")
+            found.extend(self.feed(candidate[1:]))
+        return found
+
+    def _scan(self, text: str, found: list[JsonValue]) -> str:
+        """Consume ``text``; returns text that must be rescanned after a failed candidate."""
+        pos, self._skip = self._skip, 0
+        start = 0
+        while True:
+            if not self._closers:
+                match = _OPENER.search(text, pos)
+                if match is None:
+                    return ""
+                start = match.start()
+                self._closers.append(_CLOSER[match.group()])
+                pos = match.end()
+                continue
+            if self._in_string:
+                match = _STRING_END.search(text, pos)
+                if match is None:
+                    break
+                if match.group() == "\\":
+                    pos = match.end() + 1
+                    if pos > len(text):
+                        self._skip = pos - len(text)
+                        break
+                    continue
+                self._in_string = False
+                pos = match.end()
+                continue
+            match = _STRUCTURAL.search(text, pos)
+            if match is None:
+                break
+            char, pos = match.group(), match.end()
+            if char == '"':
+                self._in_string = True
+            elif char in _CLOSER:
+                self._closers.append(_CLOSER[char])
+            elif char != self._closers[-1]:
+                candidate = self._take(text[start:pos])
+                return candidate[1:] + text[pos:]
+            else:
+                self._closers.pop()
+                if not self._closers:
+                    candidate = self._take(text[start:pos])
+                    try:
+                        found.append(json.loads(candidate))
+                    except json.JSONDecodeError:
+                        return candidate[1:] + text[pos:]
+        self._pending.append(text[start:])
+        return ""
+
+    def _take(self, tail: str) -> str:
+        """Return the open candidate's full text and reset to scanning prose."""
+        candidate = "".join(self._pending) + tail
+        self._pending.clear()
+        self._closers.clear()
+        self._in_string = False
+        self._skip = 0
+        return candidate
+
+
+def scan_json(text: str) -> list[JsonValue]:
+    """Every top-level JSON object or array in ``text``, in order."""
+    scanner = JsonScanner()
+    scanner.feed(text)
+    scanner.finish()
+    return scanner.values
+
+
+@dataclass(frozen=True)
+class Schema:
+    """Shape a stage expects: an object with typed ``required`` keys, or an array of ``items``."""
+
+    required: dict[str, type | tuple[type, ...]] = field(default_factory=dict)
+    items: type | None = None
+
+    def matches(self, value: JsonValue) -> bool:
+        if self.items is not None:
+            return (
+                isinstance(value, list)
+                and bool(value)
+                and all(isinstance(item, self.items) for item in value)
+            )
+        if not isinstance(value, dict):
+            return False
+        return all(
+            key in value and isinstance(value[key], kind) for key, kind in self.required.items()
+        )
+
+
+def find_json(values: list[JsonValue], schema: Schema, *, last: bool = True) -> JsonValue | None:
+    """The last (or first) scanned value matching ``schema``."""
+    ordered = reversed(values) if last else values
+    return next((value for value in ordered if schema.matches(value)), None)
@@ -0,0 +1,89 @@
+"""Pipeline label provisioning with a per-repo sync cache.
+
+Listing a repo's labels costs a call, and creating the missing ones costs one
+call per label, so repos whose labels were already verified are remembered in
+the state store. The cache key is a version hash of the label set: adding a
+label or changing a color in ``LABEL_COLORS`` makes every repo resync once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+
+import structlog
+
+from ottonate.github import GitHubClient
+from ottonate.models import LABEL_COLORS
+from ottonate.state import StateStore
+
+log = structlog.get_logger()
+
+
+def pipeline_labels(agent_label: str) -> dict[str, str]:
+    """Every label the pipeline uses, mapped to its hex color (without #)."""
+    labels = dict(LABEL_COLORS)
+    labels[agent_label] = "6f42c1"
+    return labels
+
+
+def label_schema_version(labels: dict[str, str]) -> str:
+    digest = hashlib.sha256()
+    for name, color in sorted(labels.items()):
+        digest.update(f"{name}={color.lower()}\n".encode())
+    return digest.hexdigest()[:12]
+
+
+async def sync_repo_labels(
+    github: GitHubClient,
+    state: StateStore,
+    owner: str,
+    repo: str,
+    labels: dict[str, str],
+    *,
+    force: bool = False,
+) -> list[str] | None:
+    """Create missing labels unless the repo is already synced at this version.
+
+    Returns the labels created, or None if the cache said the repo is current.
+    The repo is only marked synced once every label is known to exist; if the
+    listing or a create fails, ``ensure_labels`` raises and the next call retries.
+    """
+    repo_ref = f"{owner}/{repo}"
+    version = label_schema_version(labels)
+    if not force and state.labels_synced(repo_ref, version):
+        return None
+    created = await github.ensure_labels(owner, repo, labels)
+    state.mark_labels_synced(repo_ref, version)
+    log.debug("labels_synced", repo=repo_ref, version=version, created=len(created))
+    return created
+
+
+async def sync_org_labels(
+    github: GitHubClient,
+    state: StateStore,
+    owner: str,
+    labels: dict[str, str],
+    *,
+    repos: list[str] | None = None,
+    concurrency: int = 8,
+    force: bool = False,
+) -> dict[str, list[str] | RuntimeError | None]:
+    """Sync labels across ``repos`` (default: every repo in the org), a few at a time.
+
+    A repo whose labels could not all be created maps to the RuntimeError.
+    """
+    if repos is None:
+        repos = await github.list_org_repos(owner)
+    slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def _sync(repo: str) -> list[str] | RuntimeError | None:
+        async with slots:
+            try:
+                return await sync_repo_labels(github, state, owner, repo, labels, force=force)
+            except RuntimeError as e:
+                log.warning("labels_sync_failed", repo=f"{owner}/{repo}", error=str(e))
+                return e
+
+    results = await asyncio.gather(*(_sync(repo) for repo in repos))
+    return dict(zip(repos, results, strict=True))
@@ -0,0 +1,203 @@
+"""Leased ticket ownership so several scheduler workers can share one org.
+
+A worker claims a ticket by taking a lease on its ref before queueing it and
+keeps the lease alive with a heartbeat for as long as the ticket is in active
+work, across handler runs, because its retry counters, agent sessions and
+worktree are local to that worker. The scheduler gives the lease up once the
+ticket waits on a human gate, is stuck, or leaves the pipeline. A lease that is
+not renewed within its TTL (the worker died or hung) expires and any other
+worker may take it over on its next poll.
+
+Backends are pluggable: ``MemoryLeaseBackend`` for a single process and tests,
+``SqliteLeaseBackend`` for workers sharing a database file.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Protocol
+
+import structlog
+
+from ottonate.config import OttonateConfig
+
+log = structlog.get_logger()
+
+
+@dataclass
+class Lease:
+    key: str
+    owner: str
+    expires_at: float
+
+
+class LeaseBackend(Protocol):
+    def acquire(self, key: str, owner: str, ttl_s: float) -> bool:
+        """Take or extend the lease on ``key``; False if another owner holds it."""
+        ...
+
+    def renew(self, keys: list[str], owner: str, ttl_s: float) -> set[str]:
+        """Extend leases still held by ``owner``; returns the keys renewed."""
+        ...
+
+    def release(self, key: str, owner: str) -> None: ...
+
+    def active(self) -> list[Lease]:
+        """All unexpired leases, across owners."""
+        ...
+
+    def close(self) -> None: ...
+
+
+class MemoryLeaseBackend:
+    def __init__(self) -> None:
+        self._leases: dict[str, Lease] = {}
+
+    def acquire(self, key: str, owner: str, ttl_s: float) -> bool:
+        now = time.time()
+        current = self._leases.get(key)
+        if current and current.owner != owner and current.expires_at > now:
+            return False
+        self._leases[key] = Lease(key, owner, now + ttl_s)
+        return True
+
+    def renew(self, keys: list[str], owner: str, ttl_s: float) -> set[str]:
+        now = time.time()
+        renewed: set[str] = set()
+        for key in keys:
+            current = self._leases.get(key)
+            if current and current.owner == owner and current.expires_at > now:
+                current.expires_at = now + ttl_s
+                renewed.add(key)
+        return renewed
+
+    def release(self, key: str, owner: str) -> None:
+        current = self._leases.get(key)
+        if current and current.owner == owner:
+            del self._leases[key]
+
+    def active(self) -> list[Lease]:
+        now = time.time()
+        return [lease for lease in self._leases.values() if lease.expires_at > now]
+
+    def close(self) -> None:
+        self._leases.clear()
+
+
+class SqliteLeaseBackend:
+    """Leases in a SQLite file shared by every worker (WAL mode, atomic upserts)."""
+
+    def __init__(self, path: str | Path = ":memory:") -> None:
+        if str(path) != ":memory:":
+            path = Path(path).expanduser()
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            str(path), timeout=10, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS leases ("
+            "key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def acquire(self, key: str, owner: str, ttl_s: float) -> bool:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, "
+                "expires_at = excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at <= ? "
+                "RETURNING owner",
+                (key, owner, now + ttl_s, now),
+            ).fetchone()
+        return row is not None
+
+    def renew(self, keys: list[str], owner: str, ttl_s: float) -> set[str]:
+        if not keys:
+            return set()
+        now = time.time()
+        placeholders = ", ".join("?" for _ in keys)
+        with self._lock:
+            rows = self._db.execute(
+                f"UPDATE leases SET expires_at = ? "
+                f"WHERE owner = ? AND expires_at > ? AND key IN ({placeholders}) "
+                f"RETURNING key",
+                (now + ttl_s, owner, now, *keys),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def release(self, key: str, owner: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def active(self) -> list[Lease]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, owner, expires_at FROM leases WHERE expires_at > ?", (time.time(),)
+            ).fetchall()
+        return [Lease(*row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def create_lease_backend(config: OttonateConfig) -> LeaseBackend:
+    if config.lease_backend == "sqlite":
+        return SqliteLeaseBackend(config.lease_db_path)
+    return MemoryLeaseBackend()
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseManager:
+    """This worker's view of the lease table: what it holds and the heartbeat."""
+
+    def __init__(self, backend: LeaseBackend, worker_id: str, ttl_s: float) -> None:
+        self.backend = backend
+        self.worker_id = worker_id
+        self.ttl_s = ttl_s
+        self._held: set[str] = set()
+
+    @property
+    def held(self) -> set[str]:
+        return set(self._held)
+
+    def acquire(self, key: str) -> bool:
+        if not self.backend.acquire(key, self.worker_id, self.ttl_s):
+            return False
+        if key not in self._held:
+            self._held.add(key)
+            log.debug("lease_acquired", key=key, worker=self.worker_id)
+        return True
+
+    def release(self, key: str) -> None:
+        self._held.discard(key)
+        self.backend.release(key, self.worker_id)
+
+    def heartbeat(self) -> set[str]:
+        """Renew every held lease. Returns the keys that were lost to expiry or takeover."""
+        held = sorted(self._held)
+        renewed = self.backend.renew(held, self.worker_id, self.ttl_s)
+        lost = set(held) - renewed
+        for key in lost:
+            self._held.discard(key)
+            log.warning("lease_lost", key=key, worker=self.worker_id)
+        return lost
+
+    def held_elsewhere(self) -> set[str]:
+        return {lease.key for lease in self.backend.active() if lease.owner != self.worker_id}
+
+    def release_all(self) -> None:
+        for key in list(self._held):
+            self.release(key)
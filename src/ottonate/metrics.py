@@ -66,7 +66,7 @@ async def build_issue_metrics(github, owner: str, repo: str, number: int) -> Iss
     total_retries_from_timeline = _detect_retries(timeline)
     total_retries_from_comments = sum(1 for s in stages if s.get("retry_number", 0) > 0)
     total_retries = max(total_retries_from_timeline, total_retries_from_comments)
-    total_cost = sum(s.get("cost_usd", 0.0) for s in stages)
+    total_cost = sum(s.get("cost_usd") or 0.0 for s in stages)
     stuck_reasons = [
         s["stuck_reason"] for s in stages if s.get("was_stuck") and s.get("stuck_reason")
     ]
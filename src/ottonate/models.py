@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import StrEnum
 
 
@@ -107,6 +107,7 @@ class Ticket:
     spec_pr_number: int | None = None
     backlog_pr_number: int | None = None
     project_id: str | None = None
+    snapshot: TicketSnapshot | None = None
 
     @property
     def full_repo(self) -> str:
@@ -157,9 +158,17 @@ class IdeaPR:
 class StageResult:
     text: str
     session_id: str
-    cost_usd: float = 0.0
+    # None when unknown: a session closed early never gets its result (and cost)
+    cost_usd: float | None = 0.0
     turns_used: int = 0
     is_error: bool = False
+    duration_s: float = 0.0
+    # JSON values found in the assistant text while it streamed (see jsonscan)
+    json_values: list = field(default_factory=list)
+    # Closed by a completion predicate once the outcome was final (see completion)
+    stopped_early: bool = False
+    # Prompt sections cut to fit the stage's token budget: name -> tokens dropped
+    context_trimmed: dict[str, int] = field(default_factory=dict)
 
 
 class CIStatus(StrEnum):
@@ -175,6 +184,26 @@ class ReviewStatus(StrEnum):
     COMMENTED = "commented"
 
 
+@dataclass
+class TicketSnapshot:
+    """Issue state fetched in one batched query at poll time.
+
+    Handlers read from this instead of issuing their own comment/PR/CI/review calls.
+    ``pr_*`` fields describe the PR linked to the issue, if one was found.
+    """
+
+    title: str = ""
+    body: str = ""
+    state: str = ""
+    labels: set[str] = field(default_factory=set)
+    comments: list[str] = field(default_factory=list)
+    pr_number: int | None = None
+    pr_state: str | None = None
+    pr_head_sha: str | None = None
+    ci_status: CIStatus | None = None
+    review_status: ReviewStatus | None = None
+
+
 @dataclass
 class ReviewComment:
     id: int
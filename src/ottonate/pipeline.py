@@ -3,34 +3,65 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import json
 import re
 import shutil
+import time
 from collections.abc import Callable
 from pathlib import Path
 
 import structlog
-from claude_agent_sdk import AssistantMessage, ClaudeAgentOptions, ResultMessage, TextBlock, query
+from claude_agent_sdk import (
+    AssistantMessage,
+    ClaudeAgentOptions,
+    ResultMessage,
+    SystemMessage,
+    TextBlock,
+    query,
+)
 
+from ottonate.budget import (
+    CHARS_PER_TOKEN,
+    BudgetReport,
+    Section,
+    Trim,
+    estimate_tokens,
+    fit_context,
+)
+from ottonate.ci_watch import CIWatcher
+from ottonate.completion import CompletionCheck, all_of, on_json, on_sentinel
+from ottonate.concurrency import AdaptiveConcurrency
 from ottonate.config import OttonateConfig
-from ottonate.enrichment import EnrichedStory, enrich_story_prompt, parse_enriched_story
+from ottonate.diffchunks import DiffChunk, chunk_diff, merge_review_verdicts
+from ottonate.enrichment import (
+    EnrichedStory,
+    enrich_stories_prompt,
+    enrich_story_prompt,
+    parse_enriched_stories,
+    parse_enriched_story,
+)
 from ottonate.github import GitHubClient
+from ottonate.jsonscan import JsonScanner, Schema, find_json, scan_json
+from ottonate.labels import label_schema_version, pipeline_labels, sync_repo_labels
 from ottonate.metrics import build_issue_metrics
 from ottonate.models import (
-    LABEL_COLORS,
     CIStatus,
     IdeaPR,
     Label,
     ReviewStatus,
     StageResult,
     Ticket,
+    TicketSnapshot,
 )
 from ottonate.prompts import (
     backlog_prompt,
+    ci_fix_retry_prompt,
     ci_fixer_prompt,
     idea_refine_prompt,
     idea_triage_prompt,
     implementer_prompt,
+    plan_revision_prompt,
     planner_prompt,
     quality_gate_prompt,
     retro_prompt,
@@ -38,8 +69,11 @@ from ottonate.prompts import (
     reviewer_prompt,
     spec_prompt,
 )
+from ottonate.ratelimit import AgentRateLimiter, usage_tokens
 from ottonate.rules import ResolvedRules
+from ottonate.state import StateStore
 from ottonate.traceability import Artifact, ArtifactType, TraceabilityGraph
+from ottonate.workspaces import WorkspaceManager
 
 log = structlog.get_logger()
 
@@ -47,6 +81,9 @@ log = structlog.get_logger()
 # -- Agent invocation --
 
 
+STORY_RETRY_DELAY_S = 5.0
+
+
 class RateLimitExhaustedError(Exception):
     """Raised when rate limit backoff exceeds max delay."""
 
@@ -60,8 +97,18 @@ async def run_agent(
     on_rate_limit: Callable[[], None] | None = None,
     base_delay: int = 60,
     max_delay: int = 600,
+    limiter: AgentRateLimiter | None = None,
+    stop_when: CompletionCheck | None = None,
+    resume: str | None = None,
 ) -> StageResult:
-    """Invoke a named agent defined in ~/.claude/agents/."""
+    """Invoke a named agent defined in ~/.claude/agents/.
+
+    With a ``limiter`` every session attempt first acquires from the shared
+    request/token buckets, and rate-limit errors slow all sessions down together.
+    With ``stop_when`` the session is closed as soon as the predicate reports
+    the outcome is final, instead of draining it to the end. ``resume`` continues
+    an earlier session (by id) with ``prompt`` as the next user turn.
+    """
     env: dict[str, str] = {"CLAUDECODE": ""}
     if config and config.use_bedrock:
         env["CLAUDE_CODE_USE_BEDROCK"] = "1"
@@ -92,10 +139,26 @@ async def run_agent(
         cwd=cwd,
         env=env,
         stderr=_log_stderr,
+        resume=resume,
     )
     rate_limit_delay = base_delay
     attempt = 0
     max_attempts = 6
+    # SDK time only: waits on the limiter and rate-limit backoff sleeps are not
+    # latency, and would read as slowness to the adaptive concurrency controller.
+    sdk_time = 0.0
+
+    def _rate_limited() -> None:
+        if on_rate_limit:
+            on_rate_limit()
+        if limiter:
+            limiter.on_rate_limit(rate_limit_delay)
+
+    async def _backoff() -> None:
+        nonlocal rate_limit_delay
+        _rate_limited()
+        await asyncio.sleep(rate_limit_delay)
+        rate_limit_delay = min(rate_limit_delay * 2, max_delay)
 
     while attempt < max_attempts:
         attempt += 1
@@ -106,6 +169,16 @@ async def run_agent(
         is_error = False
         result_text = ""
         saw_rate_limit = False
+        tokens_used: int | None = 0
+        cost_known = True
+        # Assistant turns seen (one API response may arrive as several messages
+        # sharing an id) -> the rate-limited tokens each reported.
+        turn_usage: dict[str, int] = {}
+        scanner = JsonScanner()
+        stopped_early = False
+        reserved = await limiter.acquire() if limiter else 0
+        started = time.monotonic()
+        backoff_s = 0.0
 
         message_iter = query(prompt=f"/agent:{agent_name}\n\n{prompt}", options=options)
         while True:
@@ -130,10 +203,9 @@ async def run_agent(
                         agent=agent_name,
                         delay=rate_limit_delay,
                     )
-                    if on_rate_limit:
-                        on_rate_limit()
-                    await asyncio.sleep(rate_limit_delay)
-                    rate_limit_delay = min(rate_limit_delay * 2, max_delay)
+                    paused = time.monotonic()
+                    await _backoff()
+                    backoff_s += time.monotonic() - paused
                     continue
                 raise
 
@@ -145,22 +217,45 @@ async def run_agent(
                         agent=agent_name,
                         delay=rate_limit_delay,
                     )
-                    if on_rate_limit:
-                        on_rate_limit()
-                    await asyncio.sleep(rate_limit_delay)
-                    rate_limit_delay = min(rate_limit_delay * 2, max_delay)
+                    paused = time.monotonic()
+                    await _backoff()
+                    backoff_s += time.monotonic() - paused
                     continue
                 rate_limit_delay = base_delay
+                turn = message.message_id or f"#{len(turn_usage)}"
+                turn_usage[turn] = usage_tokens(message.usage)
                 for block in message.content:
                     if isinstance(block, TextBlock):
+                        if all_assistant_texts:
+                            scanner.feed("\n")
                         all_assistant_texts.append(block.text)
+                        scanner.feed(block.text)
+                        if stop_when and stop_when(block.text, scanner.values):
+                            stopped_early = True
+                if stopped_early:
+                    # No ResultMessage will arrive: take turns and tokens from the
+                    # assistant messages. Cost is only reported in the result.
+                    turns = len(turn_usage)
+                    tokens_used = sum(turn_usage.values()) or None
+                    cost_known = False
+                    log.info("agent_early_stop", agent=agent_name, turns=turns)
+                    with contextlib.suppress(Exception):
+                        await message_iter.aclose()
+                    break
+            elif isinstance(message, SystemMessage) and message.subtype == "init":
+                # Known before the result, so a session closed early can still be resumed.
+                session_id = message.data.get("session_id", "") or session_id
             elif isinstance(message, ResultMessage):
                 result_text = message.result or ""
                 session_id = message.session_id
                 cost = message.total_cost_usd or 0.0
                 turns = message.num_turns
                 is_error = message.is_error
+                tokens_used = usage_tokens(message.usage)
 
+        sdk_time = time.monotonic() - started - backoff_s
+        if limiter:
+            limiter.record_usage(tokens_used, reserved)
         has_output = bool(all_assistant_texts) or bool(result_text)
         if not has_output and saw_rate_limit:
             log.warning(
@@ -169,15 +264,17 @@ async def run_agent(
                 attempt=attempt,
                 delay=rate_limit_delay,
             )
-            if on_rate_limit:
-                on_rate_limit()
-            await asyncio.sleep(rate_limit_delay)
-            rate_limit_delay = min(rate_limit_delay * 2, max_delay)
+            await _backoff()
             continue
 
+        if limiter and not saw_rate_limit:
+            limiter.on_success()
         break
 
     full_text = "\n".join(all_assistant_texts) if all_assistant_texts else result_text
+    if not all_assistant_texts:
+        scanner.feed(result_text)
+    scanner.finish()
     log.info(
         "agent_output",
         agent=agent_name,
@@ -189,9 +286,12 @@ async def run_agent(
     return StageResult(
         text=full_text,
         session_id=session_id,
-        cost_usd=cost,
+        cost_usd=cost if cost_known else None,
         turns_used=turns,
         is_error=is_error,
+        duration_s=sdk_time,
+        json_values=scanner.values,
+        stopped_early=stopped_early,
     )
 
 
@@ -276,17 +376,25 @@ async def _git_checkout_existing_branch(cwd: str, branch: str) -> None:
             raise RuntimeError(f"git command failed: {' '.join(cmd)}")
 
 
-def _extract_json_object(text: str) -> dict | None:
+_ISSUE_DRAFT = Schema({"title": str, "body": str})
+_VERDICT = Schema({"verdict": str})
+_OBJECT = Schema()
+_OBJECT_ARRAY = Schema(items=dict)
+
+
+_VERDICT_DONE = on_json(_VERDICT)
+_BACKLOG_DONE = all_of(on_sentinel("[BACKLOG_COMPLETE]"), on_json(_OBJECT_ARRAY))
+_CI_FIX_BLOCKED = on_sentinel("[CI_FIX_BLOCKED]")
+
+
+def _json_values(text: str, values: list | None) -> list:
+    """Values already scanned while the agent streamed, else a scan of ``text``."""
+    return values if values else scan_json(text)
+
+
+def _extract_json_object(text: str, values: list | None = None) -> dict | None:
     """Extract the last JSON object with 'title' and 'body' keys from text."""
-    result = None
-    for match in re.finditer(r"\{[^{}]*\}", text):
-        try:
-            data = json.loads(match.group())
-            if "title" in data and "body" in data:
-                result = data
-        except json.JSONDecodeError:
-            continue
-    return result
+    return find_json(_json_values(text, values), _ISSUE_DRAFT)
 
 
 # -- Pipeline --
@@ -298,19 +406,29 @@ class Pipeline:
         config: OttonateConfig,
         github: GitHubClient,
         on_rate_limit: Callable[[], None] | None = None,
+        state: StateStore | None = None,
+        workspaces: WorkspaceManager | None = None,
+        ci_watch: CIWatcher | None = None,
     ):
         self.config = config
         self.github = github
         self.agent_label = config.github_agent_label
         self.trace = TraceabilityGraph()
         self._on_rate_limit = on_rate_limit
-        self._attempts: dict[str, dict[str, int]] = {}
+        self.state = state or StateStore()
+        self.workspaces = workspaces or WorkspaceManager(config)
+        # Handlers dispatched to the GitHub pool may still escalate to an agent run,
+        # so the agent cap is enforced here rather than by the dispatch pool alone.
+        self.concurrency = AdaptiveConcurrency(
+            config.max_concurrent_tickets,
+            min_limit=config.agent_concurrency_min,
+            max_limit=config.agent_concurrency_ceiling(),
+        )
+        self.limiter = AgentRateLimiter.from_config(config)
+        self.ci_watch = ci_watch or CIWatcher.from_config(config)
 
     def _check_retries(self, issue_ref: str, stage: str, max_retries: int) -> bool:
-        ticket_attempts = self._attempts.setdefault(issue_ref, {})
-        count = ticket_attempts.get(stage, 0) + 1
-        ticket_attempts[stage] = count
-        return count <= max_retries
+        return self.state.increment_attempt(issue_ref, stage) <= max_retries
 
     async def _post_stage_meta(
         self,
@@ -329,32 +447,131 @@ class Pipeline:
             "cost_usd": result.cost_usd if result else 0.0,
             "turns_used": result.turns_used if result else 0,
             "is_error": result.is_error if result else False,
+            "stopped_early": result.stopped_early if result else False,
+            "context_trimmed": result.context_trimmed if result else {},
             "retry_number": retry_number,
             "was_stuck": was_stuck,
             "stuck_reason": stuck_reason,
         }
         body = f"<!-- otto:{json.dumps(meta)} -->"
+        self.state.record(ticket.issue_ref, stage, "completed", json.dumps(meta))
         try:
             await self.github.add_comment(ticket.owner, ticket.repo, ticket.issue_number, body)
         except Exception:
             log.warning("stage_meta_post_failed", issue=ticket.issue_ref, stage=stage)
 
-    async def _run(self, agent_name: str, prompt: str, cwd: str) -> StageResult:
-        return await run_agent(
-            agent_name,
-            prompt,
-            cwd,
-            config=self.config,
-            on_rate_limit=self._on_rate_limit,
-            base_delay=self.config.rate_limit_base_delay_s,
-            max_delay=self.config.rate_limit_max_delay_s,
-        )
+    async def _run(
+        self,
+        agent_name: str,
+        prompt: str,
+        cwd: str,
+        *,
+        stop_when: CompletionCheck | None = None,
+        resume: str | None = None,
+        context: BudgetReport | None = None,
+    ) -> StageResult:
+        async with self.concurrency.slot():
+            result = await run_agent(
+                agent_name,
+                prompt,
+                cwd,
+                config=self.config,
+                on_rate_limit=self._agent_rate_limited,
+                base_delay=self.config.rate_limit_base_delay_s,
+                max_delay=self.config.rate_limit_max_delay_s,
+                limiter=self.limiter,
+                stop_when=stop_when if self.config.agent_early_stop else None,
+                resume=resume,
+            )
+        self.concurrency.record(agent_name, result.duration_s, result.is_error)
+        if context is not None:
+            result.context_trimmed = dict(context.trimmed)
+        return result
+
+    def _fit_context(self, stage: str, *sections: Section) -> tuple[dict, BudgetReport]:
+        """Cap a stage's prompt context at its token budget (see budget.fit_context)."""
+        fitted, report = fit_context(stage, list(sections), self.config.prompt_budget(stage))
+        if report.trimmed:
+            log.info(
+                "prompt_context_trimmed",
+                stage=stage,
+                limit_tokens=report.limit_tokens,
+                trimmed=report.trimmed,
+            )
+        return fitted, report
+
+    async def _run_resumable(
+        self,
+        ticket: Ticket,
+        stage: str,
+        agent_name: str,
+        prompt: str,
+        resume_prompt: str,
+        *,
+        stop_when: CompletionCheck | None = None,
+        context: BudgetReport | None = None,
+    ) -> StageResult:
+        """Run a stage agent, continuing the ticket's previous session for that stage.
+
+        A resumed session already holds the codebase context it gathered, so it
+        only gets ``resume_prompt`` (the feedback). Without a stored session, or
+        if resuming fails, a fresh session gets the full ``prompt``, whose fitted
+        context is described by ``context``.
+        """
+        session_id = self.state.session(ticket.issue_ref, stage)
+        result = None
+        if session_id and self.config.agent_session_resume:
+            try:
+                result = await self._run(
+                    agent_name,
+                    resume_prompt,
+                    ticket.work_dir,
+                    stop_when=stop_when,
+                    resume=session_id,
+                )
+            except RateLimitExhaustedError:
+                raise
+            except Exception:
+                log.warning("agent_resume_failed", issue=ticket.issue_ref, stage=stage)
+            if result is not None and result.is_error and not result.text:
+                log.warning("agent_resume_failed", issue=ticket.issue_ref, stage=stage)
+                result = None
+            if result is not None:
+                log.info("agent_session_resumed", issue=ticket.issue_ref, stage=stage)
+        if result is None:
+            result = await self._run(
+                agent_name, prompt, ticket.work_dir, stop_when=stop_when, context=context
+            )
+        self._remember_session(ticket, stage, result)
+        return result
+
+    def _remember_session(self, ticket: Ticket, stage: str, result: StageResult) -> None:
+        if result.session_id:
+            self.state.save_session(ticket.issue_ref, stage, result.session_id)
+
+    def _agent_rate_limited(self) -> None:
+        self.concurrency.on_rate_limit()
+        if self._on_rate_limit:
+            self._on_rate_limit()
+
+    def _defer_optional(self, what: str, **context: object) -> bool:
+        """True if a non-essential GitHub call should wait for more API budget."""
+        if self.github.budget.allow_optional():
+            return False
+        log.info("github_call_deferred", call=what, **context)
+        return True
 
     async def ensure_pipeline_labels(self, owner: str, repo: str) -> None:
-        """Create any missing pipeline labels in the repo (idempotent)."""
-        all_labels = dict(LABEL_COLORS)
-        all_labels[self.agent_label] = "6f42c1"
-        await self.github.ensure_labels(owner, repo, all_labels)
+        """Create any missing pipeline labels in the repo, once per label schema version."""
+        labels = pipeline_labels(self.agent_label)
+        if self.state.labels_synced(f"{owner}/{repo}", label_schema_version(labels)):
+            return
+        if self._defer_optional("ensure_labels", repo=f"{owner}/{repo}"):
+            return
+        try:
+            await sync_repo_labels(self.github, self.state, owner, repo, labels)
+        except RuntimeError as e:
+            log.warning("labels_sync_failed", repo=f"{owner}/{repo}", error=str(e))
 
     async def handle_new(self, ticket: Ticket, rules: ResolvedRules) -> None:
         """Handle a newly discovered issue (has entry label but no stage label).
@@ -364,10 +581,14 @@ class Pipeline:
         """
         await self.ensure_pipeline_labels(ticket.owner, ticket.repo)
         is_eng_repo = ticket.repo == self.config.github_engineering_repo
-        if is_eng_repo:
-            await self._handle_spec(ticket, rules)
-        else:
-            await self._handle_agent(ticket, rules)
+        self.state.load_context(ticket)
+        try:
+            if is_eng_repo:
+                await self._handle_spec(ticket, rules)
+            else:
+                await self._handle_agent(ticket, rules)
+        finally:
+            self.state.save_context(ticket)
 
     # -- Idea pipeline (Step 0) --
 
@@ -417,9 +638,7 @@ class Pipeline:
         prompt = idea_triage_prompt(idea_pr, file_contents, rules_context=rules.agent_context)
 
         # Clone workspace and checkout PR branch
-        work_dir = str(
-            self.config.resolved_workspace_dir() / f"idea_{owner}_{repo}_{idea_pr.pr_number}"
-        )
+        work_dir = str(self.workspaces.idea_path(owner, repo, idea_pr.pr_number))
         await self._ensure_idea_workspace(idea_pr, work_dir)
 
         result = await self._run("otto-idea-agent", prompt, work_dir)
@@ -441,7 +660,7 @@ class Pipeline:
         )
 
         # Extract issue JSON from agent output and create GitHub issue
-        issue_data = _extract_json_object(result.text)
+        issue_data = _extract_json_object(result.text, result.json_values)
         issue_title = issue_data["title"] if issue_data else f"Idea: {idea_pr.project_name}"
         issue_body = (
             issue_data["body"]
@@ -516,9 +735,7 @@ class Pipeline:
             idea_pr, current_intent, new_human_comments, rules_context=rules.agent_context
         )
 
-        work_dir = str(
-            self.config.resolved_workspace_dir() / f"idea_{owner}_{repo}_{idea_pr.pr_number}"
-        )
+        work_dir = str(self.workspaces.idea_path(owner, repo, idea_pr.pr_number))
         await self._ensure_idea_workspace(idea_pr, work_dir)
 
         result = await self._run("otto-idea-agent", prompt, work_dir)
@@ -531,7 +748,7 @@ class Pipeline:
 
         # Update linked issue body if we have the issue number
         if idea_pr.linked_issue_number:
-            issue_data = _extract_json_object(result.text)
+            issue_data = _extract_json_object(result.text, result.json_values)
             if issue_data:
                 await self.github.edit_issue_body(
                     owner, repo, idea_pr.linked_issue_number, issue_data["body"]
@@ -551,20 +768,8 @@ class Pipeline:
         )
 
     async def _ensure_idea_workspace(self, idea_pr: IdeaPR, work_dir: str) -> None:
-        """Clone the repo and checkout the PR branch for idea processing."""
-        path = Path(work_dir)
-        if path.exists():
-            await _git_checkout_existing_branch(work_dir, idea_pr.branch)
-            return
-        path.parent.mkdir(parents=True, exist_ok=True)
-        proc = await asyncio.create_subprocess_exec(
-            "gh", "repo", "clone", idea_pr.full_repo, work_dir,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        _, stderr = await proc.communicate()
-        if proc.returncode != 0:
-            raise RuntimeError(f"Failed to clone {idea_pr.full_repo}: {stderr.decode()}")
+        """Create the workspace and checkout the PR branch for idea processing."""
+        await self.workspaces.ensure(idea_pr.owner, idea_pr.repo, Path(work_dir))
         await _git_checkout_existing_branch(work_dir, idea_pr.branch)
 
     # -- Issue pipeline --
@@ -591,19 +796,21 @@ class Pipeline:
         if handler is None:
             return
 
+        self.state.load_context(ticket)
         try:
             await handler(ticket, rules)
-        except Exception:
+        except Exception as e:
             log.exception("stage_failed", issue=ticket.issue_ref, label=label)
+            self.state.record(ticket.issue_ref, label.value, "failed", repr(e))
             raise
+        finally:
+            self.state.save_context(ticket)
 
     # -- Idea pending gate --
 
     async def _handle_idea_pending(self, ticket: Ticket, rules: ResolvedRules) -> None:
         """agentIdeaPending: wait for linked idea PR to merge before starting spec."""
-        comments = await self.github.get_comments(
-            ticket.owner, ticket.repo, ticket.issue_number
-        )
+        comments = await self._comments(ticket)
         idea_pr_number = None
         for comment in reversed(comments):
             match = re.search(r"Source idea PR: #(\d+)", comment)
@@ -631,7 +838,7 @@ class Pipeline:
 
     async def _handle_spec(self, ticket: Ticket, rules: ResolvedRules) -> None:
         """Generate a spec from an initiative issue in the engineering repo."""
-        comments = await self.github.get_comments(ticket.owner, ticket.repo, ticket.issue_number)
+        comments = await self._comments(ticket)
         if any("Spec PR:" in c for c in comments):
             log.info("spec_already_exists", issue=ticket.issue_ref)
             return
@@ -639,11 +846,14 @@ class Pipeline:
         await self.github.add_label(
             ticket.owner, ticket.repo, ticket.issue_number, Label.SPEC.value
         )
-        description = await self.github.get_issue_body(
-            ticket.owner, ticket.repo, ticket.issue_number
+        description = await self._issue_body(ticket)
+        ctx, budget = self._fit_context(
+            "spec",
+            Section("description", description, priority=0),
+            Section("rules", rules.agent_context, priority=2),
         )
-        prompt = spec_prompt(ticket, description, rules_context=rules.agent_context)
-        result = await self._run("otto-spec-agent", prompt, ticket.work_dir)
+        prompt = spec_prompt(ticket, ctx["description"], rules_context=ctx["rules"])
+        result = await self._run("otto-spec-agent", prompt, ticket.work_dir, context=budget)
 
         log.info("spec_agent_done", issue=ticket.issue_ref, turns=result.turns_used)
         await self._post_stage_meta(ticket, "spec", "otto-spec-agent", result)
@@ -700,9 +910,7 @@ class Pipeline:
     async def _handle_spec_review(self, ticket: Ticket, rules: ResolvedRules) -> None:
         """agentSpecReview: check if the spec PR has been merged."""
         if not ticket.spec_pr_number:
-            comments = await self.github.get_comments(
-                ticket.owner, ticket.repo, ticket.issue_number
-            )
+            comments = await self._comments(ticket)
             for comment in reversed(comments):
                 match = re.search(r"Spec PR: #(\d+)", comment)
                 if match:
@@ -727,7 +935,7 @@ class Pipeline:
 
     async def _handle_spec_approved(self, ticket: Ticket, rules: ResolvedRules) -> None:
         """agentSpecApproved -> agentBacklogGen: generate backlog stories from spec."""
-        comments = await self.github.get_comments(ticket.owner, ticket.repo, ticket.issue_number)
+        comments = await self._comments(ticket)
 
         if any("Backlog PR:" in c or "Stories Created" in c for c in comments):
             log.info("backlog_already_exists", issue=ticket.issue_ref)
@@ -754,14 +962,21 @@ class Pipeline:
             await self._stuck(ticket, rules, "Could not find approved spec content")
             return
 
-        prompt = backlog_prompt(ticket, spec_text, rules_context=rules.agent_context)
-        result = await self._run("otto-planner", prompt, ticket.work_dir)
+        ctx, budget = self._fit_context(
+            "backlog",
+            Section("spec", spec_text, priority=0),
+            Section("rules", rules.agent_context, priority=2),
+        )
+        prompt = backlog_prompt(ticket, ctx["spec"], rules_context=ctx["rules"])
+        result = await self._run(
+            "otto-planner", prompt, ticket.work_dir, stop_when=_BACKLOG_DONE, context=budget
+        )
 
         if "[BACKLOG_COMPLETE]" not in result.text or result.is_error:
             await self._stuck(ticket, rules, "Backlog generation failed")
             return
 
-        stories_json = _extract_json_array(result.text)
+        stories_json = _extract_json_array(result.text, result.json_values)
         if stories_json:
             await self.github.add_comment(
                 ticket.owner,
@@ -780,9 +995,7 @@ class Pipeline:
     async def _handle_backlog_review(self, ticket: Ticket, rules: ResolvedRules) -> None:
         """agentBacklogReview: check if the backlog PR has been merged."""
         if not ticket.backlog_pr_number:
-            comments = await self.github.get_comments(
-                ticket.owner, ticket.repo, ticket.issue_number
-            )
+            comments = await self._comments(ticket)
             for comment in reversed(comments):
                 match = re.search(r"Backlog PR: #(\d+)", comment)
                 if match:
@@ -819,7 +1032,7 @@ class Pipeline:
             await self._stuck(ticket, rules, "Backlog PR was closed without merging")
 
     async def _create_stories_from_backlog(self, ticket: Ticket, rules: ResolvedRules) -> list[str]:
-        comments = await self.github.get_comments(ticket.owner, ticket.repo, ticket.issue_number)
+        comments = await self._comments(ticket)
         stories_data = None
         for comment in reversed(comments):
             if "Generated Backlog" in comment:
@@ -841,41 +1054,34 @@ class Pipeline:
             except Exception:
                 log.exception("project_creation_failed", issue=ticket.issue_ref)
 
-        created_refs: list[str] = []
+        # Stories already filed for this backlog (before a restart) are not created again.
+        filed = self.state.created_stories(ticket.issue_ref)
+        slots = asyncio.Semaphore(max(1, self.config.backlog_story_concurrency))
 
-        for story in stories_data:
-            enriched = await self._enrich_story(story)
-            title = enriched.title if enriched else story.get("title", "Untitled Story")
-            body = enriched.to_markdown() if enriched else story.get("description", "")
-            target_repo = (enriched.repo if enriched else story.get("repo", "")) or ticket.repo
+        pending = [index for index in range(len(stories_data)) if index not in filed]
+        enriched = await self._enrich_batches(ticket, stories_data, pending, slots)
 
-            labels = [self.agent_label]
-            try:
-                number = await self.github.create_issue(
-                    ticket.owner, target_repo, title, body, labels
-                )
-                ref = f"{ticket.owner}/{target_repo}#{number}"
-                created_refs.append(ref)
-
-                self.trace.add_artifact(
-                    Artifact(
-                        type=ArtifactType.STORY,
-                        id=ref,
-                        title=title,
-                    )
-                )
-                self.trace.link(
-                    ArtifactType.SPEC,
-                    f"spec:{ticket.issue_ref}",
-                    ArtifactType.STORY,
-                    ref,
-                )
+        async def _story(index: int, story: dict) -> tuple[str, str] | None:
+            if index in filed:
+                return filed[index]
+            async with slots:
+                # Stories a batch could not enrich get a session of their own.
+                if index not in enriched:
+                    enriched[index] = await self._enrich_story(story)
+                return await self._create_story(ticket, index, story, enriched[index])
 
-                if ticket.project_id:
-                    issue_url = f"https://github.com/{ticket.owner}/{target_repo}/issues/{number}"
-                    await self.github.add_to_project(ticket.owner, ticket.project_id, issue_url)
-            except Exception:
-                log.exception("story_creation_failed", title=title, repo=target_repo)
+        results = await asyncio.gather(
+            *(_story(index, story) for index, story in enumerate(stories_data))
+        )
+
+        created_refs: list[str] = []
+        for result in results:
+            if result is None:
+                continue
+            ref, title = result
+            created_refs.append(ref)
+            self.trace.add_artifact(Artifact(type=ArtifactType.STORY, id=ref, title=title))
+            self.trace.link(ArtifactType.SPEC, f"spec:{ticket.issue_ref}", ArtifactType.STORY, ref)
 
         if created_refs:
             await self.github.add_comment(
@@ -886,6 +1092,93 @@ class Pipeline:
             )
         return created_refs
 
+    async def _create_story(
+        self, ticket: Ticket, index: int, story: dict, enriched: EnrichedStory | None
+    ) -> tuple[str, str] | None:
+        """File one backlog story. Returns ``(issue_ref, title)`` or None."""
+        title = enriched.title if enriched else story.get("title", "Untitled Story")
+        body = enriched.to_markdown() if enriched else story.get("description", "")
+        target_repo = (enriched.repo if enriched else story.get("repo", "")) or ticket.repo
+
+        retries = self.config.max_story_retries
+        for attempt in range(retries + 1):
+            try:
+                number = await self.github.create_issue(
+                    ticket.owner, target_repo, title, body, [self.agent_label]
+                )
+                break
+            except Exception:
+                if attempt == retries:
+                    log.exception("story_creation_failed", title=title, repo=target_repo)
+                    return None
+                log.warning(
+                    "story_creation_retry", title=title, repo=target_repo, attempt=attempt + 1
+                )
+                await asyncio.sleep(STORY_RETRY_DELAY_S * 2**attempt)
+
+        ref = f"{ticket.owner}/{target_repo}#{number}"
+        self.state.record_story(ticket.issue_ref, index, ref, title)
+
+        if ticket.project_id:
+            issue_url = f"https://github.com/{ticket.owner}/{target_repo}/issues/{number}"
+            try:
+                await self.github.add_to_project(ticket.owner, ticket.project_id, issue_url)
+            except Exception:
+                log.exception("story_project_add_failed", story=ref)
+        return ref, title
+
+    async def _enrich_batches(
+        self,
+        ticket: Ticket,
+        stories: list[dict],
+        pending: list[int],
+        slots: asyncio.Semaphore,
+    ) -> dict[int, EnrichedStory | None]:
+        """Enrich ``pending`` stories several per session (``story_enrichment_batch_size``).
+
+        Returns the stories that came back usable, keyed by backlog index; with a
+        batch size of 1 nothing is batched and every story is enriched on its own.
+        """
+        size = self.config.story_enrichment_batch_size
+        if size <= 1 or not pending:
+            return {}
+        spec_text = await self.github.get_file_content(
+            ticket.owner,
+            ticket.repo,
+            f"specs/{ticket.issue_number}/SPEC.md",
+            self.config.github_engineering_branch,
+        )
+        batches = [pending[i : i + size] for i in range(0, len(pending), size)]
+
+        async def _batch(indices: list[int]) -> list[EnrichedStory | None]:
+            async with slots:
+                return await self._enrich_batch([stories[i] for i in indices], spec_text or "")
+
+        enriched: dict[int, EnrichedStory | None] = {}
+        for indices, results in zip(
+            batches, await asyncio.gather(*(_batch(b) for b in batches)), strict=True
+        ):
+            for index, story in zip(indices, results, strict=True):
+                if story is not None:
+                    enriched[index] = story
+        return enriched
+
+    async def _enrich_batch(
+        self, stories: list[dict], spec_context: str
+    ) -> list[EnrichedStory | None]:
+        prompt = enrich_stories_prompt(stories, spec_context)
+        try:
+            result = await self._run("otto-planner", prompt, None)
+        except Exception:
+            log.warning("story_batch_enrichment_failed", stories=len(stories))
+            return [None] * len(stories)
+        parsed = parse_enriched_stories(result.text, len(stories))
+        if None in parsed:
+            log.warning(
+                "story_batch_entries_invalid", stories=len(stories), invalid=parsed.count(None)
+            )
+        return parsed
+
     async def _enrich_story(self, story_data: dict) -> EnrichedStory | None:
         prompt = enrich_story_prompt(story_data)
         try:
@@ -903,11 +1196,15 @@ class Pipeline:
             ticket.owner, ticket.repo, ticket.issue_number, Label.PLANNING.value
         )
 
-        description = await self.github.get_issue_body(
-            ticket.owner, ticket.repo, ticket.issue_number
+        description = await self._issue_body(ticket)
+        ctx, budget = self._fit_context(
+            "planning",
+            Section("description", description, priority=0),
+            Section("rules", rules.agent_context, priority=2),
         )
-        prompt = planner_prompt(ticket, description, rules_context=rules.agent_context)
-        result = await self._run("otto-planner", prompt, ticket.work_dir)
+        prompt = planner_prompt(ticket, ctx["description"], rules_context=ctx["rules"])
+        result = await self._run("otto-planner", prompt, ticket.work_dir, context=budget)
+        self._remember_session(ticket, "planning", result)
 
         log.info(
             "planner_done",
@@ -946,14 +1243,14 @@ class Pipeline:
 
     async def _handle_plan_review(self, ticket: Ticket, rules: ResolvedRules) -> None:
         """agentPlanReview -> agentPlan or back to agentPlanning."""
-        description = await self.github.get_issue_body(
-            ticket.owner, ticket.repo, ticket.issue_number
-        )
+        description = await self._issue_body(ticket)
         plan = ticket.plan or await self._get_plan(ticket)
         prompt = quality_gate_prompt(ticket, plan, description)
-        result = await self._run("otto-quality-gate", prompt, ticket.work_dir)
+        result = await self._run(
+            "otto-quality-gate", prompt, ticket.work_dir, stop_when=_VERDICT_DONE
+        )
 
-        verdict = _parse_quality_verdict(result.text)
+        verdict = _parse_quality_verdict(result.text, result.json_values)
         log.info("quality_gate_done", issue=ticket.issue_ref, verdict=verdict)
         await self._post_stage_meta(ticket, "plan_review", "otto-quality-gate", result)
 
@@ -976,13 +1273,26 @@ class Pipeline:
                 Label.PLAN_REVIEW,
                 Label.PLANNING,
             )
-            feedback = _parse_quality_feedback(result.text)
-            description = await self.github.get_issue_body(
-                ticket.owner, ticket.repo, ticket.issue_number
+            feedback = _parse_quality_feedback(result.text, result.json_values)
+            description = await self._issue_body(ticket)
+            ctx, budget = self._fit_context(
+                "planning",
+                Section("feedback", feedback, priority=0),
+                Section("description", description, priority=0),
+                Section("rules", rules.agent_context, priority=2),
+            )
+            desc_with_feedback = (
+                ctx["description"] + f"\n\n## Previous Plan Feedback\n{ctx['feedback']}"
+            )
+            prompt = planner_prompt(ticket, desc_with_feedback, rules_context=ctx["rules"])
+            result = await self._run_resumable(
+                ticket,
+                "planning",
+                "otto-planner",
+                prompt,
+                plan_revision_prompt(feedback),
+                context=budget,
             )
-            desc_with_feedback = description + f"\n\n## Previous Plan Feedback\n{feedback}"
-            prompt = planner_prompt(ticket, desc_with_feedback, rules_context=rules.agent_context)
-            result = await self._run("otto-planner", prompt, ticket.work_dir)
             if "[NEEDS_MORE_INFO]" in result.text or result.is_error:
                 await self._stuck(ticket, rules, "Planner failed on retry")
                 return
@@ -1019,8 +1329,14 @@ class Pipeline:
 
         plan = ticket.plan or await self._get_plan(ticket)
         branch_name = _slugify_branch(ticket.issue_number, plan, rules.branch_pattern)
-        prompt = implementer_prompt(ticket, plan, branch_name, rules_context=rules.agent_context)
-        result = await self._run("otto-implementer", prompt, ticket.work_dir)
+        ctx, budget = self._fit_context(
+            "implementing",
+            Section("plan", plan, priority=0),
+            Section("rules", rules.agent_context, priority=2),
+        )
+        prompt = implementer_prompt(ticket, ctx["plan"], branch_name, rules_context=ctx["rules"])
+        result = await self._run("otto-implementer", prompt, ticket.work_dir, context=budget)
+        self._remember_session(ticket, "implementing", result)
 
         log.info(
             "implementer_done",
@@ -1078,20 +1394,25 @@ class Pipeline:
         """agentPR: check CI status."""
         owner, repo = ticket.owner, ticket.repo
 
-        if not ticket.pr_number:
-            pr_number, pr_state = await self.github.find_pr(owner, repo, str(ticket.issue_number))
-            if pr_number and pr_state == "MERGED":
-                log.info("pr_already_merged", issue=ticket.issue_ref, pr_number=pr_number)
-                await self.github.remove_label(owner, repo, ticket.issue_number, Label.PR.value)
-                return
-            elif pr_number:
+        pr_number, pr_state = await self._current_pr(ticket)
+        if pr_number and pr_state == "MERGED":
+            log.info("pr_already_merged", issue=ticket.issue_ref, pr_number=pr_number)
+            await self.github.remove_label(owner, repo, ticket.issue_number, Label.PR.value)
+            return
+        elif pr_number:
+            if pr_number != ticket.pr_number:
                 ticket.pr_number = pr_number
                 log.info("pr_discovered", issue=ticket.issue_ref, pr_number=pr_number)
-            else:
-                await self._stuck(ticket, rules, "PR label present but no PR found")
-                return
+        else:
+            await self._stuck(ticket, rules, "PR label present but no PR found")
+            return
 
-        status = await self.github.get_ci_status(owner, repo, ticket.pr_number)
+        status = await self._ci_status(ticket)
+        if status == CIStatus.PENDING:
+            snapshot = self._snapshot_pr(ticket, ticket.pr_number)
+            self.ci_watch.watch(ticket.issue_ref, snapshot.pr_head_sha if snapshot else None)
+        else:
+            self.ci_watch.wake(ticket.issue_ref)
 
         if status == CIStatus.PASSED:
             await self.github.swap_label(
@@ -1102,9 +1423,17 @@ class Pipeline:
                 await self._stuck(ticket, rules, "CI fix retry limit exceeded")
                 return
             await self.github.swap_label(owner, repo, ticket.issue_number, Label.PR, Label.CI_FIX)
-            failure_logs = await self.github.get_ci_failure_logs(owner, repo, ticket.pr_number)
-            prompt = ci_fixer_prompt(ticket, failure_logs)
-            result = await self._run("otto-ci-fixer", prompt, ticket.work_dir)
+            failure_logs = await self.github.get_ci_failure_logs(
+                owner, repo, ticket.pr_number, limit_tokens=self.config.prompt_budget("ci_fix")
+            )
+            result = await self._run_resumable(
+                ticket,
+                "ci_fix",
+                "otto-ci-fixer",
+                ci_fixer_prompt(ticket, failure_logs),
+                ci_fix_retry_prompt(failure_logs),
+                stop_when=_CI_FIX_BLOCKED,
+            )
 
             log.info("ci_fixer_done", issue=ticket.issue_ref, turns=result.turns_used)
             await self._post_stage_meta(ticket, "ci_fix", "otto-ci-fixer", result)
@@ -1119,10 +1448,13 @@ class Pipeline:
         owner, repo = ticket.owner, ticket.repo
         plan = ticket.plan or await self._get_plan(ticket)
         diff = await self.github.get_pr_diff(owner, repo, ticket.pr_number)
-        prompt = reviewer_prompt(ticket, plan, diff)
-        result = await self._run("otto-reviewer", prompt, ticket.work_dir)
+        chunk_tokens = self.config.self_review_chunk_tokens
+        if chunk_tokens and estimate_tokens(diff) > chunk_tokens:
+            result = await self._review_chunks(ticket, plan, diff, chunk_tokens)
+        else:
+            result = await self._review_diff(ticket, plan, diff)
 
-        verdict = _parse_review_verdict(result.text)
+        verdict = _parse_review_verdict(result.text, result.json_values)
         log.info("self_review_done", issue=ticket.issue_ref, verdict=verdict)
         await self._post_stage_meta(ticket, "self_review", "otto-reviewer", result)
 
@@ -1137,29 +1469,82 @@ class Pipeline:
                 owner, repo, ticket.issue_number, Label.SELF_REVIEW, Label.IMPLEMENTING
             )
             prompt = f"The self-review found issues:\n\n{result.text}\n\nFix these issues and push."
-            await self._run("otto-implementer", prompt, ticket.work_dir)
+            await self._run_resumable(ticket, "implementing", "otto-implementer", prompt, prompt)
             await self.github.swap_label(
                 owner, repo, ticket.issue_number, Label.IMPLEMENTING, Label.PR
             )
 
+    async def _review_diff(
+        self, ticket: Ticket, plan: str, diff: str, *, part: str = ""
+    ) -> StageResult:
+        ctx, budget = self._fit_context(
+            "self_review",
+            Section("plan", plan, priority=0),
+            Section("diff", diff, priority=1, trim=Trim.DIFF),
+        )
+        prompt = reviewer_prompt(ticket, ctx["plan"], ctx["diff"], part=part)
+        return await self._run(
+            "otto-reviewer", prompt, ticket.work_dir, stop_when=_VERDICT_DONE, context=budget
+        )
+
+    async def _review_chunks(
+        self, ticket: Ticket, plan: str, diff: str, chunk_tokens: int
+    ) -> StageResult:
+        """Large-PR self-review: review file-grouped chunks in parallel, merge the verdicts."""
+        chunks = chunk_diff(diff, chunk_tokens * CHARS_PER_TOKEN)
+        slots = asyncio.Semaphore(max(1, self.config.self_review_chunk_concurrency))
+
+        async def _review(index: int, chunk: DiffChunk) -> StageResult:
+            part = f"part {index + 1} of {len(chunks)}: {', '.join(chunk.files)}"
+            async with slots:
+                return await self._review_diff(ticket, plan, chunk.text, part=part)
+
+        results = await asyncio.gather(*(_review(i, c) for i, c in enumerate(chunks)))
+        verdicts = [find_json(_json_values(r.text, r.json_values), _VERDICT) for r in results]
+        merged = merge_review_verdicts(verdicts)
+        log.info(
+            "self_review_chunked",
+            issue=ticket.issue_ref,
+            chunks=len(chunks),
+            verdicts=[v["verdict"] if v else None for v in verdicts],
+        )
+        trimmed: dict[str, int] = {}
+        for r in results:
+            for name, tokens in r.context_trimmed.items():
+                trimmed[name] = trimmed.get(name, 0) + tokens
+        return StageResult(
+            text=json.dumps(merged, indent=2),
+            session_id="",
+            cost_usd=(
+                None
+                if any(r.cost_usd is None for r in results)
+                else sum(r.cost_usd for r in results)
+            ),
+            turns_used=sum(r.turns_used for r in results),
+            is_error=any(r.is_error for r in results),
+            duration_s=max((r.duration_s for r in results), default=0.0),
+            json_values=[merged],
+            stopped_early=any(r.stopped_early for r in results),
+            context_trimmed=trimmed,
+        )
+
     async def _handle_review(self, ticket: Ticket, rules: ResolvedRules) -> None:
         """agentReview: check for human review."""
         owner, repo = ticket.owner, ticket.repo
 
-        if not ticket.pr_number:
-            pr_number, pr_state = await self.github.find_pr(owner, repo, str(ticket.issue_number))
-            if pr_number and pr_state == "MERGED":
-                await self.github.remove_label(owner, repo, ticket.issue_number, Label.REVIEW.value)
-                return
-            elif pr_number:
-                ticket.pr_number = pr_number
-            else:
-                return
+        pr_number, pr_state = await self._current_pr(ticket)
+        if pr_number and pr_state == "MERGED":
+            await self.github.remove_label(owner, repo, ticket.issue_number, Label.REVIEW.value)
+            return
+        elif pr_number:
+            ticket.pr_number = pr_number
+        else:
+            return
 
-        review_status = await self.github.get_review_status(owner, repo, ticket.pr_number)
+        review_status = await self._review_status(ticket)
 
         if review_status == ReviewStatus.APPROVED:
-            ci_status = await self.github.get_ci_status(owner, repo, ticket.pr_number)
+            ci_status = await self._ci_status(ticket)
             if ci_status == CIStatus.PASSED:
                 await self.github.swap_label(
                     owner, repo, ticket.issue_number, Label.REVIEW, Label.MERGE_READY
@@ -1186,6 +1571,8 @@ class Pipeline:
                 return
 
             prompt = review_responder_prompt(ticket, comments, owner, repo)
+            # No early stop: an escalating responder explains after its sentinel
+            # what needs a human decision.
             result = await self._run("otto-review-responder", prompt, ticket.work_dir)
 
             log.info("review_responder_done", issue=ticket.issue_ref, turns=result.turns_used)
@@ -1206,12 +1593,12 @@ class Pipeline:
         owner, repo = ticket.owner, ticket.repo
 
         if ticket.pr_number:
-            pr_state = await self.github.get_pr_state(owner, repo, ticket.pr_number)
+            pr_state = await self._pr_state(ticket, ticket.pr_number)
         else:
             pr_state = "UNKNOWN"
 
         if pr_state != "MERGED":
-            comments = await self.github.get_comments(owner, repo, ticket.issue_number)
+            comments = await self._comments(ticket)
             already_notified = any("merge-ready" in c.lower() for c in comments)
             if not already_notified and rules.notify_team:
                 await self.github.mention_on_issue(
@@ -1225,6 +1612,9 @@ class Pipeline:
             log.info("ticket_merge_ready_waiting", issue=ticket.issue_ref)
             return
 
+        # The retro decision needs the issue timeline; it can wait for budget.
+        if self._defer_optional("issue_timeline", issue=ticket.issue_ref):
+            return
         summary = await build_issue_metrics(self.github, owner, repo, ticket.issue_number)
         if summary.needs_retro:
             log.info(
@@ -1249,24 +1639,33 @@ class Pipeline:
     async def _handle_retro(self, ticket: Ticket, rules: ResolvedRules) -> None:
         """agentRetro: run a retrospective on a completed issue."""
         owner, repo = ticket.owner, ticket.repo
+        if self._defer_optional("issue_timeline", issue=ticket.issue_ref):
+            return
         summary = await build_issue_metrics(self.github, owner, repo, ticket.issue_number)
 
         plan = ticket.plan or await self._get_plan(ticket)
-        comments = await self.github.get_comments(owner, repo, ticket.issue_number)
-        comment_dicts = [{"author": "unknown", "body": c} for c in comments]
+        comments = await self._comments(ticket)
+        ctx, budget = self._fit_context(
+            "retro",
+            Section("plan", plan, priority=1),
+            # The prompt shows the first 200 chars of each comment; the latest matter most.
+            Section("comments", [c[:200] for c in comments], priority=2, trim=Trim.TAIL),
+            Section("rules", rules.agent_context, priority=3),
+        )
+        comment_dicts = [{"author": "unknown", "body": c} for c in ctx["comments"]]
 
         prompt = retro_prompt(
             ticket,
-            plan,
+            ctx["plan"],
             summary,
             comment_dicts,
-            rules_context=rules.agent_context,
+            rules_context=ctx["rules"],
         )
 
         eng_dir = self._eng_workspace_path()
         await self._ensure_eng_workspace()
 
-        result = await self._run("otto-retro", prompt, str(eng_dir))
+        result = await self._run("otto-retro", prompt, str(eng_dir), context=budget)
         await self._post_stage_meta(ticket, "retro", "otto-retro", result)
 
         if "[SELF_IMPROVEMENT]" in result.text:
@@ -1322,6 +1721,7 @@ class Pipeline:
 
     async def _stuck(self, ticket: Ticket, rules: ResolvedRules, reason: str) -> None:
         log.warning("ticket_stuck", issue=ticket.issue_ref, reason=reason)
+        self.state.record(ticket.issue_ref, "stuck", "stuck", reason)
         meta = {
             "stage": "stuck",
             "agent": None,
@@ -1356,8 +1756,69 @@ class Pipeline:
                 f"Issue stuck: {reason}",
             )
 
+    # -- Snapshot-aware reads --
+    # The scheduler attaches a TicketSnapshot fetched in one batched query per poll;
+    # these fall back to individual GitHub calls when it is absent (e.g. `process`).
+
+    async def _comments(self, ticket: Ticket) -> list[str]:
+        if ticket.snapshot is not None:
+            return ticket.snapshot.comments
+        return await self.github.get_comments(ticket.owner, ticket.repo, ticket.issue_number)
+
+    async def _issue_body(self, ticket: Ticket) -> str:
+        if ticket.snapshot is not None:
+            return ticket.snapshot.body
+        return await self.github.get_issue_body(ticket.owner, ticket.repo, ticket.issue_number)
+
+    async def _linked_pr(self, ticket: Ticket) -> tuple[int | None, str | None]:
+        if ticket.snapshot is not None and ticket.snapshot.pr_number:
+            return ticket.snapshot.pr_number, ticket.snapshot.pr_state
+        return await self.github.find_pr(ticket.owner, ticket.repo, str(ticket.issue_number))
+
+    async def _current_pr(self, ticket: Ticket) -> tuple[int | None, str | None]:
+        """The ticket's PR and its state; a stored PR that was closed is looked up again.
+
+        A PR closed without merging is dropped from the ticket and its stored
+        context, so a replacement PR is picked up; with none, there is no PR.
+        """
+        if ticket.pr_number:
+            pr_state = await self._pr_state(ticket, ticket.pr_number)
+            if pr_state != "CLOSED":
+                return ticket.pr_number, pr_state
+            log.info("pr_closed_relinking", issue=ticket.issue_ref, pr_number=ticket.pr_number)
+            ticket.pr_number = None
+            self.state.clear_context(ticket.issue_ref, "pr_number")
+        pr_number, pr_state = await self._linked_pr(ticket)
+        if pr_state == "CLOSED":
+            return None, None
+        return pr_number, pr_state
+
+    def _snapshot_pr(self, ticket: Ticket, pr_number: int | None) -> TicketSnapshot | None:
+        snapshot = ticket.snapshot
+        if snapshot is not None and pr_number and snapshot.pr_number == pr_number:
+            return snapshot
+        return None
+
+    async def _pr_state(self, ticket: Ticket, pr_number: int) -> str:
+        snapshot = self._snapshot_pr(ticket, pr_number)
+        if snapshot and snapshot.pr_state:
+            return snapshot.pr_state
+        return await self.github.get_pr_state(ticket.owner, ticket.repo, pr_number)
+
+    async def _ci_status(self, ticket: Ticket) -> CIStatus:
+        snapshot = self._snapshot_pr(ticket, ticket.pr_number)
+        if snapshot and snapshot.ci_status is not None:
+            return snapshot.ci_status
+        return await self.github.get_ci_status(ticket.owner, ticket.repo, ticket.pr_number)
+
+    async def _review_status(self, ticket: Ticket) -> ReviewStatus:
+        snapshot = self._snapshot_pr(ticket, ticket.pr_number)
+        if snapshot and snapshot.review_status is not None:
+            return snapshot.review_status
+        return await self.github.get_review_status(ticket.owner, ticket.repo, ticket.pr_number)
+
     async def _get_plan(self, ticket: Ticket) -> str:
-        comments = await self.github.get_comments(ticket.owner, ticket.repo, ticket.issue_number)
+        comments = await self._comments(ticket)
         for comment in reversed(comments):
             marker = "## Development Plan"
             idx = comment.find(marker)
@@ -1383,37 +1844,19 @@ def _extract_plan(text: str) -> str:
     return cleaned
 
 
-def _parse_quality_verdict(text: str) -> str:
-    try:
-        match = re.search(r"\{[\s\S]*\}", text)
-        if match:
-            data = json.loads(match.group())
-            return data.get("verdict", "fail_escalate")
-    except (json.JSONDecodeError, AttributeError):
-        pass
-    return "fail_escalate"
+def _parse_quality_verdict(text: str, values: list | None = None) -> str:
+    data = find_json(_json_values(text, values), _VERDICT)
+    return data["verdict"] if data else "fail_escalate"
 
 
-def _parse_quality_feedback(text: str) -> str:
-    try:
-        match = re.search(r"\{[\s\S]*\}", text)
-        if match:
-            data = json.loads(match.group())
-            return data.get("feedback", "")
-    except (json.JSONDecodeError, AttributeError):
-        pass
-    return ""
+def _parse_quality_feedback(text: str, values: list | None = None) -> str:
+    data = find_json(_json_values(text, values), _VERDICT)
+    return data.get("feedback", "") if data else ""
 
 
-def _parse_review_verdict(text: str) -> str:
-    try:
-        match = re.search(r"\{[\s\S]*\}", text)
-        if match:
-            data = json.loads(match.group())
-            return data.get("verdict", "issues_found")
-    except (json.JSONDecodeError, AttributeError):
-        pass
-    return "issues_found"
+def _parse_review_verdict(text: str, values: list | None = None) -> str:
+    data = find_json(_json_values(text, values), _VERDICT)
+    return data["verdict"] if data else "issues_found"
 
 
 def _extract_pr_number(text: str) -> int | None:
@@ -1439,25 +1882,9 @@ def _parse_self_improvement(text: str) -> dict | None:
     idx = text.find(marker)
     if idx == -1:
         return None
-    payload = text[idx + len(marker) :].strip()
-    try:
-        return json.loads(payload.split("\n")[0])
-    except (json.JSONDecodeError, IndexError):
-        for line in payload.split("\n"):
-            line = line.strip()
-            if line.startswith("{"):
-                try:
-                    return json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-        return None
+    return find_json(scan_json(text[idx + len(marker) :]), _OBJECT, last=False)
 
 
-def _extract_json_array(text: str) -> list | None:
-    match = re.search(r"\[[\s\S]*\]", text)
-    if match:
-        try:
-            return json.loads(match.group())
-        except json.JSONDecodeError:
-            pass
-    return None
+def _extract_json_array(text: str, values: list | None = None) -> list | None:
+    """The first JSON array of objects in ``text`` (e.g. a generated backlog)."""
+    return find_json(_json_values(text, values), _OBJECT_ARRAY, last=False)
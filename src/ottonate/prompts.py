@@ -72,6 +72,17 @@ Analyze the codebase and produce a development plan for this issue.
 """
 
 
+def plan_revision_prompt(feedback: str) -> str:
+    """Follow-up turn for a resumed planner session whose plan failed the quality gate."""
+    return f"""The quality gate rejected your plan.
+
+### Feedback
+{feedback}
+
+Revise the plan to address this feedback and output the full revised plan.
+"""
+
+
 def quality_gate_prompt(ticket: Ticket, plan: str, description: str) -> str:
     return f"""## Issue: {ticket.issue_ref}
 
@@ -117,7 +128,26 @@ Fix the CI failures and push.
 """
 
 
-def reviewer_prompt(ticket: Ticket, plan: str, diff: str) -> str:
+def ci_fix_retry_prompt(failure_logs: str) -> str:
+    """Follow-up turn for a resumed CI-fixer session after CI failed again."""
+    return f"""CI is still failing after your last fix.
+
+### CI Failure Logs
+{failure_logs}
+
+Fix the CI failures and push.
+"""
+
+
+def reviewer_prompt(ticket: Ticket, plan: str, diff: str, *, part: str = "") -> str:
+    if part:
+        heading = f"### PR Diff ({part})"
+        instruction = (
+            "Review this part of the PR against the plan. The other parts are reviewed "
+            "separately: only report issues visible in this part of the diff."
+        )
+    else:
+        heading, instruction = "### PR Diff", "Review this PR against the plan."
     return f"""## Issue: {ticket.issue_ref}
 ## PR: #{ticket.pr_number}
 ## Repo: {ticket.full_repo}
@@ -125,10 +155,10 @@ def reviewer_prompt(ticket: Ticket, plan: str, diff: str) -> str:
 ### Original Plan
 {plan}
 
-### PR Diff
+{heading}
 {diff}
 
-Review this PR against the plan.
+{instruction}
 """
 
 
@@ -0,0 +1,192 @@
+"""Shared token-bucket limiter for agent sessions.
+
+Every agent session acquires from one limiter before it starts, so when the
+model endpoint pushes back the whole process slows down together instead of
+each session hitting the limit and backing off in lockstep.
+
+Two buckets are kept: session requests per minute and model tokens per minute.
+Token cost is not known up front, so a session reserves the running average of
+recent sessions and the difference is settled when it finishes. Rates adapt
+AIMD-style: a rate-limit error halves them (or, when no rate is configured,
+caps them at half of what was observed over the last minute); each clean
+session restores a tenth of the ceiling. The SDK does not surface HTTP rate
+limit headers, so errors and reported usage are the signals.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+
+import structlog
+
+from ottonate.config import OttonateConfig
+
+log = structlog.get_logger()
+
+_WINDOW_S = 60.0
+_MIN_FRACTION = 0.1
+_RECOVERY_FRACTION = 0.1
+
+
+class TokenBucket:
+    """Refills at ``rate_per_min``; ``None`` means unlimited. Balance may go negative."""
+
+    def __init__(self, rate_per_min: float | None) -> None:
+        self.rate_per_min = rate_per_min
+        self.tokens = rate_per_min or 0.0
+        self._updated = time.monotonic()
+
+    @property
+    def capacity(self) -> float:
+        return self.rate_per_min or 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.rate_per_min:
+            elapsed = now - self._updated
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_min / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` can be taken (0 if now)."""
+        if not self.rate_per_min:
+            return 0.0
+        self._refill()
+        # Never ask for more than a full bucket, or large requests would wait forever.
+        needed = min(amount, self.capacity) - self.tokens
+        return max(0.0, needed * 60 / self.rate_per_min)
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        if self.rate_per_min:
+            self.tokens -= amount
+
+    def set_rate(self, rate_per_min: float | None) -> None:
+        self._refill()
+        self.rate_per_min = rate_per_min
+        if rate_per_min:
+            self.tokens = min(self.tokens, rate_per_min)
+
+
+class AgentRateLimiter:
+    def __init__(
+        self,
+        requests_per_min: float = 0,
+        tokens_per_min: float = 0,
+        *,
+        default_session_tokens: int = 50_000,
+    ) -> None:
+        self._max = {"requests": requests_per_min or None, "tokens": tokens_per_min or None}
+        self.requests = TokenBucket(self._max["requests"])
+        self.tokens = TokenBucket(self._max["tokens"])
+        self._lock = asyncio.Lock()
+        self._starts: deque[float] = deque()
+        self._usage: deque[tuple[float, int]] = deque()
+        self._session_tokens: deque[int] = deque([default_session_tokens], maxlen=20)
+        self.paused_until = 0.0
+
+    @classmethod
+    def from_config(cls, config: OttonateConfig) -> AgentRateLimiter:
+        return cls(config.agent_requests_per_min, config.agent_tokens_per_min)
+
+    @property
+    def estimated_session_tokens(self) -> int:
+        return int(sum(self._session_tokens) / len(self._session_tokens))
+
+    async def acquire(self) -> int:
+        """Wait for a session slot. Returns the tokens reserved for the session."""
+        estimate = self.estimated_session_tokens
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                wait = max(
+                    self.paused_until - now,
+                    self.requests.wait_time(1),
+                    self.tokens.wait_time(estimate),
+                )
+                if wait <= 0:
+                    break
+                log.debug("agent_rate_limiter_wait", wait_s=round(wait, 2))
+                await asyncio.sleep(wait)
+            self.requests.take(1)
+            self.tokens.take(estimate)
+            now = time.monotonic()
+            self._starts.append(now)
+            self._trim(now)
+        return estimate
+
+    def record_usage(self, tokens_used: int | None, reserved: int) -> None:
+        """Settle a finished session's actual token use against its reservation.
+
+        ``None`` means the use is unknown (a session closed before its result):
+        the reservation stands as the charge, but does not move the estimate.
+        """
+        if tokens_used is None:
+            self._usage.append((time.monotonic(), reserved))
+            log.debug("agent_usage_unknown", reserved=reserved)
+            return
+        if tokens_used <= 0:
+            return
+        self.tokens.take(tokens_used - reserved)
+        self._session_tokens.append(tokens_used)
+        self._usage.append((time.monotonic(), tokens_used))
+
+    def on_rate_limit(self, delay_s: float) -> None:
+        """Multiplicative decrease, plus a shared pause so sessions stop starting.
+
+        Errors arriving while already paused only extend the pause, so one burst
+        of 429s across concurrent sessions counts as a single decrease.
+        """
+        now = time.monotonic()
+        already_paused = now < self.paused_until
+        self.paused_until = max(self.paused_until, now + delay_s)
+        if already_paused:
+            return
+        self._trim(now)
+        observed = {
+            "requests": float(len(self._starts)),
+            "tokens": float(sum(tokens for _, tokens in self._usage)),
+        }
+        for name, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            current = bucket.rate_per_min or observed[name]
+            if not current:
+                continue
+            floor = (self._max[name] or current) * _MIN_FRACTION
+            bucket.set_rate(max(floor, current / 2))
+        log.warning(
+            "agent_rate_limiter_decrease",
+            requests_per_min=self.requests.rate_per_min,
+            tokens_per_min=self.tokens.rate_per_min,
+            paused_s=round(delay_s),
+        )
+
+    def on_success(self) -> None:
+        """Additive increase back toward the configured rate (or without bound if unset)."""
+        for name, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            rate = bucket.rate_per_min
+            ceiling = self._max[name]
+            if rate is None or (ceiling is not None and rate >= ceiling):
+                continue
+            step = (ceiling or rate) * _RECOVERY_FRACTION
+            new_rate = rate + step if ceiling is None else min(ceiling, rate + step)
+            bucket.set_rate(new_rate)
+            log.debug("agent_rate_limiter_increase", bucket=name, rate_per_min=round(new_rate, 1))
+
+    def _trim(self, now: float) -> None:
+        while self._starts and now - self._starts[0] > _WINDOW_S:
+            self._starts.popleft()
+        while self._usage and now - self._usage[0][0] > _WINDOW_S:
+            self._usage.popleft()
+
+
+def usage_tokens(usage: dict | None) -> int:
+    """Rate-limited tokens for a session from a ResultMessage ``usage`` dict.
+
+    Cache reads are excluded; they do not count toward input-token limits.
+    """
+    if not usage:
+        return 0
+    keys = ("input_tokens", "output_tokens", "cache_creation_input_tokens")
+    return sum(int(usage.get(key) or 0) for key in keys)
@@ -8,7 +8,9 @@ Layers (most specific wins):
 
 from __future__ import annotations
 
+import asyncio
 import re
+import time
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
@@ -27,6 +29,7 @@ DEFAULT_CONFIG: dict = {
     "notify_team": "",
     "required_reviewers": {"default": []},
     "labels": {"entry": "otto"},
+    "scheduling": {"max_concurrent": 0, "weight": 1},
 }
 
 DEFAULT_RULES = ""
@@ -44,6 +47,62 @@ class ResolvedRules:
     agent_context: str = ""
     architecture_context: str = ""
     repo_catalog: list[dict] = field(default_factory=list)
+    # Fair-share scheduling: per-repo ticket cap (0 = none) and relative share weight
+    max_concurrent: int = 0
+    share_weight: float = 1.0
+
+
+@dataclass
+class _OrgLayer:
+    config: dict
+    rules_md: str
+    arch_context: str
+
+
+@dataclass
+class _RepoEntry:
+    sha: str | None
+    rules: ResolvedRules
+    checked_at: float
+
+
+class RulesCache:
+    """Memoizes resolved rules per (owner, repo, ref SHA) for ``ttl_s`` seconds.
+
+    The org layer (engineering repo config, rules and architecture docs) is loaded
+    once per engineering head SHA and shared by every repo. Once an entry's TTL
+    lapses the head SHA is re-checked; content is only refetched if it moved, and
+    a new engineering SHA drops every cached repo for that owner.
+    """
+
+    def __init__(self, ttl_s: float = 300.0) -> None:
+        self.ttl_s = ttl_s
+        self._eng_sha: dict[str, tuple[str | None, float]] = {}
+        self._org: dict[tuple[str, str | None], _OrgLayer] = {}
+        self._repos: dict[tuple[str, str], _RepoEntry] = {}
+        self._org_lock = asyncio.Lock()
+        self._repo_locks: dict[tuple[str, str], asyncio.Lock] = {}
+
+    def peek(self, owner: str, repo: str) -> ResolvedRules | None:
+        """Last resolved rules for a repo, stale or not, without any GitHub calls."""
+        entry = self._repos.get((owner, repo))
+        return entry.rules if entry else None
+
+    def invalidate(self, owner: str | None = None) -> None:
+        if owner is None:
+            self._eng_sha.clear()
+            self._org.clear()
+            self._repos.clear()
+            return
+        self._eng_sha.pop(owner, None)
+        self._org = {k: v for k, v in self._org.items() if k[0] != owner}
+        self._repos = {k: v for k, v in self._repos.items() if k[0] != owner}
+
+    def _repo_lock(self, owner: str, repo: str) -> asyncio.Lock:
+        return self._repo_locks.setdefault((owner, repo), asyncio.Lock())
+
+    def _fresh(self, checked_at: float) -> bool:
+        return time.monotonic() - checked_at < self.ttl_s
 
 
 async def load_rules(
@@ -51,26 +110,87 @@ async def load_rules(
     repo: str,
     config: OttonateConfig,
     github: GitHubClient,
+    *,
+    cache: RulesCache | None = None,
 ) -> ResolvedRules:
     """Load and merge rules from all three layers."""
-    merged_config = dict(DEFAULT_CONFIG)
-    org_rules_md = DEFAULT_RULES
-    eng_ref = config.github_engineering_branch
-
     eng_repo = config.github_engineering_repo
-    org_config, org_rules_md = await _load_layer(owner, eng_repo, github, eng_ref)
-    merged_config = _merge_config(merged_config, org_config)
+    if cache is None:
+        org = await _load_org_layer(owner, eng_repo, github, config.github_engineering_branch)
+        repo_layer: tuple[dict, str] = ({}, "")
+        if repo != eng_repo:
+            repo_ref = await github.get_default_branch(owner, repo)
+            repo_layer = await _load_layer(owner, repo, github, repo_ref)
+        return _resolve(org, *repo_layer, config)
+
+    eng_sha, org = await _cached_org_layer(owner, config, github, cache)
+
+    async with cache._repo_lock(owner, repo):
+        entry = cache._repos.get((owner, repo))
+        if entry and cache._fresh(entry.checked_at):
+            return entry.rules
+
+        repo_config: dict = {}
+        repo_rules_md = ""
+        repo_sha: str | None = eng_sha
+        if repo != eng_repo:
+            repo_ref = await github.get_default_branch(owner, repo)
+            repo_sha = await github.get_branch_sha(owner, repo, repo_ref)
+            if entry and repo_sha and entry.sha == repo_sha:
+                entry.checked_at = time.monotonic()
+                return entry.rules
+            repo_config, repo_rules_md = await _load_layer(
+                owner, repo, github, repo_sha or repo_ref
+            )
+
+        rules = _resolve(org, repo_config, repo_rules_md, config)
+        cache._repos[(owner, repo)] = _RepoEntry(repo_sha, rules, time.monotonic())
+        log.debug("rules_cached", owner=owner, repo=repo, sha=repo_sha)
+        return rules
+
+
+async def _cached_org_layer(
+    owner: str, config: OttonateConfig, github: GitHubClient, cache: RulesCache
+) -> tuple[str | None, _OrgLayer]:
+    """Return the engineering head SHA and its org layer, shared across repos.
+
+    When the head SHA moves (or cannot be read) after the TTL, every cached entry
+    for ``owner`` is dropped so repo rules are rebuilt on top of the new org layer.
+    """
+    eng_repo = config.github_engineering_repo
+    async with cache._org_lock:
+        known = cache._eng_sha.get(owner)
+        if known and cache._fresh(known[1]):
+            sha = known[0]
+        else:
+            sha = await github.get_branch_sha(owner, eng_repo, config.github_engineering_branch)
+            if known and (sha is None or sha != known[0]):
+                log.info("rules_cache_invalidated", owner=owner, old_sha=known[0], new_sha=sha)
+                cache.invalidate(owner)
+            cache._eng_sha[owner] = (sha, time.monotonic())
+
+        org = cache._org.get((owner, sha))
+        if org is None:
+            org = await _load_org_layer(
+                owner, eng_repo, github, sha or config.github_engineering_branch
+            )
+            cache._org[(owner, sha)] = org
+        return sha, org
 
-    arch_context = await _load_org_context(owner, eng_repo, github, eng_ref)
 
-    repo_config: dict = {}
-    repo_rules_md = ""
-    if repo != eng_repo:
-        repo_ref = await github.get_default_branch(owner, repo)
-        repo_config, repo_rules_md = await _load_layer(owner, repo, github, repo_ref)
-        merged_config = _merge_config(merged_config, repo_config)
+async def _load_org_layer(owner: str, eng_repo: str, github: GitHubClient, ref: str) -> _OrgLayer:
+    org_config, org_rules_md = await _load_layer(owner, eng_repo, github, ref)
+    arch_context = await _load_org_context(owner, eng_repo, github, ref)
+    return _OrgLayer(org_config, org_rules_md, arch_context)
 
-    agent_context = _merge_agent_context(org_rules_md, repo_rules_md, arch_context)
+
+def _resolve(
+    org: _OrgLayer, repo_config: dict, repo_rules_md: str, config: OttonateConfig
+) -> ResolvedRules:
+    merged_config = _merge_config(dict(DEFAULT_CONFIG), org.config)
+    merged_config = _merge_config(merged_config, repo_config)
+
+    agent_context = _merge_agent_context(org.rules_md, repo_rules_md, org.arch_context)
 
     reviewers = merged_config.get("required_reviewers", {})
     if isinstance(reviewers, list):
@@ -79,7 +199,8 @@ async def load_rules(
     labels = merged_config.get("labels", {})
     entry_label = labels.get("entry", config.github_agent_label)
 
-    repo_catalog = _parse_repo_catalog(arch_context)
+    repo_catalog = _parse_repo_catalog(org.arch_context)
+    max_concurrent, share_weight = _parse_scheduling(merged_config.get("scheduling"))
 
     return ResolvedRules(
         branch_pattern=merged_config.get("branch_pattern", DEFAULT_CONFIG["branch_pattern"]),
@@ -88,11 +209,28 @@ async def load_rules(
         required_reviewers=reviewers,
         entry_label=entry_label,
         agent_context=agent_context,
-        architecture_context=arch_context,
+        architecture_context=org.arch_context,
         repo_catalog=repo_catalog,
+        max_concurrent=max_concurrent,
+        share_weight=share_weight,
     )
 
 
+def _parse_scheduling(scheduling: object) -> tuple[int, float]:
+    """Read ``scheduling.max_concurrent`` / ``scheduling.weight``, ignoring bad values."""
+    if not isinstance(scheduling, dict):
+        return 0, 1.0
+    try:
+        max_concurrent = max(0, int(scheduling.get("max_concurrent") or 0))
+    except (TypeError, ValueError):
+        max_concurrent = 0
+    try:
+        weight = float(scheduling.get("weight") or 1)
+    except (TypeError, ValueError):
+        weight = 1.0
+    return max_concurrent, weight if weight > 0 else 1.0
+
+
 async def _load_layer(owner: str, repo: str, github: GitHubClient, ref: str) -> tuple[dict, str]:
     """Fetch .ottonate/config.yml and .ottonate/rules.md from a repo."""
     config_yml = await github.get_file_content(owner, repo, ".ottonate/config.yml", ref)
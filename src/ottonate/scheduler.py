@@ -8,36 +8,93 @@ from pathlib import Path
 
 import structlog
 
+from ottonate.ci_watch import CIWatcher
 from ottonate.config import OttonateConfig
-from ottonate.github import GitHubClient
+from ottonate.dispatch import (
+    IDEA_PR_PRIORITY,
+    DispatchQueue,
+    Pool,
+    WorkItem,
+    ticket_priority,
+)
+from ottonate.github import create_github_client
+from ottonate.github_budget import poll_cost
+from ottonate.leases import LeaseManager, create_lease_backend, default_worker_id
 from ottonate.models import ACTIONABLE_LABELS, IdeaPR, Label, Ticket
 from ottonate.pipeline import Pipeline
-from ottonate.rules import load_rules
+from ottonate.rules import ResolvedRules, RulesCache, load_rules
+from ottonate.state import StateStore
+from ottonate.workspaces import WorkspaceManager
 
 log = structlog.get_logger()
 
+# A worker keeps a ticket's lease between handler runs: retry counters, agent
+# sessions and the worktree live on the worker that has been handling it. The
+# lease is given up only when the ticket waits on a human before any work of its
+# own exists, is stuck, or has left the pipeline (closed or entry label removed).
+LEASE_RELEASE_LABELS = {
+    Label.IDEA_PENDING,
+    Label.IDEA_REVIEW,
+    Label.SPEC_REVIEW,
+    Label.BACKLOG_REVIEW,
+    Label.STUCK,
+}
+
 
 class Scheduler:
     def __init__(self, config: OttonateConfig):
         self.config = config
-        self.github = GitHubClient()
+        self.github = create_github_client(config)
         self._rate_limited_until: float = 0.0
+        self.state = StateStore(config.state_db_path)
+        self.workspaces = WorkspaceManager(config)
+        self.ci_watch = CIWatcher.from_config(config)
         self.pipeline = Pipeline(
             config,
             self.github,
             on_rate_limit=self._signal_rate_limit,
+            state=self.state,
+            workspaces=self.workspaces,
+            ci_watch=self.ci_watch,
+        )
+        self.dispatcher = DispatchQueue(
+            config.agent_concurrency_ceiling(), github_workers=config.max_concurrent_github_checks
         )
-        self._semaphore = asyncio.Semaphore(config.max_concurrent_tickets)
         self._running = True
         self._in_flight: set[str] = set()
+        self._pending: set[str] = set()
+        self._rules_cache = RulesCache(config.rules_cache_ttl_s)
+        self.leases = LeaseManager(
+            create_lease_backend(config),
+            config.worker_id or default_worker_id(),
+            config.lease_ttl_s,
+        )
 
-    async def start(self) -> None:
-        log.info("scheduler_started", max_concurrent=self.config.max_concurrent_tickets)
+    async def start(self, *, webhooks: bool = False) -> None:
+        """Run the scheduler.
+
+        With ``webhooks`` the webhook receiver drives dispatch and polling drops to a
+        reconciliation sweep every ``reconcile_interval_s`` to catch missed deliveries.
+        """
+        log.info(
+            "scheduler_started",
+            max_concurrent=self.config.max_concurrent_tickets,
+            max_github_checks=self.config.max_concurrent_github_checks,
+            webhooks=webhooks,
+            worker_id=self.leases.worker_id,
+        )
+        loops = [self._gc_loop(), self._lease_loop()]
+        if webhooks:
+            loops += [self._poll_loop(self.config.reconcile_interval_s), self._serve_webhooks()]
+        else:
+            loops.append(self._poll_loop())
         try:
-            await self._poll_loop()
+            await asyncio.gather(*loops)
         except asyncio.CancelledError:
             log.info("scheduler_cancelled")
         finally:
+            await self.dispatcher.close()
+            self.leases.release_all()
             log.info("scheduler_stopped")
 
     async def stop(self) -> None:
@@ -66,13 +123,70 @@ class Scheduler:
 
     # -- Main loop --
 
-    async def _poll_loop(self) -> None:
+    async def _poll_loop(self, interval_s: int | None = None) -> None:
+        base_s = interval_s or self.config.poll_interval_s
         while self._running:
+            before = self.github.budget.remaining()
             try:
                 await self._poll_and_dispatch()
             except Exception:
                 log.exception("poll_error")
-            await asyncio.sleep(self.config.poll_interval_s)
+            await asyncio.sleep(await self._next_poll_delay(base_s, before))
+
+    async def _next_poll_delay(self, base_s: float, before: dict[str, int]) -> float:
+        """Stretch the poll interval when the GitHub API budget would not last to reset."""
+        budget = self.github.budget
+        try:
+            await self.github.refresh_rate_limit()
+        except Exception:
+            log.warning("rate_limit_refresh_error")
+        cost = poll_cost(before, budget.remaining())
+        delay = budget.poll_interval(base_s, max(base_s, self.config.poll_interval_max_s), cost)
+        log.info(
+            "github_budget",
+            **{f"{name}_remaining": remaining for name, remaining in budget.remaining().items()},
+            poll_cost=cost,
+            next_poll_s=round(delay),
+        )
+        return delay
+
+    async def _gc_loop(self) -> None:
+        interval = self.config.workspace_gc_interval_s
+        if interval <= 0:
+            return
+        while self._running:
+            await asyncio.sleep(interval)
+            try:
+                protected = set(self._in_flight) | self.leases.held_elsewhere()
+                await self.workspaces.gc(self.github, protected=protected)
+            except Exception:
+                log.exception("workspace_gc_error")
+
+    async def _lease_loop(self) -> None:
+        """Heartbeat: renew this worker's leases well inside their TTL."""
+        while self._running:
+            await asyncio.sleep(max(1, self.config.lease_ttl_s // 3))
+            try:
+                self.leases.heartbeat()
+            except Exception:
+                log.exception("lease_heartbeat_error")
+
+    async def _serve_webhooks(self) -> None:
+        import uvicorn
+
+        from ottonate.webhooks import create_webhook_app
+
+        app = create_webhook_app(self, self.config.webhook_secret)
+        server = uvicorn.Server(
+            uvicorn.Config(
+                app,
+                host=self.config.webhook_host,
+                port=self.config.webhook_port,
+                log_level="warning",
+            )
+        )
+        log.info("webhooks_listening", host=self.config.webhook_host, port=self.config.webhook_port)
+        await server.serve()
 
     def _signal_rate_limit(self) -> None:
         self._rate_limited_until = time.monotonic() + self.config.rate_limit_cooldown_s
@@ -95,6 +209,9 @@ class Scheduler:
             log.exception("search_error")
             return
 
+        leased_elsewhere = self.leases.held_elsewhere()
+        dispatch: list[tuple[Ticket, bool]] = []
+        keep_leases: set[str] = set()
         for issue in issues:
             repo_data = issue.get("repository", {})
             repo_name = repo_data.get("name", "")
@@ -105,14 +222,15 @@ class Scheduler:
             if not number:
                 continue
 
-            flight_key = f"{org}/{repo_name}#{number}"
-            if flight_key in self._in_flight:
-                continue
-
             issue_labels = [
                 lbl.get("name", "") if isinstance(lbl, dict) else str(lbl)
                 for lbl in issue.get("labels", [])
             ]
+            flight_key = f"{org}/{repo_name}#{number}"
+            if not LEASE_RELEASE_LABELS & set(issue_labels):
+                keep_leases.add(flight_key)
+            if flight_key in self._in_flight or flight_key in leased_elsewhere:
+                continue
 
             ticket = Ticket(
                 owner=org,
@@ -124,33 +242,179 @@ class Scheduler:
             )
 
             stage = ticket.agent_label
-            is_eng_repo = repo_name == self.config.github_engineering_repo
-
             if stage is None:
-                if is_eng_repo:
-                    asyncio.create_task(self._handle_with_semaphore(ticket, new_ticket=True))
-                else:
-                    asyncio.create_task(self._handle_with_semaphore(ticket, new_ticket=True))
+                dispatch.append((ticket, True))
             elif stage in ACTIONABLE_LABELS:
-                asyncio.create_task(self._handle_with_semaphore(ticket))
+                dispatch.append((ticket, False))
+
+        self._release_idle_leases(keep_leases)
+
+        # PRs waiting on CI stay out of the poll until their next check is due, and are
+        # only dispatched once the snapshot shows CI has left pending.
+        in_pr_stage = {t.issue_ref for t, _ in dispatch if t.agent_label == Label.PR}
+        self.ci_watch.retain(in_pr_stage | self._in_flight | leased_elsewhere)
+        dispatch = [(t, new) for t, new in dispatch if self.ci_watch.due(t.issue_ref)]
+
+        await self._attach_snapshots(org, [ticket for ticket, _ in dispatch])
+        for ticket, new_ticket in dispatch:
+            if self.ci_watch.settled(ticket.issue_ref, ticket.snapshot):
+                self._spawn(ticket, new_ticket=new_ticket)
+        if self.ci_watch.waiting:
+            log.debug("ci_watch_pending_prs", tickets=self.ci_watch.waiting)
 
         await self._poll_idea_prs(org)
+        self._log_queue_stats()
+
+    def _release_idle_leases(self, keep: set[str]) -> None:
+        """Give up leases on tickets that left the pipeline or wait on a human gate."""
+        for key in self.leases.held - keep - self._in_flight:
+            if not key.startswith("idea:"):
+                self.leases.release(key)
+                log.debug("lease_released", key=key)
+
+    async def _attach_snapshots(self, org: str, tickets: list[Ticket]) -> None:
+        """Fetch issue/PR state for all dispatched tickets in batched GraphQL queries.
+
+        Handlers fall back to per-ticket calls when a snapshot is missing, so a
+        failed batch only costs the savings, not the poll.
+        """
+        if not tickets:
+            return
+        refs = [(t.repo, t.issue_number) for t in tickets]
+        try:
+            snapshots = await self.github.get_ticket_snapshots(
+                org, refs, batch_size=self.config.snapshot_batch_size
+            )
+        except Exception:
+            log.exception("snapshot_error")
+            return
+        for ticket in tickets:
+            ticket.snapshot = snapshots.get((ticket.repo, ticket.issue_number))
+        log.debug("snapshots_attached", requested=len(refs), fetched=len(snapshots))
+
+    def _log_queue_stats(self) -> None:
+        for pool, stats in self.dispatcher.stats().items():
+            log.info(
+                "dispatch_queue_stats",
+                pool=pool,
+                queued=stats.queued,
+                running=stats.running,
+                oldest_wait_s=stats.oldest_wait_s,
+                avg_wait_s=stats.avg_wait_s,
+            )
+
+    # -- Event-driven dispatch --
+
+    async def enqueue(self, owner: str, repo: str, number: int) -> int:
+        """Dispatch a single ticket now, e.g. from a webhook. Returns 1 if started.
+
+        If the ticket is already being handled it is re-enqueued once that run ends,
+        so events raised while a handler is working are not lost.
+        """
+        flight_key = f"{owner}/{repo}#{number}"
+        self.ci_watch.wake(flight_key)
+        if flight_key in self._in_flight:
+            self._pending.add(flight_key)
+            return 0
+
+        issue = await self.github.get_issue(owner, repo, number)
+        if not issue or (issue.get("state") or "OPEN").upper() != "OPEN":
+            return 0
+        labels = {
+            lbl.get("name", "") if isinstance(lbl, dict) else str(lbl)
+            for lbl in issue.get("labels", [])
+        }
+        if self.config.github_agent_label not in labels:
+            return 0
 
-    async def _handle_with_semaphore(self, ticket: Ticket, *, new_ticket: bool = False) -> None:
+        ticket = Ticket(
+            owner=owner,
+            repo=repo,
+            issue_number=number,
+            labels=labels,
+            summary=issue.get("title", ""),
+            work_dir=str(self._workspace_path(owner, repo, number)),
+        )
+        stage = ticket.agent_label
+        if stage is not None and stage not in ACTIONABLE_LABELS:
+            return 0
+        if flight_key in self._in_flight:
+            self._pending.add(flight_key)
+            return 0
+        return int(self._spawn(ticket, new_ticket=stage is None))
+
+    async def enqueue_idea_pr(self, owner: str, repo: str, number: int) -> int:
+        if not self.config.idea_poll_enabled:
+            return 0
+        pr = await self.github.get_pr_details(owner, repo, number)
+        if not pr or (pr.get("state") or "OPEN").upper() != "OPEN":
+            return 0
+        return int(await self._dispatch_idea_pr(owner, repo, pr))
+
+    def _spawn(self, ticket: Ticket, *, new_ticket: bool) -> bool:
+        # Another worker owns the ticket until its lease expires.
+        if not self.leases.acquire(ticket.issue_ref):
+            log.debug("ticket_leased_elsewhere", issue=ticket.issue_ref)
+            return False
+        # Claim the flight slot when queued so concurrent events can't double-dispatch.
+        self._in_flight.add(ticket.issue_ref)
+        priority, pool = ticket_priority(ticket, new_ticket=new_ticket)
+        cached = self._rules_cache.peek(ticket.owner, ticket.repo)
+        if cached is not None:
+            self._configure_flow(ticket.owner, ticket.repo, cached)
+        self.dispatcher.submit(
+            WorkItem(
+                key=ticket.issue_ref,
+                run=lambda: self._handle_ticket(ticket, new_ticket=new_ticket),
+                priority=priority,
+                pool=pool,
+                flow=f"{ticket.owner}/{ticket.repo}",
+            )
+        )
+        return True
+
+    def _configure_flow(self, owner: str, repo: str, rules: ResolvedRules) -> None:
+        self.dispatcher.configure_flow(
+            f"{owner}/{repo}", weight=rules.share_weight, max_running=rules.max_concurrent
+        )
+
+    async def _handle_ticket(self, ticket: Ticket, *, new_ticket: bool = False) -> None:
         flight_key = ticket.issue_ref
         self._in_flight.add(flight_key)
         try:
-            async with self._semaphore:
-                rules = await load_rules(ticket.owner, ticket.repo, self.config, self.github)
-                await self._ensure_workspace(ticket)
-                if new_ticket:
-                    await self.pipeline.handle_new(ticket, rules)
-                else:
-                    await self.pipeline.handle(ticket, rules)
+            rules = await load_rules(
+                ticket.owner, ticket.repo, self.config, self.github, cache=self._rules_cache
+            )
+            self._configure_flow(ticket.owner, ticket.repo, rules)
+            await self._ensure_workspace(ticket)
+            if new_ticket:
+                await self.pipeline.handle_new(ticket, rules)
+            else:
+                await self.pipeline.handle(ticket, rules)
         except Exception:
             log.exception("handle_error", issue=ticket.issue_ref)
         finally:
+            # The lease stays held (and heartbeated) so the next run of this ticket
+            # happens here; the poll releases it (see LEASE_RELEASE_LABELS).
             self._in_flight.discard(flight_key)
+            if flight_key in self._pending:
+                self._pending.discard(flight_key)
+                self._requeue(ticket)
+
+    def _requeue(self, ticket: Ticket) -> None:
+        """Queue a fresh ``enqueue`` of a ticket that got events while it was running.
+
+        It runs as a GitHub-pool item: it only re-reads the issue, whose stage the
+        run just changed, before dispatching the handler.
+        """
+        self.dispatcher.submit(
+            WorkItem(
+                key=f"requeue:{ticket.issue_ref}",
+                run=lambda: self.enqueue(ticket.owner, ticket.repo, ticket.issue_number),
+                priority=ticket_priority(ticket)[0],
+                pool=Pool.GITHUB,
+            )
+        )
 
     # -- Idea PR polling --
 
@@ -165,6 +429,18 @@ class Scheduler:
             log.exception("idea_pr_poll_error")
             return
 
+        for pr in prs:
+            await self._dispatch_idea_pr(org, repo, pr)
+
+    async def _dispatch_idea_pr(self, org: str, repo: str, pr: dict) -> bool:
+        pr_number = pr.get("number")
+        if not pr_number:
+            return False
+
+        flight_key = f"idea:{org}/{repo}#{pr_number}"
+        if flight_key in self._in_flight:
+            return False
+
         ideas_dir = self.config.ideas_dir
         idea_label_values = {
             Label.IDEA_TRIAGE.value,
@@ -172,102 +448,92 @@ class Scheduler:
             Label.IDEA_REFINING.value,
         }
 
-        for pr in prs:
-            pr_number = pr.get("number")
-            if not pr_number:
-                continue
+        pr_labels = {
+            lbl.get("name", "") if isinstance(lbl, dict) else str(lbl)
+            for lbl in pr.get("labels", [])
+        }
 
-            flight_key = f"idea:{org}/{repo}#{pr_number}"
-            if flight_key in self._in_flight:
-                continue
+        has_idea_label = bool(pr_labels & idea_label_values)
 
-            pr_labels = {
-                lbl.get("name", "") if isinstance(lbl, dict) else str(lbl)
-                for lbl in pr.get("labels", [])
-            }
+        # Skip in-progress (agent is already working)
+        if Label.IDEA_TRIAGE.value in pr_labels or Label.IDEA_REFINING.value in pr_labels:
+            return False
 
-            has_idea_label = bool(pr_labels & idea_label_values)
+        if not has_idea_label:
+            # Check if PR touches idea files
+            try:
+                pr_files = await self.github.get_pr_files(org, repo, pr_number)
+            except Exception:
+                log.warning("idea_pr_files_error", pr=pr_number)
+                return False
+            touches_ideas = any(
+                f.get("filename", "").startswith(f"{ideas_dir}/") for f in pr_files
+            )
+            if not touches_ideas:
+                return False
 
-            # Skip in-progress (agent is already working)
-            if Label.IDEA_TRIAGE.value in pr_labels or Label.IDEA_REFINING.value in pr_labels:
-                continue
+            project_name = _extract_project_name(pr_files, ideas_dir)
+        else:
+            # Has idea label, extract project name from PR files
+            try:
+                pr_files = await self.github.get_pr_files(org, repo, pr_number)
+            except Exception:
+                log.warning("idea_pr_files_error", pr=pr_number)
+                return False
+            project_name = _extract_project_name(pr_files, ideas_dir)
 
-            if not has_idea_label:
-                # Check if PR touches idea files
-                try:
-                    pr_files = await self.github.get_pr_files(org, repo, pr_number)
-                except Exception:
-                    log.warning("idea_pr_files_error", pr=pr_number)
-                    continue
-                touches_ideas = any(
-                    f.get("filename", "").startswith(f"{ideas_dir}/") for f in pr_files
-                )
-                if not touches_ideas:
-                    continue
-
-                project_name = _extract_project_name(pr_files, ideas_dir)
-            else:
-                # Has idea label, extract project name from PR files
-                try:
-                    pr_files = await self.github.get_pr_files(org, repo, pr_number)
-                except Exception:
-                    log.warning("idea_pr_files_error", pr=pr_number)
-                    continue
-                project_name = _extract_project_name(pr_files, ideas_dir)
-
-            if not project_name:
-                continue
+        if not project_name:
+            return False
 
-            idea_pr = IdeaPR(
-                owner=org,
-                repo=repo,
-                pr_number=pr_number,
-                branch=pr.get("headRefName", ""),
-                labels=pr_labels,
-                title=pr.get("title", ""),
-                project_name=project_name,
+        idea_pr = IdeaPR(
+            owner=org,
+            repo=repo,
+            pr_number=pr_number,
+            branch=pr.get("headRefName", ""),
+            labels=pr_labels,
+            title=pr.get("title", ""),
+            project_name=project_name,
+        )
+        if not self.leases.acquire(flight_key):
+            return False
+        self._in_flight.add(flight_key)
+        flow = f"idea:{org}/{repo}"
+        self.dispatcher.configure_flow(flow, weight=self.config.idea_share_weight)
+        self.dispatcher.submit(
+            WorkItem(
+                key=flight_key,
+                run=lambda: self._handle_idea(idea_pr),
+                priority=IDEA_PR_PRIORITY,
+                flow=flow,
             )
-            asyncio.create_task(self._handle_idea_with_semaphore(idea_pr))
+        )
+        return True
 
-    async def _handle_idea_with_semaphore(self, idea_pr: IdeaPR) -> None:
+    async def _handle_idea(self, idea_pr: IdeaPR) -> None:
         flight_key = f"idea:{idea_pr.pr_ref}"
         self._in_flight.add(flight_key)
         try:
-            async with self._semaphore:
-                rules = await load_rules(
-                    idea_pr.owner, idea_pr.repo, self.config, self.github
-                )
-                await self.pipeline.handle_idea_pr(idea_pr, rules)
+            rules = await load_rules(
+                idea_pr.owner,
+                idea_pr.repo,
+                self.config,
+                self.github,
+                cache=self._rules_cache,
+            )
+            await self.pipeline.handle_idea_pr(idea_pr, rules)
         except Exception:
             log.exception("idea_handle_error", pr=idea_pr.pr_ref)
         finally:
             self._in_flight.discard(flight_key)
+            self.leases.release(flight_key)
 
     # -- Workspace --
 
     def _workspace_path(self, owner: str, repo: str, issue_number: int) -> Path:
-        return self.config.resolved_workspace_dir() / f"{owner}_{repo}_{issue_number}"
+        return self.workspaces.ticket_path(owner, repo, issue_number)
 
     async def _ensure_workspace(self, ticket: Ticket) -> None:
-        path = Path(ticket.work_dir)
-        if path.exists():
-            return
-        path.parent.mkdir(parents=True, exist_ok=True)
-
-        proc = await asyncio.create_subprocess_exec(
-            "gh",
-            "repo",
-            "clone",
-            ticket.full_repo,
-            str(path),
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        _, stderr = await proc.communicate()
-        if proc.returncode != 0:
-            log.error("clone_failed", repo=ticket.full_repo, stderr=stderr.decode())
-            raise RuntimeError(f"Failed to clone {ticket.full_repo}")
-        log.info("workspace_created", repo=ticket.full_repo, path=ticket.work_dir)
+        await self.workspaces.ensure(ticket.owner, ticket.repo, Path(ticket.work_dir))
 
 
 def _extract_project_name(pr_files: list[dict], ideas_dir: str) -> str:
@@ -98,7 +98,10 @@ async def create_repo(owner: str, repo: str) -> bool:
 
 
 async def ensure_labels(github: GitHubClient, owner: str, repo: str, entry_label: str) -> int:
-    """Ensure all pipeline labels exist in the repo. Returns count of labels created."""
+    """Ensure all pipeline labels exist in the repo. Returns count of labels created.
+
+    Raises RuntimeError if any missing label could not be created.
+    """
     all_labels = dict(PIPELINE_LABEL_COLORS)
     all_labels[entry_label] = "6f42c1"
     created = await github.ensure_labels(owner, repo, all_labels)
@@ -0,0 +1,228 @@
+"""Restart-safe pipeline state: ticket context, retry counters and stage history.
+
+Handlers used to rebuild context (PR numbers, the plan, spec/backlog PRs) by
+re-reading issue comments on every tick, and retry budgets reset whenever the
+process restarted. The store keeps both in a local SQLite database.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from ottonate.models import Ticket
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    issue_ref TEXT PRIMARY KEY,
+    pr_number INTEGER,
+    plan TEXT,
+    spec_pr_number INTEGER,
+    backlog_pr_number INTEGER,
+    project_id TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS attempts (
+    issue_ref TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (issue_ref, stage)
+);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    issue_ref TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    event TEXT NOT NULL,
+    detail TEXT NOT NULL DEFAULT '',
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_issue ON history (issue_ref, id);
+CREATE TABLE IF NOT EXISTS sessions (
+    issue_ref TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (issue_ref, stage)
+);
+CREATE TABLE IF NOT EXISTS stories (
+    parent_ref TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    story_ref TEXT NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (parent_ref, idx)
+);
+CREATE TABLE IF NOT EXISTS label_sync (
+    repo TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+"""
+
+CONTEXT_FIELDS = ("pr_number", "plan", "spec_pr_number", "backlog_pr_number", "project_id")
+
+
+class StateStore:
+    """SQLite-backed per-ticket state. Use ``":memory:"`` for a throwaway store."""
+
+    def __init__(self, path: str | Path = ":memory:") -> None:
+        if str(path) != ":memory:":
+            path = Path(path).expanduser()
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(_SCHEMA)
+
+    # -- Ticket context --
+
+    def load_context(self, ticket: Ticket) -> None:
+        """Fill unset context fields on ``ticket`` from the stored row."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM tickets WHERE issue_ref = ?", (ticket.issue_ref,)
+            ).fetchone()
+        if row is None:
+            return
+        for name in CONTEXT_FIELDS:
+            if getattr(ticket, name) is None and row[name] is not None:
+                setattr(ticket, name, row[name])
+
+    def save_context(self, ticket: Ticket) -> None:
+        """Persist the ticket's context fields, keeping stored values for unset ones."""
+        values = {name: getattr(ticket, name) for name in CONTEXT_FIELDS}
+        if all(v is None for v in values.values()):
+            return
+        columns = ", ".join(CONTEXT_FIELDS)
+        placeholders = ", ".join("?" for _ in CONTEXT_FIELDS)
+        updates = ", ".join(
+            f"{name} = COALESCE(excluded.{name}, tickets.{name})" for name in CONTEXT_FIELDS
+        )
+        with self._lock:
+            self._db.execute(
+                f"INSERT INTO tickets (issue_ref, {columns}, updated_at) "
+                f"VALUES (?, {placeholders}, ?) "
+                f"ON CONFLICT(issue_ref) DO UPDATE SET {updates}, updated_at = excluded.updated_at",
+                (ticket.issue_ref, *values.values(), time.time()),
+            )
+            self._db.commit()
+
+    def clear_context(self, issue_ref: str, *names: str) -> None:
+        """Forget stored context fields (``save_context`` never overwrites with None)."""
+        unknown = set(names) - set(CONTEXT_FIELDS)
+        if unknown:
+            raise ValueError(f"Not ticket context fields: {sorted(unknown)}")
+        if not names:
+            return
+        updates = ", ".join(f"{name} = NULL" for name in names)
+        with self._lock:
+            self._db.execute(
+                f"UPDATE tickets SET {updates}, updated_at = ? WHERE issue_ref = ?",
+                (time.time(), issue_ref),
+            )
+            self._db.commit()
+
+    # -- Retry counters --
+
+    def increment_attempt(self, issue_ref: str, stage: str) -> int:
+        with self._lock:
+            row = self._db.execute(
+                "INSERT INTO attempts (issue_ref, stage, count) VALUES (?, ?, 1) "
+                "ON CONFLICT(issue_ref, stage) DO UPDATE SET count = count + 1 "
+                "RETURNING count",
+                (issue_ref, stage),
+            ).fetchone()
+            self._db.commit()
+        return row[0]
+
+    def attempts(self, issue_ref: str) -> dict[str, int]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT stage, count FROM attempts WHERE issue_ref = ?", (issue_ref,)
+            ).fetchall()
+        return {row["stage"]: row["count"] for row in rows}
+
+    # -- Stage history --
+
+    def record(self, issue_ref: str, stage: str, event: str, detail: str = "") -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO history (issue_ref, stage, event, detail, at) VALUES (?, ?, ?, ?, ?)",
+                (issue_ref, stage, event, detail, time.time()),
+            )
+            self._db.commit()
+
+    def history(self, issue_ref: str) -> list[dict]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT stage, event, detail, at FROM history WHERE issue_ref = ? ORDER BY id",
+                (issue_ref,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    # -- Agent sessions --
+
+    def save_session(self, issue_ref: str, stage: str, session_id: str) -> None:
+        """Remember the latest agent session for a ticket's stage, for resuming on retry."""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO sessions (issue_ref, stage, session_id, updated_at) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(issue_ref, stage) DO UPDATE SET session_id = excluded.session_id, "
+                "updated_at = excluded.updated_at",
+                (issue_ref, stage, session_id, time.time()),
+            )
+            self._db.commit()
+
+    def session(self, issue_ref: str, stage: str) -> str | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT session_id FROM sessions WHERE issue_ref = ? AND stage = ?",
+                (issue_ref, stage),
+            ).fetchone()
+        return row["session_id"] if row else None
+
+    # -- Backlog stories --
+
+    def record_story(self, parent_ref: str, index: int, story_ref: str, title: str = "") -> None:
+        """Remember that backlog entry ``index`` of ``parent_ref`` was filed as ``story_ref``."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO stories (parent_ref, idx, story_ref, title) "
+                "VALUES (?, ?, ?, ?)",
+                (parent_ref, index, story_ref, title),
+            )
+            self._db.commit()
+
+    def created_stories(self, parent_ref: str) -> dict[int, tuple[str, str]]:
+        """Backlog index -> ``(story_ref, title)`` for stories already filed."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT idx, story_ref, title FROM stories WHERE parent_ref = ?", (parent_ref,)
+            ).fetchall()
+        return {row["idx"]: (row["story_ref"], row["title"]) for row in rows}
+
+    # -- Label sync cache --
+
+    def labels_synced(self, repo: str, version: str) -> bool:
+        """Whether ``repo`` (owner/name) had its labels verified at label schema ``version``."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT version FROM label_sync WHERE repo = ?", (repo,)
+            ).fetchone()
+        return row is not None and row["version"] == version
+
+    def mark_labels_synced(self, repo: str, version: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO label_sync (repo, version, synced_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(repo) DO UPDATE SET version = excluded.version, "
+                "synced_at = excluded.synced_at",
+                (repo, version, time.time()),
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
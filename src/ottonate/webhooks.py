@@ -0,0 +1,147 @@
+"""GitHub webhook receiver for event-driven scheduling.
+
+Maps issue, pull_request, check_suite and pull_request_review deliveries to the
+tickets they affect and hands those to the scheduler, so a label swap or a green
+CI run is acted on immediately instead of at the next poll.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING
+
+import structlog
+from fastapi import FastAPI, HTTPException, Request
+
+if TYPE_CHECKING:
+    from ottonate.scheduler import Scheduler
+
+log = structlog.get_logger()
+
+ISSUE_ACTIONS = {"opened", "reopened", "edited", "labeled", "unlabeled"}
+PR_ACTIONS = {"opened", "reopened", "closed", "synchronize", "labeled", "unlabeled", "edited"}
+
+_BRANCH_ISSUE = re.compile(r"^(\d+)(?:[/_-]|$)")
+_CLOSING_REF = re.compile(r"\b(?:close[sd]?|fix(?:e[sd])?|resolve[sd]?)\s+#(\d+)", re.IGNORECASE)
+
+
+@dataclass
+class WebhookEvent:
+    """Tickets and idea PRs touched by a single delivery."""
+
+    tickets: list[tuple[str, str, int]] = field(default_factory=list)
+    idea_prs: list[tuple[str, str, int]] = field(default_factory=list)
+
+
+def verify_signature(secret: str, body: bytes, signature: str) -> bool:
+    """Check an ``X-Hub-Signature-256`` header against the raw request body."""
+    if not secret or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature.removeprefix("sha256="))
+
+
+def sign(secret: str, body: bytes) -> str:
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def parse_event(event: str, payload: dict, engineering_repo: str = "") -> WebhookEvent:
+    """Translate a webhook delivery into the tickets it affects."""
+    result = WebhookEvent()
+    repo_data = payload.get("repository") or {}
+    repo = repo_data.get("name", "")
+    owner = (repo_data.get("owner") or {}).get("login", "")
+    if not owner or not repo:
+        return result
+
+    action = payload.get("action", "")
+
+    if event == "issues" and action in ISSUE_ACTIONS:
+        issue = payload.get("issue") or {}
+        if issue.get("number") and "pull_request" not in issue:
+            result.tickets.append((owner, repo, issue["number"]))
+
+    elif event in ("pull_request", "pull_request_review"):
+        if event == "pull_request" and action not in PR_ACTIONS:
+            return result
+        pr = payload.get("pull_request") or {}
+        if repo == engineering_repo and pr.get("number"):
+            result.idea_prs.append((owner, repo, pr["number"]))
+        for number in _issues_for_pr(pr):
+            result.tickets.append((owner, repo, number))
+
+    elif event == "check_suite" and action == "completed":
+        for pr in (payload.get("check_suite") or {}).get("pull_requests", []):
+            for number in _issues_for_pr(pr):
+                result.tickets.append((owner, repo, number))
+
+    result.tickets = list(dict.fromkeys(result.tickets))
+    return result
+
+
+def _issues_for_pr(pr: dict) -> list[int]:
+    """Issue numbers a PR belongs to, from its branch name or closing keywords."""
+    numbers: list[int] = []
+    head_ref = (pr.get("head") or {}).get("ref", "")
+    match = _BRANCH_ISSUE.match(head_ref)
+    if match:
+        numbers.append(int(match.group(1)))
+    for ref in _CLOSING_REF.findall(pr.get("body") or ""):
+        if int(ref) not in numbers:
+            numbers.append(int(ref))
+    return numbers
+
+
+def create_webhook_app(scheduler: Scheduler, secret: str) -> FastAPI:
+    app = FastAPI(title="Ottonate Webhooks")
+
+    @app.get("/healthz")
+    async def healthz() -> dict:
+        return {"ok": True}
+
+    @app.get("/budget")
+    async def budget() -> dict:
+        return scheduler.github.budget.snapshot()
+
+    @app.get("/queue")
+    async def queue() -> dict:
+        dispatcher = scheduler.dispatcher
+        return {
+            "pools": {pool: asdict(stats) for pool, stats in dispatcher.stats().items()},
+            "flows": {flow: asdict(stats) for flow, stats in dispatcher.flow_stats().items()},
+        }
+
+    @app.post("/webhook", status_code=202)
+    async def receive(request: Request) -> dict:
+        body = await request.body()
+        if not verify_signature(secret, body, request.headers.get("x-hub-signature-256", "")):
+            raise HTTPException(status_code=401, detail="Invalid signature")
+
+        event = request.headers.get("x-github-event", "")
+        if event == "ping":
+            return {"queued": 0}
+        try:
+            payload = json.loads(body)
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Invalid JSON") from None
+
+        parsed = parse_event(event, payload, scheduler.config.github_engineering_repo)
+        queued = 0
+        for owner, repo, number in parsed.tickets:
+            queued += await scheduler.enqueue(owner, repo, number)
+        for owner, repo, number in parsed.idea_prs:
+            queued += await scheduler.enqueue_idea_pr(owner, repo, number)
+        log.info(
+            "webhook_received",
+            github_event=event,
+            action=payload.get("action"),
+            delivery=request.headers.get("x-github-delivery", ""),
+            queued=queued,
+        )
+        return {"queued": queued}
+
+    return app
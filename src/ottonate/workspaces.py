@@ -0,0 +1,272 @@
+"""Ticket workspaces as git worktrees over a shared per-repo bare mirror.
+
+Each repo is cloned once into ``{workspace_dir}/.mirrors/{owner}/{repo}.git`` and
+fetched incrementally; ticket and idea workspaces are ``git worktree`` checkouts
+of it, so creating one costs a fetch and a checkout instead of a full clone and
+the object store exists once per repo.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import structlog
+
+from ottonate.config import OttonateConfig
+
+if TYPE_CHECKING:
+    from ottonate.github import GitHubClient
+
+log = structlog.get_logger()
+
+MIRRORS_DIR = ".mirrors"
+
+# GitHub owners are alphanumeric + hyphen, so the first underscore ends the owner.
+_WORKSPACE_NAME = re.compile(r"^(idea_)?([A-Za-z0-9-]+)_(.+)_(\d+)$")
+
+
+@dataclass
+class Workspace:
+    path: Path
+    owner: str
+    repo: str
+    number: int
+    is_idea: bool
+    size_bytes: int = 0
+    last_used: float = 0.0
+
+    @property
+    def ref(self) -> str:
+        return f"{self.owner}/{self.repo}#{self.number}"
+
+
+@dataclass
+class GCReport:
+    removed: list[tuple[Path, str, int]] = field(default_factory=list)
+    kept_bytes: int = 0
+    mirror_bytes: int = 0
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        return sum(size for _, _, size in self.removed)
+
+
+class WorkspaceManager:
+    def __init__(self, config: OttonateConfig) -> None:
+        self.root = config.resolved_workspace_dir()
+        self._agent_label = config.github_agent_label
+        self.use_worktrees = config.workspace_worktrees
+        self.quota_bytes = int(config.workspace_quota_gb * 1024**3)
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def ticket_path(self, owner: str, repo: str, issue_number: int) -> Path:
+        return self.root / f"{owner}_{repo}_{issue_number}"
+
+    def idea_path(self, owner: str, repo: str, pr_number: int) -> Path:
+        return self.root / f"idea_{owner}_{repo}_{pr_number}"
+
+    def mirror_path(self, owner: str, repo: str) -> Path:
+        return self.root / MIRRORS_DIR / owner / f"{repo}.git"
+
+    async def ensure(self, owner: str, repo: str, path: Path) -> bool:
+        """Create the workspace at ``path`` if missing. Returns True if it was created."""
+        if path.exists():
+            # Mark as recently used so quota eviction (see gc) is LRU by dispatch.
+            os.utime(path)
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        full_repo = f"{owner}/{repo}"
+        if not self.use_worktrees:
+            await _run("gh", "repo", "clone", full_repo, str(path))
+            log.info("workspace_created", repo=full_repo, path=str(path))
+            return True
+
+        async with self._lock(full_repo):
+            mirror = await self._sync_mirror(owner, repo)
+            await _run("git", "-C", str(mirror), "worktree", "prune")
+            await _run(
+                "git",
+                "-C",
+                str(mirror),
+                "worktree",
+                "add",
+                "--detach",
+                str(path),
+                "refs/remotes/origin/HEAD",
+            )
+        log.info("workspace_created", repo=full_repo, path=str(path), mirror=str(mirror))
+        return True
+
+    async def remove(self, path: Path) -> None:
+        """Delete a workspace, unregistering it from its mirror if it is a worktree."""
+        git_file = path / ".git"
+        if git_file.is_file():
+            # Worktrees have a .git file pointing at <mirror>/worktrees/<name>.
+            gitdir = Path(git_file.read_text().split(":", 1)[-1].strip())
+            mirror = gitdir.parent.parent
+            try:
+                await _run("git", "-C", str(mirror), "worktree", "remove", "--force", str(path))
+                return
+            except RuntimeError:
+                log.warning("worktree_remove_failed", path=str(path))
+        await asyncio.to_thread(shutil.rmtree, path, ignore_errors=True)
+
+    def list_workspaces(self) -> list[Workspace]:
+        """Ticket and idea workspaces under the root, with size and last-use time."""
+        if not self.root.exists():
+            return []
+        workspaces: list[Workspace] = []
+        for entry in sorted(self.root.iterdir()):
+            match = _WORKSPACE_NAME.match(entry.name)
+            if not entry.is_dir() or not match:
+                continue
+            workspaces.append(
+                Workspace(
+                    path=entry,
+                    owner=match.group(2),
+                    repo=match.group(3),
+                    number=int(match.group(4)),
+                    is_idea=bool(match.group(1)),
+                    size_bytes=_dir_size(entry),
+                    last_used=entry.stat().st_mtime,
+                )
+            )
+        return workspaces
+
+    async def gc(
+        self,
+        github: GitHubClient,
+        *,
+        dry_run: bool = False,
+        protected: set[str] | frozenset[str] = frozenset(),
+    ) -> GCReport:
+        """Reclaim workspaces of finished tickets, then enforce the disk quota.
+
+        A ticket is finished when its issue is closed or no longer carries the
+        agent label; an idea workspace when its PR is no longer open. Workspaces
+        whose ref is in ``protected`` (in-flight or leased tickets) are never
+        removed. When the total (mirrors included) still exceeds
+        ``workspace_quota_gb``, the least recently used workspaces are evicted;
+        they are recreated on demand from the default branch, so a workspace with
+        an open PR (its checkout is the PR branch) is never evicted.
+        """
+        report = GCReport()
+        workspaces = await asyncio.to_thread(self.list_workspaces)
+        report.mirror_bytes = await asyncio.to_thread(_dir_size, self.root / MIRRORS_DIR)
+        finished, open_prs = await self._ticket_states(github, workspaces)
+
+        remaining: list[Workspace] = []
+        for ws in workspaces:
+            if ws.ref in finished and ws.ref not in protected:
+                report.removed.append((ws.path, finished[ws.ref], ws.size_bytes))
+            else:
+                remaining.append(ws)
+
+        total = report.mirror_bytes + sum(ws.size_bytes for ws in remaining)
+        if self.quota_bytes:
+            for ws in sorted(remaining, key=lambda w: w.last_used):
+                if total <= self.quota_bytes:
+                    break
+                if ws.ref in protected or ws.ref in open_prs:
+                    continue
+                report.removed.append((ws.path, "quota", ws.size_bytes))
+                remaining.remove(ws)
+                total -= ws.size_bytes
+        report.kept_bytes = total
+
+        if not dry_run:
+            for path, reason, _ in report.removed:
+                await self.remove(path)
+                log.info("workspace_reclaimed", path=str(path), reason=reason)
+        log.info(
+            "workspace_gc_done",
+            dry_run=dry_run,
+            removed=len(report.removed),
+            reclaimed_bytes=report.reclaimed_bytes,
+            kept_bytes=report.kept_bytes,
+        )
+        return report
+
+    async def _ticket_states(
+        self, github: GitHubClient, workspaces: list[Workspace]
+    ) -> tuple[dict[str, str], set[str]]:
+        """Finished refs (with the reason), and the refs whose PR is still open."""
+        finished: dict[str, str] = {}
+        open_prs: set[str] = set()
+        by_owner: dict[str, list[tuple[str, int]]] = {}
+        for ws in workspaces:
+            if ws.is_idea:
+                state = await github.get_pr_state(ws.owner, ws.repo, ws.number)
+                if state in ("MERGED", "CLOSED"):
+                    finished[ws.ref] = f"idea PR {state.lower()}"
+                elif state == "OPEN":
+                    open_prs.add(ws.ref)
+            else:
+                by_owner.setdefault(ws.owner, []).append((ws.repo, ws.number))
+
+        for owner, refs in by_owner.items():
+            snapshots = await github.get_ticket_snapshots(owner, refs)
+            for (repo, number), snapshot in snapshots.items():
+                ref = f"{owner}/{repo}#{number}"
+                if snapshot.state == "CLOSED":
+                    finished[ref] = "issue closed"
+                elif self._agent_label not in snapshot.labels:
+                    finished[ref] = "pipeline complete"
+                elif snapshot.pr_state == "OPEN":
+                    open_prs.add(ref)
+        return finished, open_prs
+
+    def _lock(self, full_repo: str) -> asyncio.Lock:
+        return self._locks.setdefault(full_repo, asyncio.Lock())
+
+    async def _sync_mirror(self, owner: str, repo: str) -> Path:
+        mirror = self.mirror_path(owner, repo)
+        if not mirror.exists():
+            mirror.parent.mkdir(parents=True, exist_ok=True)
+            await self._clone_bare(f"{owner}/{repo}", mirror)
+            # A bare clone copies branches as local heads and never updates them;
+            # track the remote instead so worktrees always start from fresh refs.
+            git = ("git", "-C", str(mirror))
+            await _run(*git, "config", "remote.origin.fetch", "+refs/heads/*:refs/remotes/origin/*")
+            heads = await _run(*git, "for-each-ref", "--format=%(refname)", "refs/heads/")
+            await _run(*git, "fetch", "--prune", "origin")
+            await _run(*git, "remote", "set-head", "origin", "--auto")
+            for ref in heads.split():
+                await _run(*git, "update-ref", "-d", ref)
+            log.info("mirror_created", repo=f"{owner}/{repo}", path=str(mirror))
+        else:
+            await _run("git", "-C", str(mirror), "fetch", "--prune", "origin")
+        return mirror
+
+    async def _clone_bare(self, full_repo: str, dest: Path) -> None:
+        await _run("gh", "repo", "clone", full_repo, str(dest), "--", "--bare")
+
+
+async def _run(*cmd: str) -> str:
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        log.error("workspace_command_failed", cmd=cmd, stderr=stderr.decode())
+        raise RuntimeError(f"workspace command failed: {' '.join(cmd)}")
+    return stdout.decode()
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                continue
+    return total
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+from pathlib import Path
 from unittest.mock import AsyncMock
 
 import pytest
 
 from ottonate.config import OttonateConfig
 from ottonate.github import GitHubClient
+from ottonate.github_budget import RateBudget
 from ottonate.models import Ticket
 from ottonate.rules import ResolvedRules
 
@@ -22,6 +24,7 @@ def config() -> OttonateConfig:
         max_implement_retries=2,
         max_ci_fix_retries=3,
         max_review_retries=5,
+        state_db_path=Path(":memory:"),
     )
 
 
@@ -44,6 +47,7 @@ def mock_github() -> AsyncMock:
     gh.swap_pr_label = AsyncMock()
     gh.edit_issue_body = AsyncMock()
     gh.list_open_prs = AsyncMock(return_value=[])
+    gh.budget = RateBudget()
     return gh
 
 
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from ottonate.budget import Section, Trim, estimate_tokens, fit_context
+
+
+def _diff(*files: tuple[str, int]) -> str:
+    return "".join(
+        f"diff --git a/{name} b/{name}\n+++ b/{name}\n" + "+x\n" * lines for name, lines in files
+    )
+
+
+class TestFitContext:
+    def test_under_budget_untouched(self):
+        fitted, report = fit_context("planning", [Section("a", "short")], 100)
+        assert fitted == {"a": "short"}
+        assert report.trimmed == {}
+
+    def test_zero_limit_is_unlimited(self):
+        fitted, report = fit_context("planning", [Section("a", "x" * 10_000)], 0)
+        assert fitted["a"] == "x" * 10_000
+        assert report.trimmed == {}
+
+    def test_lowest_priority_cut_first(self):
+        sections = [
+            Section("description", "d" * 400, priority=0),
+            Section("rules", "r\n" * 400, priority=2),
+        ]
+        fitted, report = fit_context("planning", sections, 200)
+        assert fitted["description"] == "d" * 400
+        assert "chars omitted" in fitted["rules"]
+        assert list(report.trimmed) == ["rules"]
+        assert report.tokens <= 200 + estimate_tokens("[... 9999 chars omitted ...]\n")
+
+    def test_cuts_more_valuable_section_only_when_needed(self):
+        sections = [Section("plan", "p" * 800, priority=0), Section("rules", "r" * 800)]
+        fitted, report = fit_context("implementing", sections, 100)
+        assert fitted["rules"].startswith("[800 chars omitted")
+        assert set(report.trimmed) == {"plan", "rules"}
+
+    def test_deterministic(self):
+        sections = [Section("a", "a\n" * 500), Section("b", "b\n" * 500)]
+        assert fit_context("s", sections, 300) == fit_context("s", sections, 300)
+
+
+class TestTrimStrategies:
+    def test_tail_keeps_latest_items(self):
+        comments = [f"comment {i}" for i in range(50)]
+        fitted, _ = fit_context("retro", [Section("c", comments, trim=Trim.TAIL)], 40)
+        kept = fitted["c"]
+        assert kept[0].startswith("[")
+        assert "more omitted" in kept[0]
+        assert kept[-1] == "comment 49"
+        assert "comment 0" not in kept
+
+    def test_diff_keeps_whole_files_and_names_the_rest(self):
+        diff = _diff(("a.py", 10), ("b.py", 200), ("c.py", 5))
+        fitted, report = fit_context("self_review", [Section("diff", diff, trim=Trim.DIFF)], 60)
+        assert "diff --git a/a.py" in fitted["diff"]
+        assert "diff --git a/b.py" not in fitted["diff"]
+        assert "omitted to fit the prompt budget: b.py, c.py" in fitted["diff"]
+        assert report.trimmed["diff"] > 0
+
+    def test_diff_too_large_for_one_file_falls_back_to_head(self):
+        diff = _diff(("big.py", 500))
+        fitted, _ = fit_context("self_review", [Section("diff", diff, trim=Trim.DIFF)], 50)
+        assert fitted["diff"].startswith("diff --git a/big.py")
+        assert "chars omitted" in fitted["diff"]
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+
+from ottonate.ci_watch import CIWatcher
+from ottonate.models import CIStatus, TicketSnapshot
+
+REF = "testorg/test-repo#42"
+
+
+@pytest.fixture
+def clock():
+    now = [1000.0]
+    with patch("ottonate.ci_watch.time.monotonic", side_effect=lambda: now[0]):
+        yield now
+
+
+class TestCIWatcher:
+    def test_unwatched_ticket_is_due(self):
+        assert CIWatcher().due(REF)
+
+    def test_watched_ticket_waits_until_next_check(self, clock):
+        watch = CIWatcher(initial_delay_s=60)
+        watch.watch(REF, "abc")
+        assert not watch.due(REF)
+        clock[0] += 60
+        assert watch.due(REF)
+
+    def test_backoff_doubles_per_sha_and_caps(self, clock):
+        watch = CIWatcher(initial_delay_s=60, max_delay_s=200)
+        watch.watch(REF, "abc")
+        watch.watch(REF, "abc")
+        clock[0] += 119
+        assert not watch.due(REF)
+        clock[0] += 1
+        assert watch.due(REF)
+        watch.watch(REF, "abc")
+        clock[0] += 200
+        assert watch.due(REF)
+
+    def test_new_sha_resets_backoff(self, clock):
+        watch = CIWatcher(initial_delay_s=60)
+        watch.watch(REF, "abc")
+        watch.watch(REF, "abc")
+        watch.watch(REF, "def")
+        clock[0] += 60
+        assert watch.due(REF)
+
+    def test_wake_makes_ticket_due(self):
+        watch = CIWatcher()
+        watch.watch(REF, "abc")
+        watch.wake(REF)
+        assert watch.due(REF)
+        assert not watch.watching(REF)
+
+    def test_settled_backs_off_while_pending_on_same_sha(self, clock):
+        watch = CIWatcher(initial_delay_s=60)
+        watch.watch(REF, "abc")
+        clock[0] += 60
+        pending = TicketSnapshot(pr_head_sha="abc", ci_status=CIStatus.PENDING)
+        assert not watch.settled(REF, pending)
+        clock[0] += 60
+        assert not watch.due(REF)
+
+    def test_settled_when_ci_done_or_head_moved(self):
+        watch = CIWatcher()
+        watch.watch(REF, "abc")
+        assert watch.settled(REF, TicketSnapshot(pr_head_sha="abc", ci_status=CIStatus.FAILED))
+        moved = TicketSnapshot(pr_head_sha="def", ci_status=CIStatus.PENDING)
+        assert watch.settled(REF, moved)
+        assert watch.settled(REF, None)
+
+    def test_retain_forgets_tickets_that_left_the_stage(self):
+        watch = CIWatcher()
+        watch.watch(REF, "abc")
+        watch.watch("testorg/test-repo#43", "abc")
+        watch.retain({REF})
+        assert watch.watching(REF)
+        assert not watch.watching("testorg/test-repo#43")
+        assert watch.waiting == 1
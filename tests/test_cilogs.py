@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from ottonate.cilogs import FailedCheck, LogScanner, error_windows, failure_report
+
+_SETUP = "".join(f"Installing package-{i}\n" for i in range(200))
+
+_PYTEST_LOG = (
+    _SETUP
+    + "tests/test_x.py::test_add FAILED\n"
+    + "    def test_add():\n"
+    + ">       assert add(1, 2) == 4\n"
+    + "E       assert 3 == 4\n"
+    + "E        +  where 3 = add(1, 2)\n"
+    + "\n"
+    + "tests/test_x.py:3: AssertionError\n"
+    + "".join(f"cleanup {i}\n" for i in range(20))
+)
+
+
+class TestErrorWindows:
+    def test_skips_setup_and_keeps_error_with_context(self):
+        windows = error_windows(_PYTEST_LOG)
+        text = "\n".join(windows)
+        assert "Installing package-0" not in text
+        assert "Installing package-199" in text  # context before
+        assert "E       assert 3 == 4" in text
+        assert "tests/test_x.py:3: AssertionError" in text
+        assert "cleanup 19" not in text
+
+    def test_python_traceback_kept_whole(self):
+        log = (
+            _SETUP
+            + "Traceback (most recent call last):\n"
+            + "".join(f'  File "m{i}.py", line {i}, in f\n    f()\n' for i in range(10))
+            + "ValueError: bad value\n"
+            + "done\n" * 20
+        )
+        (window,) = error_windows(log)
+        assert window.count('File "m') == 10
+        assert "ValueError: bad value" in window
+
+    def test_compiler_errors(self):
+        log = _SETUP + "src/main.rs:3:5: error[E0308]: mismatched types\n" + _SETUP
+        log += "src/app.ts(4,1): error TS2322: Type 'string' is not assignable\n"
+        windows = error_windows(log)
+        assert len(windows) == 2
+        assert "E0308" in windows[0]
+        assert "TS2322" in windows[1]
+
+    def test_strips_gh_prefix_timestamps_and_ansi(self):
+        log = "build\tRun tests\t2024-05-01T12:00:00.1234567Z \x1b[31mError: boom\x1b[0m\n"
+        assert error_windows(log) == ["Error: boom"]
+
+    def test_no_match_falls_back_to_tail(self):
+        (window,) = error_windows(_SETUP)
+        assert window.splitlines()[-1] == "Installing package-199"
+        assert "Installing package-0\n" not in window
+
+    def test_window_cap(self):
+        log = "".join(f"ok\nok\nok\nok\nok\nok\nok\nok\nError: e{i}\n" for i in range(5))
+        windows = error_windows(log, max_windows=2)
+        assert len(windows) == 3
+        assert windows[-1] == "[3 more error window(s) omitted]"
+
+    def test_feed_in_chunks_matches_whole(self):
+        scanner = LogScanner()
+        for i in range(0, len(_PYTEST_LOG), 7):
+            scanner.feed(_PYTEST_LOG[i : i + 7])
+        assert scanner.finish() == error_windows(_PYTEST_LOG)
+
+
+class TestFailureReport:
+    def test_sections_per_check(self):
+        report = failure_report(
+            [FailedCheck("test", log=_PYTEST_LOG), FailedCheck("lint", details_url="http://x")],
+            0,
+        )
+        assert report.startswith("## Failed check: test\n")
+        assert "## Failed check: lint\nDetails: http://x" in report
+
+    def test_budget_drops_later_checks_first(self):
+        first = FailedCheck("first", log="Error: " + "a" * 400)
+        second = FailedCheck("second", log="Error: " + "b" * 400)
+        report = failure_report([first, second], 150)
+        assert "a" * 400 in report
+        assert "b" * 400 not in report
+        assert "omitted to fit the prompt budget" in report
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from ottonate.completion import all_of, on_json, on_sentinel
+from ottonate.jsonscan import Schema
+
+
+class TestCompletionChecks:
+    def test_on_sentinel(self):
+        check = on_sentinel("[CI_FIX_BLOCKED]", "[DONE]")
+        assert check("cannot fix this [CI_FIX_BLOCKED]", [])
+        assert not check("still working", [])
+
+    def test_on_json(self):
+        check = on_json(Schema({"verdict": str}))
+        assert check("", [{"other": 1}, {"verdict": "pass"}])
+        assert not check('{"verdict": "pass"}', [{"verdict": 1}])
+
+    def test_all_of(self):
+        check = all_of(on_sentinel("[BACKLOG_COMPLETE]"), on_json(Schema(items=dict)))
+        assert not check("[BACKLOG_COMPLETE]", [])
+        assert not check("more text", [[{"title": "A"}]])
+        assert check("[BACKLOG_COMPLETE]", [[{"title": "A"}]])
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from ottonate.concurrency import AdaptiveConcurrency
+
+
+@pytest.fixture
+def controller():
+    return AdaptiveConcurrency(4, min_limit=1, max_limit=8, cooldown_s=0)
+
+
+class TestAdaptiveConcurrency:
+    @pytest.mark.asyncio
+    async def test_slot_enforces_limit(self):
+        controller = AdaptiveConcurrency(2)
+        peak = 0
+
+        async def _session():
+            nonlocal peak
+            async with controller.slot():
+                peak = max(peak, controller.in_use)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(_session() for _ in range(5)))
+        assert peak == 2
+        assert controller.in_use == 0
+
+    @pytest.mark.asyncio
+    async def test_additive_increase_after_clean_round(self, controller):
+        for _ in range(4):
+            controller.record("otto-planner", 10.0, is_error=False)
+        assert controller.limit == 5
+
+    @pytest.mark.asyncio
+    async def test_never_exceeds_max(self):
+        controller = AdaptiveConcurrency(2, max_limit=2)
+        for _ in range(10):
+            controller.record("otto-planner", 10.0, is_error=False)
+        assert controller.limit == 2
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_halves(self, controller):
+        controller.on_rate_limit()
+        assert controller.limit == 2
+        controller.on_rate_limit()
+        controller.on_rate_limit()
+        assert controller.limit == 1
+
+    @pytest.mark.asyncio
+    async def test_cooldown_groups_signals(self):
+        controller = AdaptiveConcurrency(8, cooldown_s=60)
+        controller.on_rate_limit()
+        controller.on_rate_limit()
+        assert controller.limit == 4
+
+    @pytest.mark.asyncio
+    async def test_error_rate_decreases(self, controller):
+        for is_error in (False, True, True, False, True):
+            controller.record("otto-implementer", 10.0, is_error=is_error)
+        assert controller.limit == 2
+
+    @pytest.mark.asyncio
+    async def test_slow_session_decreases(self, controller):
+        for _ in range(3):
+            controller.record("otto-implementer", 100.0, is_error=False)
+        assert controller.limit == 4
+        controller.record("otto-implementer", 400.0, is_error=False)
+        assert controller.limit == 2
+
+    @pytest.mark.asyncio
+    async def test_latency_baseline_is_per_agent(self, controller):
+        for _ in range(3):
+            controller.record("otto-quality-gate", 5.0, is_error=False)
+        controller.record("otto-implementer", 600.0, is_error=False)
+        assert controller.limit == 5
+
+    @pytest.mark.asyncio
+    async def test_increase_wakes_waiters(self):
+        controller = AdaptiveConcurrency(1, max_limit=2)
+        entered = asyncio.Event()
+        release = asyncio.Event()
+
+        async def _hold():
+            async with controller.slot():
+                await release.wait()
+
+        async def _second():
+            async with controller.slot():
+                entered.set()
+
+        holder = asyncio.create_task(_hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(_second())
+        await asyncio.sleep(0)
+        assert not entered.is_set()
+        controller.record("otto-planner", 1.0, is_error=False)
+        assert controller._notifiers
+        await asyncio.wait_for(entered.wait(), timeout=1)
+        assert not controller._notifiers
+        release.set()
+        await asyncio.gather(holder, waiter)
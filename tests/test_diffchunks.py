@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from ottonate.diffchunks import chunk_diff, merge_review_verdicts, split_diff
+
+
+def _file(name: str, lines: int = 5, hunks: int = 1) -> str:
+    header = f"diff --git a/{name} b/{name}\n--- a/{name}\n+++ b/{name}\n"
+    body = "".join(f"@@ -{h * 10},3 +{h * 10},3 @@\n" + "+x\n" * lines for h in range(hunks))
+    return header + body
+
+
+class TestSplitDiff:
+    def test_splits_per_file(self):
+        files = split_diff(_file("a.py") + _file("src/b.py"))
+        assert [f.path for f in files] == ["a.py", "src/b.py"]
+        assert files[1].text.startswith("diff --git a/src/b.py")
+
+    def test_no_file_headers(self):
+        assert split_diff("just text") == []
+
+
+class TestChunkDiff:
+    def test_small_diff_is_one_chunk(self):
+        diff = _file("a.py") + _file("b.py")
+        chunks = chunk_diff(diff, 10_000)
+        assert len(chunks) == 1
+        assert chunks[0].files == ["a.py", "b.py"]
+        assert chunks[0].text == diff
+
+    def test_respects_size_limit(self):
+        diff = "".join(_file(f"d{i}/f{i}.py", lines=20) for i in range(6))
+        limit = len(_file("d0/f0.py", lines=20)) * 2
+        chunks = chunk_diff(diff, limit)
+        assert len(chunks) == 3
+        assert all(len(c.text) <= limit for c in chunks)
+        assert "".join(c.text for c in chunks) == diff
+
+    def test_test_grouped_with_its_module(self):
+        diff = _file("src/pkg/foo.py") + _file("src/pkg/other.py") + _file("tests/test_foo.py")
+        chunks = chunk_diff(diff, len(_file("tests/test_foo.py")) * 2)
+        assert chunks[0].files == ["src/pkg/foo.py", "tests/test_foo.py"]
+        assert chunks[1].files == ["src/pkg/other.py"]
+
+    def test_same_name_in_other_package_not_grouped(self):
+        diff = (
+            _file("a/__init__.py")
+            + _file("b/utils.py")
+            + _file("a/utils.py")
+            + _file("b/__init__.py")
+            + _file("tests/b/test_utils.py")
+        )
+        chunks = chunk_diff(diff, len(_file("tests/b/test_utils.py")) * 2)
+        assert [c.files for c in chunks] == [
+            ["a/__init__.py", "a/utils.py"],
+            ["b/utils.py", "tests/b/test_utils.py"],
+            ["b/__init__.py"],
+        ]
+
+    def test_same_directory_grouped(self):
+        diff = _file("api/a.py") + _file("web/x.js") + _file("api/b.py")
+        chunks = chunk_diff(diff, len(_file("api/a.py")) * 2 + 10)
+        assert chunks[0].files == ["api/a.py", "api/b.py"]
+        assert chunks[1].files == ["web/x.js"]
+
+    def test_oversized_file_split_by_hunk_with_header(self):
+        big = _file("big.py", lines=10, hunks=4)
+        chunks = chunk_diff(big, len(big) // 2)
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert chunk.files == ["big.py"]
+            assert chunk.text.startswith("diff --git a/big.py b/big.py\n--- a/big.py")
+        assert sum(c.text.count("@@ -") for c in chunks) == 4
+
+    def test_deterministic(self):
+        diff = "".join(_file(f"m{i % 3}/f{i}.py", lines=15) for i in range(9))
+        assert chunk_diff(diff, 400) == chunk_diff(diff, 400)
+
+    def test_headerless_diff_kept_whole(self):
+        assert chunk_diff("+x\n", 10)[0].text == "+x\n"
+        assert chunk_diff("  ", 10) == []
+
+
+class TestMergeReviewVerdicts:
+    def test_all_clean(self):
+        merged = merge_review_verdicts([{"verdict": "clean"}, {"verdict": "clean", "issues": []}])
+        assert merged == {"verdict": "clean", "issues": []}
+
+    def test_any_issue_wins_and_issues_concatenated(self):
+        merged = merge_review_verdicts(
+            [
+                {"verdict": "clean"},
+                {"verdict": "issues_found", "issues": [{"description": "a"}]},
+                {"verdict": "issues_found", "issues": [{"description": "b"}]},
+            ]
+        )
+        assert merged["verdict"] == "issues_found"
+        assert [i["description"] for i in merged["issues"]] == ["a", "b"]
+
+    def test_missing_verdict_is_not_clean(self):
+        merged = merge_review_verdicts([{"verdict": "clean"}, None])
+        assert merged["verdict"] == "issues_found"
+        assert "part 2" in merged["issues"][0]["description"]
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from ottonate.dispatch import (
+    NEW_TICKET_PRIORITY,
+    DispatchQueue,
+    Pool,
+    WorkItem,
+    ticket_priority,
+)
+from ottonate.models import CIStatus, Label, ReviewStatus, Ticket, TicketSnapshot
+
+
+def _ticket(*labels: str, snapshot: TicketSnapshot | None = None) -> Ticket:
+    return Ticket(
+        owner="testorg",
+        repo="test-repo",
+        issue_number=42,
+        labels={"otto", *labels},
+        snapshot=snapshot,
+    )
+
+
+class TestTicketPriority:
+    def test_merge_ready_outranks_planning(self):
+        merge, _ = ticket_priority(_ticket(Label.MERGE_READY.value))
+        plan, _ = ticket_priority(_ticket(Label.PLAN.value))
+        assert merge < plan
+
+    def test_new_ticket_is_last(self):
+        assert ticket_priority(_ticket(), new_ticket=True) == (NEW_TICKET_PRIORITY, Pool.AGENT)
+
+    @pytest.mark.parametrize(
+        "label,pool",
+        [
+            (Label.SPEC_REVIEW, Pool.GITHUB),
+            (Label.IDEA_PENDING, Pool.GITHUB),
+            (Label.MERGE_READY, Pool.GITHUB),
+            (Label.PLAN, Pool.AGENT),
+            (Label.SELF_REVIEW, Pool.AGENT),
+            (Label.RETRO, Pool.AGENT),
+        ],
+    )
+    def test_handler_pool(self, label, pool):
+        assert ticket_priority(_ticket(label.value))[1] == pool
+
+    def test_pr_with_failed_ci_goes_to_agent_pool(self):
+        green = TicketSnapshot(ci_status=CIStatus.PASSED)
+        red = TicketSnapshot(ci_status=CIStatus.FAILED)
+        assert ticket_priority(_ticket(Label.PR.value, snapshot=green))[1] == Pool.GITHUB
+        assert ticket_priority(_ticket(Label.PR.value, snapshot=red))[1] == Pool.AGENT
+        assert ticket_priority(_ticket(Label.PR.value))[1] == Pool.AGENT
+
+    def test_review_with_requested_changes_goes_to_agent_pool(self):
+        approved = TicketSnapshot(review_status=ReviewStatus.APPROVED)
+        pending = TicketSnapshot(review_status=ReviewStatus.PENDING)
+        changes = TicketSnapshot(review_status=ReviewStatus.CHANGES_REQUESTED)
+        assert ticket_priority(_ticket(Label.REVIEW.value, snapshot=approved))[1] == Pool.GITHUB
+        assert ticket_priority(_ticket(Label.REVIEW.value, snapshot=pending))[1] == Pool.GITHUB
+        assert ticket_priority(_ticket(Label.REVIEW.value, snapshot=changes))[1] == Pool.AGENT
+
+    @pytest.mark.parametrize("label", [Label.PR, Label.REVIEW])
+    def test_escalating_stage_without_snapshot_goes_to_agent_pool(self, label):
+        assert ticket_priority(_ticket(label.value))[1] == Pool.AGENT
+        unknown = TicketSnapshot(pr_number=7)
+        assert ticket_priority(_ticket(label.value, snapshot=unknown))[1] == Pool.AGENT
+
+
+class TestDispatchQueue:
+    @pytest.mark.asyncio
+    async def test_runs_in_priority_order(self):
+        queue = DispatchQueue(agent_workers=1)
+        order: list[str] = []
+        gate = asyncio.Event()
+
+        async def _blocker():
+            await gate.wait()
+
+        def _record(key):
+            async def _run():
+                order.append(key)
+
+            return _run
+
+        queue.submit(WorkItem(key="blocker", run=_blocker, priority=0))
+        await asyncio.sleep(0)
+        queue.submit(WorkItem(key="new", run=_record("new"), priority=6))
+        queue.submit(WorkItem(key="merge", run=_record("merge"), priority=0))
+        queue.submit(WorkItem(key="plan", run=_record("plan"), priority=3))
+        gate.set()
+        await queue.join()
+        await queue.close()
+
+        assert order == ["merge", "plan", "new"]
+
+    @pytest.mark.asyncio
+    async def test_github_pool_not_blocked_by_agent_pool(self):
+        queue = DispatchQueue(agent_workers=1, github_workers=1)
+        gate = asyncio.Event()
+        ran = asyncio.Event()
+
+        async def _long():
+            await gate.wait()
+
+        async def _check():
+            ran.set()
+
+        queue.submit(WorkItem(key="agent", run=_long, priority=3))
+        queue.submit(WorkItem(key="gate", run=_check, priority=2, pool=Pool.GITHUB))
+        await asyncio.wait_for(ran.wait(), timeout=1)
+        assert queue.stats()["agent"].running == 1
+        gate.set()
+        await queue.join()
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_wakeup_tasks_held_until_done(self):
+        queue = DispatchQueue(agent_workers=1)
+
+        async def _noop():
+            pass
+
+        queue.submit(WorkItem(key="a", run=_noop, priority=0))
+        assert queue._notifiers
+        await queue.join()
+        await asyncio.sleep(0)
+        assert not queue._notifiers
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_duplicate_key_rejected_while_queued(self):
+        queue = DispatchQueue(agent_workers=1)
+
+        async def _noop():
+            pass
+
+        assert queue.submit(WorkItem(key="a", run=_noop, priority=1))
+        assert not queue.submit(WorkItem(key="a", run=_noop, priority=1))
+        await queue.join()
+        assert queue.submit(WorkItem(key="a", run=_noop, priority=1))
+        await queue.join()
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_stats_and_error_isolation(self):
+        queue = DispatchQueue(agent_workers=1)
+
+        async def _boom():
+            raise RuntimeError("boom")
+
+        async def _noop():
+            pass
+
+        queue.submit(WorkItem(key="a", run=_boom, priority=1))
+        queue.submit(WorkItem(key="b", run=_noop, priority=1))
+        await queue.join()
+        stats = queue.stats()
+        await queue.close()
+
+        assert set(stats) == {"agent"}
+        assert stats["agent"].completed == 2
+        assert stats["agent"].queued == 0
+        assert stats["agent"].max_wait_s >= 0
+
+
+class TestFairShare:
+    @staticmethod
+    def _recorder(order: list[str], key: str):
+        async def _run():
+            order.append(key)
+            await asyncio.sleep(0)
+
+        return _run
+
+    @pytest.mark.asyncio
+    async def test_busy_repo_does_not_starve_others(self):
+        queue = DispatchQueue(agent_workers=1)
+        order: list[str] = []
+        gate = asyncio.Event()
+
+        async def _blocker():
+            await gate.wait()
+
+        queue.submit(WorkItem(key="blocker", run=_blocker, priority=0, flow="busy"))
+        await asyncio.sleep(0)
+        for i in range(4):
+            queue.submit(
+                WorkItem(
+                    key=f"busy#{i}", run=self._recorder(order, "busy"), priority=6, flow="busy"
+                )
+            )
+        queue.submit(
+            WorkItem(key="quiet#1", run=self._recorder(order, "quiet"), priority=6, flow="quiet")
+        )
+        gate.set()
+        await queue.join()
+        await queue.close()
+
+        assert order.index("quiet") <= 1
+
+    @pytest.mark.asyncio
+    async def test_weight_sets_share(self):
+        queue = DispatchQueue(agent_workers=1)
+        queue.configure_flow("heavy", weight=2)
+        order: list[str] = []
+        gate = asyncio.Event()
+
+        async def _blocker():
+            await gate.wait()
+
+        queue.submit(WorkItem(key="blocker", run=_blocker, priority=0))
+        await asyncio.sleep(0)
+        for i in range(6):
+            for flow in ("heavy", "light"):
+                queue.submit(
+                    WorkItem(
+                        key=f"{flow}#{i}", run=self._recorder(order, flow), priority=6, flow=flow
+                    )
+                )
+        gate.set()
+        await queue.join()
+        await queue.close()
+
+        assert order[:6].count("heavy") == 4
+
+    @pytest.mark.asyncio
+    async def test_flow_cap_limits_running(self):
+        queue = DispatchQueue(agent_workers=3)
+        queue.configure_flow("capped", max_running=1)
+        active = 0
+        peak = 0
+
+        async def _run():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+        for i in range(4):
+            queue.submit(WorkItem(key=f"capped#{i}", run=_run, priority=1, flow="capped"))
+        await queue.join()
+        await queue.close()
+
+        assert peak == 1
+
+    @pytest.mark.asyncio
+    async def test_flow_stats(self):
+        queue = DispatchQueue(agent_workers=1)
+        queue.configure_flow("a/b", weight=2, max_running=1)
+        gate = asyncio.Event()
+
+        async def _blocker():
+            await gate.wait()
+
+        queue.submit(WorkItem(key="a/b#1", run=_blocker, priority=1, flow="a/b"))
+        queue.submit(WorkItem(key="a/b#2", run=_blocker, priority=1, flow="a/b"))
+        await asyncio.sleep(0.01)
+        stats = queue.flow_stats()["a/b"]
+        gate.set()
+        await queue.join()
+        await queue.close()
+
+        assert (stats.running, stats.queued, stats.max_running, stats.weight) == (1, 1, 1, 2)
@@ -2,7 +2,13 @@ from __future__ import annotations
 
 import json
 
-from ottonate.enrichment import EnrichedStory, enrich_story_prompt, parse_enriched_story
+from ottonate.enrichment import (
+    EnrichedStory,
+    enrich_stories_prompt,
+    enrich_story_prompt,
+    parse_enriched_stories,
+    parse_enriched_story,
+)
 
 
 class TestEnrichedStory:
@@ -109,3 +115,59 @@ class TestParseEnrichedStory:
         result = parse_enriched_story(json.dumps(data))
         assert result is not None
         assert result.repo == "my-service"
+
+
+class TestEnrichStoriesPrompt:
+    def test_numbers_stories_and_includes_spec_once(self):
+        prompt = enrich_stories_prompt(
+            [{"title": "Login"}, {"title": "Logout"}], spec_context="Security is important"
+        )
+        assert '"index": 1' in prompt
+        assert "Logout" in prompt
+        assert prompt.count("Security is important") == 1
+        assert "JSON array" in prompt
+
+
+class TestParseEnrichedStories:
+    def test_parses_array_by_index(self):
+        entries = [
+            {"index": 1, "title": "B", "description": "b"},
+            {"index": 0, "title": "A", "description": "a"},
+        ]
+        result = parse_enriched_stories(json.dumps(entries), 2)
+        assert [story.title for story in result] == ["A", "B"]
+
+    def test_malformed_entry_does_not_discard_batch(self):
+        text = (
+            "```json\n["
+            '{"index": 0, "title": "A", "description": "a"}, '
+            '{"index": 1, "title": "B", "description": "b" "estimate": "S"}, '
+            '{"index": 2, "title": "C", "description": "c"}'
+            "]\n```"
+        )
+        result = parse_enriched_stories(text, 3)
+        assert result[0].title == "A"
+        assert result[1] is None
+        assert result[2].title == "C"
+
+    def test_non_object_entries_skipped(self):
+        text = '[{"index": 0, "title": "A"}, null, {"index": 2, "title": "C"}]'
+        result = parse_enriched_stories(text, 3)
+        assert result[0].title == "A"
+        assert result[1] is None
+        assert result[2].title == "C"
+
+        result = parse_enriched_stories('[{"index": 0, "title": "A"}, "oops"]', 2)
+        assert result[0].title == "A"
+        assert result[1] is None
+
+    def test_missing_index_falls_back_to_position(self):
+        entries = [{"title": "A", "description": "a"}, {"title": "B", "description": "b"}]
+        result = parse_enriched_stories(json.dumps(entries), 2)
+        assert [story.title for story in result] == ["A", "B"]
+
+    def test_truncated_response(self):
+        text = '[{"index": 0, "title": "A", "description": "a"}, {"index": 1, "title": "B'
+        result = parse_enriched_stories(text, 2)
+        assert result[0].title == "A"
+        assert result[1] is None
@@ -149,6 +149,32 @@ class TestGetCiFailureLogs:
         assert "Failed check: build" in logs
         assert "AssertionError" in logs
 
+    @pytest.mark.asyncio
+    async def test_fetches_each_run_once_and_keeps_error_windows(self, github):
+        checks = [
+            {"name": "test (3.11)", "state": "FAILURE", "link": "https://x/actions/runs/1/job/1"},
+            {"name": "test (3.12)", "state": "FAILURE", "link": "https://x/actions/runs/1/job/2"},
+            {"name": "lint", "state": "FAILURE", "link": "https://x/actions/runs/2/job/3"},
+            {"name": "docs", "state": "SUCCESS", "link": "https://x/actions/runs/3/job/4"},
+        ]
+        setup = "".join(f"Downloading dep-{i}\n" for i in range(500))
+        runs: list[str] = []
+
+        async def _mock_exec(*args, **kwargs):
+            if args[1] == "pr":
+                return _gh_result(json.dumps(checks))
+            runs.append(args[3])
+            return _gh_result(setup + f"Error: run {args[3]} broke\n")
+
+        with patch("asyncio.create_subprocess_exec", side_effect=_mock_exec):
+            logs = await github.get_ci_failure_logs("o", "r", 1)
+
+        assert sorted(runs) == ["1", "2"]
+        assert "Error: run 1 broke" in logs
+        assert "Error: run 2 broke" in logs
+        assert "Downloading dep-0\n" not in logs
+        assert "Failed check: docs" not in logs
+
 
 class TestGetReviewStatus:
     @pytest.mark.asyncio
@@ -198,6 +224,22 @@ class TestGetDefaultBranch:
             assert await github.get_default_branch("o", "r") == "main"
 
 
+class TestGetBranchSha:
+    @pytest.mark.asyncio
+    async def test_returns_sha(self, github):
+        with patch(
+            "asyncio.create_subprocess_exec", return_value=_gh_result("abc123\n")
+        ) as exec_mock:
+            result = await github.get_branch_sha("org", "repo", "main")
+        assert result == "abc123"
+        assert exec_mock.call_args.args[-1] == "repos/org/repo/commits/main"
+
+    @pytest.mark.asyncio
+    async def test_returns_none_on_error(self, github):
+        with patch("asyncio.create_subprocess_exec", return_value=_gh_result("", returncode=1)):
+            assert await github.get_branch_sha("org", "repo", "main") is None
+
+
 class TestGetPrState:
     @pytest.mark.asyncio
     async def test_merged(self, github):
@@ -231,6 +273,29 @@ class TestMergePr:
                 await github.merge_pr("org", "repo", 42)
 
 
+class TestEnsureLabels:
+    @pytest.mark.asyncio
+    async def test_creates_missing_labels(self, github):
+        procs = [_gh_result(json.dumps([{"name": "otto"}])), _gh_result("")]
+        with patch("asyncio.create_subprocess_exec", side_effect=procs) as mock_exec:
+            created = await github.ensure_labels("org", "repo", {"otto": "fff", "new": "000"})
+        assert created == ["new"]
+        assert mock_exec.call_args[0][1:4] == ("label", "create", "new")
+
+    @pytest.mark.asyncio
+    async def test_failed_create_raises(self, github):
+        procs = [_gh_result("[]"), _gh_result("", returncode=1), _gh_result("")]
+        with patch("asyncio.create_subprocess_exec", side_effect=procs):
+            with pytest.raises(RuntimeError, match="Failed to create labels in org/repo: a"):
+                await github.ensure_labels("org", "repo", {"a": "fff", "b": "000"})
+
+    @pytest.mark.asyncio
+    async def test_failed_listing_raises(self, github):
+        with patch("asyncio.create_subprocess_exec", return_value=_gh_result("", returncode=1)):
+            with pytest.raises(RuntimeError, match="gh label list failed"):
+                await github.ensure_labels("org", "repo", {"a": "fff"})
+
+
 class TestGetIssueTimeline:
     @pytest.mark.asyncio
     async def test_returns_label_events(self, github):
@@ -278,3 +343,128 @@ class TestGetIssueTimeline:
             result = await github.get_issue_timeline("o", "r", 1)
         assert len(result) == 1
         assert result[0]["label"] == "agentPlan"
+
+
+def _snapshot_issue(number: int, repo: str = "repo", pr_branch: str | None = None) -> dict:
+    issue = {
+        "number": number,
+        "title": "Title",
+        "body": "Body",
+        "state": "OPEN",
+        "labels": {"nodes": [{"name": "otto"}, {"name": "agentPR"}]},
+        "comments": {"nodes": [{"body": "first"}, {"body": "second"}]},
+        "timelineItems": {"nodes": []},
+    }
+    if pr_branch:
+        pr = {
+            "number": 100 + number,
+            "state": "OPEN",
+            "headRefName": pr_branch,
+            "headRefOid": "abc123",
+            "repository": {"name": repo, "owner": {"login": "org"}},
+            "reviews": {"nodes": [{"author": {"login": "alice"}, "state": "APPROVED"}]},
+            "commits": {
+                "nodes": [
+                    {
+                        "commit": {
+                            "statusCheckRollup": {
+                                "contexts": {
+                                    "nodes": [
+                                        {
+                                            "__typename": "CheckRun",
+                                            "name": "build",
+                                            "status": "COMPLETED",
+                                            "conclusion": "SUCCESS",
+                                            "detailsUrl": "",
+                                        }
+                                    ]
+                                }
+                            }
+                        }
+                    }
+                ]
+            },
+        }
+        issue["timelineItems"]["nodes"].append({"__typename": "CrossReferencedEvent", "source": pr})
+    return issue
+
+
+class TestGetTicketSnapshots:
+    @pytest.mark.asyncio
+    async def test_parses_issue_and_linked_pr(self, github):
+        data = {"t0": {"issue": _snapshot_issue(42, pr_branch="42/feature")}}
+        with patch.object(github, "_graphql", AsyncMock(return_value=data)) as gql:
+            result = await github.get_ticket_snapshots("org", [("repo", 42)])
+
+        snapshot = result[("repo", 42)]
+        assert snapshot.body == "Body"
+        assert snapshot.labels == {"otto", "agentPR"}
+        assert snapshot.comments == ["first", "second"]
+        assert snapshot.pr_number == 142
+        assert snapshot.pr_state == "OPEN"
+        assert snapshot.pr_head_sha == "abc123"
+        assert snapshot.ci_status == CIStatus.PASSED
+        assert snapshot.review_status == ReviewStatus.APPROVED
+        assert gql.await_args.args[1] == {"owner": "org", "r0": "repo", "n0": 42}
+
+    @pytest.mark.asyncio
+    async def test_ignores_prs_from_other_repos(self, github):
+        issue = _snapshot_issue(42, repo="elsewhere", pr_branch="42/feature")
+        with patch.object(github, "_graphql", AsyncMock(return_value={"t0": {"issue": issue}})):
+            result = await github.get_ticket_snapshots("org", [("repo", 42)])
+        assert result[("repo", 42)].pr_number is None
+        assert result[("repo", 42)].ci_status is None
+
+    @pytest.mark.asyncio
+    async def test_prefers_branch_with_exact_issue_number(self, github):
+        issue = _snapshot_issue(1, pr_branch="1-fix")
+        nodes = issue["timelineItems"]["nodes"]
+        nodes += _snapshot_issue(12, pr_branch="12-foo")["timelineItems"]["nodes"]
+        nodes += _snapshot_issue(21, pr_branch="feature/21")["timelineItems"]["nodes"]
+        with patch.object(github, "_graphql", AsyncMock(return_value={"t0": {"issue": issue}})):
+            result = await github.get_ticket_snapshots("org", [("repo", 1)])
+        assert result[("repo", 1)].pr_number == 101
+
+    @pytest.mark.asyncio
+    async def test_batches_and_skips_missing(self, github):
+        responses = [
+            {"t0": {"issue": _snapshot_issue(1)}, "t1": {"issue": _snapshot_issue(2)}},
+            {"t0": None},
+        ]
+        with patch.object(github, "_graphql", AsyncMock(side_effect=responses)) as gql:
+            result = await github.get_ticket_snapshots(
+                "org", [("repo", 1), ("repo", 2), ("repo", 3)], batch_size=2
+            )
+        assert gql.await_count == 2
+        assert set(result) == {("repo", 1), ("repo", 2)}
+
+    @pytest.mark.asyncio
+    async def test_graphql_sends_query_on_stdin(self, github):
+        proc = _gh_result(json.dumps({"data": {"t0": None}}))
+        with patch("asyncio.create_subprocess_exec", return_value=proc) as exec_mock:
+            await github.get_ticket_snapshots("org", [("repo", 1)])
+        assert exec_mock.call_args.args[:5] == ("gh", "api", "graphql", "--input", "-")
+        payload = json.loads(proc.communicate.await_args.args[0])
+        assert "fragment ticket on Issue" in payload["query"]
+        assert payload["variables"]["n0"] == 1
+
+
+class TestRateBudget:
+    @pytest.mark.asyncio
+    async def test_refresh_rate_limit(self, github):
+        payload = {"resources": {"search": {"limit": 30, "remaining": 12, "reset": 9999999999}}}
+        with patch(
+            "asyncio.create_subprocess_exec", return_value=_gh_result(json.dumps(payload))
+        ) as mock_exec:
+            await github.refresh_rate_limit()
+        assert mock_exec.call_args[0][:3] == ("gh", "api", "rate_limit")
+        assert github.budget.remaining() == {"search": 12}
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_error_marks_bucket_exhausted(self, github):
+        proc = _gh_result("", returncode=1)
+        proc.communicate = AsyncMock(return_value=(b"", b"API rate limit exceeded for user"))
+        with patch("asyncio.create_subprocess_exec", return_value=proc):
+            await github.search_issues("org", "otto")
+        assert github.budget.remaining() == {"search": 0}
+        assert not github.budget.allow_optional("search")
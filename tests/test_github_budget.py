@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import time
+
+from ottonate.github_budget import RateBudget, poll_cost
+
+
+def _budget(remaining: int, *, limit: int = 5000, reset_in_s: float = 3600) -> RateBudget:
+    budget = RateBudget(reserve=0.1)
+    budget.update("core", limit, remaining, time.time() + reset_in_s)
+    return budget
+
+
+class TestRateBudget:
+    def test_update_from_headers(self):
+        budget = RateBudget()
+        budget.update_from_headers(
+            {
+                "x-ratelimit-limit": "5000",
+                "x-ratelimit-remaining": "4990",
+                "x-ratelimit-reset": str(int(time.time()) + 600),
+                "x-ratelimit-resource": "search",
+            }
+        )
+        assert budget.remaining() == {"search": 4990}
+
+    def test_headers_without_rate_limit_ignored(self):
+        budget = RateBudget()
+        budget.update_from_headers({"content-type": "application/json"})
+        assert budget.buckets == {}
+
+    def test_update_from_rate_limit(self):
+        reset = int(time.time()) + 600
+        budget = RateBudget()
+        budget.update_from_rate_limit(
+            {
+                "resources": {
+                    "core": {"limit": 5000, "remaining": 4000, "reset": reset},
+                    "search": {"limit": 30, "remaining": 30, "reset": reset},
+                    "graphql": {"limit": 5000, "remaining": 5000, "reset": reset},
+                    "code_scanning_upload": {"limit": 500, "remaining": 500, "reset": reset},
+                }
+            }
+        )
+        assert budget.remaining() == {"core": 4000, "search": 30, "graphql": 5000}
+
+    def test_allow_optional_respects_reserve(self):
+        assert _budget(1000).allow_optional()
+        assert not _budget(400).allow_optional()
+        assert RateBudget().allow_optional()
+
+    def test_allow_optional_after_reset(self):
+        assert _budget(0, reset_in_s=-1).allow_optional()
+
+    def test_mark_exhausted(self):
+        budget = _budget(1000)
+        budget.mark_exhausted()
+        assert budget.remaining() == {"core": 0}
+        assert not budget.allow_optional()
+
+    def test_mark_exhausted_unknown_bucket(self):
+        budget = RateBudget()
+        budget.mark_exhausted("graphql")
+        assert not budget.allow_optional("graphql")
+
+
+class TestPollInterval:
+    def test_base_interval_with_ample_budget(self):
+        assert _budget(5000).poll_interval(60, 900, {"core": 10}) == 60
+
+    def test_stretches_as_budget_drains(self):
+        # 1000 left, 500 reserved, 3600s to reset, 50 calls per poll -> 10 polls fit.
+        interval = _budget(1000).poll_interval(60, 900, {"core": 50})
+        assert 355 < interval <= 360
+
+    def test_capped_at_max(self):
+        assert _budget(400).poll_interval(60, 900, {"core": 10}) == 900
+
+    def test_expired_window_ignored(self):
+        assert _budget(0, reset_in_s=-1).poll_interval(60, 900, {"core": 10}) == 60
+
+
+class TestPollCost:
+    def test_cost_per_resource(self):
+        assert poll_cost({"core": 100, "search": 30}, {"core": 80, "search": 29}) == {
+            "core": 20,
+            "search": 1,
+        }
+
+    def test_reset_mid_poll_skipped(self):
+        assert poll_cost({"core": 10}, {"core": 4990}) == {}
@@ -0,0 +1,437 @@
+from __future__ import annotations
+
+import base64
+import http.client
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from ottonate.config import OttonateConfig
+from ottonate.github import GitHubClient, create_github_client
+from ottonate.github_http import ConnectionPool, HttpGitHubClient, HttpResponse
+from ottonate.http_cache import ResponseCache
+from ottonate.models import CIStatus, Label, ReviewStatus
+
+
+class FakeGitHub:
+    """Local stand-in for api.github.com.
+
+    Routes map ``(method, path)`` to ``(status, body, headers)``; a callable body is
+    invoked with the recorded request and may return ``(body, headers)`` or
+    ``(status, body, headers)``. Every
+    request is recorded along with the client port so tests can observe reuse.
+    """
+
+    def __init__(self) -> None:
+        self.routes: dict[tuple[str, str], tuple] = {}
+        self.requests: list[dict] = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                request = {
+                    "method": self.command,
+                    "path": parts.path,
+                    "query": {k: v[0] for k, v in parse_qs(parts.query).items()},
+                    "headers": {k.lower(): v for k, v in self.headers.items()},
+                    "body": json.loads(raw) if raw else None,
+                    "port": self.client_address[1],
+                }
+                fake.requests.append(request)
+                status, body, headers = fake.routes.get(
+                    (self.command, parts.path), (404, {"message": "Not Found"}, {})
+                )
+                if callable(body):
+                    body = body(request)
+                    if isinstance(body, tuple) and len(body) == 3:
+                        status, body, headers = body
+                    elif isinstance(body, tuple):
+                        body, headers = body
+                payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _handle  # noqa: N815
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+        )
+        self._thread.start()
+
+    def route(self, method: str, path: str, body=None, status: int = 200, headers=None) -> None:
+        self.routes[(method, path)] = (status, body if body is not None else {}, headers or {})
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake():
+    server = FakeGitHub()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def client(fake):
+    c = HttpGitHubClient("test-token", api_url=fake.url, pool_size=2)
+    yield c
+    c.close()
+
+
+class TestTransport:
+    @pytest.mark.asyncio
+    async def test_sends_auth_and_api_headers(self, fake, client):
+        fake.route("GET", "/repos/o/r", {"default_branch": "develop"})
+        assert await client.get_default_branch("o", "r") == "develop"
+        headers = fake.requests[0]["headers"]
+        assert headers["authorization"] == "Bearer test-token"
+        assert headers["accept"] == "application/vnd.github+json"
+
+    @pytest.mark.asyncio
+    async def test_reuses_keep_alive_connection(self, fake, client):
+        fake.route("GET", "/repos/o/r/issues/1", {"number": 1, "title": "t", "labels": []})
+        for _ in range(5):
+            await client.get_issue("o", "r", 1)
+        assert len(fake.requests) == 5
+        assert len({r["port"] for r in fake.requests}) == 1
+        assert client._pool.connections_opened == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_return_empty(self, fake, client):
+        fake.route("GET", "/repos/o/r/issues/1", {"message": "boom"}, status=500)
+        assert await client.get_issue("o", "r", 1) == {}
+
+    @pytest.mark.asyncio
+    async def test_follows_link_next(self, fake, client):
+        def _page(req):
+            if req["query"].get("page") == "2":
+                return [{"body": "second"}], {}
+            link = f'<{fake.url}/repos/o/r/issues/1/comments?page=2>; rel="next"'
+            return [{"body": "first"}], {"Link": link}
+
+        fake.route("GET", "/repos/o/r/issues/1/comments", _page)
+        assert await client.get_comments("o", "r", 1) == ["first", "second"]
+        assert len(fake.requests) == 2
+
+
+class TestConnectionPool:
+    @staticmethod
+    def _pool(*results) -> tuple[ConnectionPool, list[MagicMock]]:
+        pool = ConnectionPool("https://api.example.com")
+        pool._idle.put(MagicMock())
+        opened: list[MagicMock] = []
+
+        def _connect():
+            opened.append(MagicMock())
+            return opened[-1]
+
+        pool._connect = _connect
+        pool._send = MagicMock(side_effect=results)
+        return pool, opened
+
+    def test_idempotent_request_retried_on_dropped_socket(self):
+        ok = HttpResponse(200, {}, b"{}")
+        pool, opened = self._pool(http.client.RemoteDisconnected(), ok)
+        assert pool.request("GET", "/x", {}) is ok
+        assert pool._send.call_count == 2
+        assert len(opened) == 1
+
+    def test_post_not_resent_on_dropped_socket(self):
+        pool, opened = self._pool(http.client.RemoteDisconnected(), HttpResponse(201, {}, b""))
+        with pytest.raises(http.client.RemoteDisconnected):
+            pool.request("POST", "/x", {}, b"{}")
+        assert pool._send.call_count == 1
+        assert opened == []
+
+    def test_failed_retry_closes_fresh_connection(self):
+        pool, opened = self._pool(ConnectionResetError(), ConnectionResetError())
+        with pytest.raises(ConnectionResetError):
+            pool.request("DELETE", "/x", {})
+        opened[0].close.assert_called_once()
+        assert pool._idle.empty()
+
+
+class TestListOrgRepos:
+    @pytest.mark.asyncio
+    async def test_skips_archived(self, fake, client):
+        repos = [{"name": "a"}, {"name": "old", "archived": True}]
+        fake.route("GET", "/orgs/o/repos", repos)
+        assert await client.list_org_repos("o") == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_user_repos(self, fake, client):
+        fake.route("GET", "/orgs/me/repos", {"message": "Not Found"}, status=404)
+        fake.route("GET", "/users/me/repos", [{"name": "mine"}])
+        assert await client.list_org_repos("me") == ["mine"]
+
+
+class TestRateBudget:
+    @pytest.mark.asyncio
+    async def test_response_headers_update_budget(self, fake, client):
+        headers = {
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": "4321",
+            "X-RateLimit-Reset": "9999999999",
+            "X-RateLimit-Resource": "core",
+        }
+        fake.route("GET", "/repos/o/r/issues/1", {"number": 1}, headers=headers)
+        await client.get_issue("o", "r", 1)
+        assert client.budget.remaining() == {"core": 4321}
+
+    @pytest.mark.asyncio
+    async def test_refresh_rate_limit(self, fake, client):
+        core = {"limit": 5000, "remaining": 1200, "reset": 9999999999}
+        fake.route("GET", "/rate_limit", {"resources": {"core": core}})
+        await client.refresh_rate_limit()
+        assert client.budget.remaining() == {"core": 1200}
+
+
+class TestConditionalRequests:
+    @pytest.fixture
+    def cached_client(self, fake):
+        c = HttpGitHubClient(
+            "test-token", api_url=fake.url, pool_size=2, cache=ResponseCache(":memory:")
+        )
+        yield c
+        c.close()
+
+    @pytest.mark.asyncio
+    async def test_serves_cached_body_on_304(self, fake, cached_client):
+        def _comments(req):
+            if req["headers"].get("if-none-match") == '"v1"':
+                return 304, b"", {"ETag": '"v1"'}
+            return 200, [{"body": "hi"}], {"ETag": '"v1"'}
+
+        fake.route("GET", "/repos/o/r/issues/1/comments", _comments)
+        first = await cached_client.get_comments("o", "r", 1)
+        second = await cached_client.get_comments("o", "r", 1)
+
+        assert first == second == ["hi"]
+        assert "if-none-match" not in fake.requests[0]["headers"]
+        assert fake.requests[1]["headers"]["if-none-match"] == '"v1"'
+        assert cached_client._cache.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_changed_resource_replaces_entry(self, fake, cached_client):
+        fake.route("GET", "/repos/o/r", {"default_branch": "main"}, headers={"ETag": '"a"'})
+        assert await cached_client.get_default_branch("o", "r") == "main"
+        fake.route("GET", "/repos/o/r", {"default_branch": "dev"}, headers={"ETag": '"b"'})
+        assert await cached_client.get_default_branch("o", "r") == "dev"
+        assert fake.requests[1]["headers"]["if-none-match"] == '"a"'
+        assert cached_client._cache.hits == 0
+
+    @pytest.mark.asyncio
+    async def test_writes_are_not_cached(self, fake, cached_client):
+        fake.route("POST", "/repos/o/r/issues/1/comments", {}, status=201, headers={"ETag": "x"})
+        await cached_client.add_comment("o", "r", 1, "hello")
+        assert len(cached_client._cache) == 0
+
+
+class TestIssueOperations:
+    @pytest.mark.asyncio
+    async def test_search_issues_maps_to_gh_shape(self, fake, client):
+        fake.route(
+            "GET",
+            "/search/issues",
+            {
+                "items": [
+                    {
+                        "repository_url": "https://api.github.com/repos/testorg/my-app",
+                        "number": 7,
+                        "title": "Do it",
+                        "labels": [{"name": "otto", "color": "fff"}],
+                    }
+                ]
+            },
+        )
+        issues = await client.search_issues("testorg", "otto")
+        assert issues == [
+            {
+                "repository": {"name": "my-app", "nameWithOwner": "testorg/my-app"},
+                "number": 7,
+                "labels": [{"name": "otto"}],
+                "title": "Do it",
+            }
+        ]
+        query = fake.requests[0]["query"]["q"]
+        assert "user:testorg" in query
+        assert 'label:"otto"' in query
+
+    @pytest.mark.asyncio
+    async def test_create_issue_returns_number(self, fake, client):
+        fake.route("POST", "/repos/o/r/issues", {"number": 99}, status=201)
+        assert await client.create_issue("o", "r", "Title", "Body", ["otto"]) == 99
+        assert fake.requests[0]["body"] == {"title": "Title", "body": "Body", "labels": ["otto"]}
+
+    @pytest.mark.asyncio
+    async def test_create_issue_raises_on_failure(self, fake, client):
+        fake.route("POST", "/repos/o/r/issues", {"message": "nope"}, status=422)
+        with pytest.raises(RuntimeError):
+            await client.create_issue("o", "r", "Title", "Body")
+
+    @pytest.mark.asyncio
+    async def test_swap_label_removes_then_adds(self, fake, client):
+        fake.route("DELETE", "/repos/o/r/issues/42/labels/agentPlanning", [])
+        fake.route("POST", "/repos/o/r/issues/42/labels", [])
+        await client.swap_label("o", "r", 42, Label.PLANNING, Label.PLAN_REVIEW)
+        assert [(r["method"], r["path"]) for r in fake.requests] == [
+            ("DELETE", "/repos/o/r/issues/42/labels/agentPlanning"),
+            ("POST", "/repos/o/r/issues/42/labels"),
+        ]
+        assert fake.requests[1]["body"] == {"labels": ["agentPlanReview"]}
+
+    @pytest.mark.asyncio
+    async def test_get_file_content_decodes_base64(self, fake, client):
+        encoded = base64.b64encode(b"hello world").decode()
+        fake.route("GET", "/repos/o/r/contents/.ottonate/config.yml", {"content": encoded})
+        assert await client.get_file_content("o", "r", ".ottonate/config.yml", "dev") == (
+            "hello world"
+        )
+        assert fake.requests[0]["query"] == {"ref": "dev"}
+
+    @pytest.mark.asyncio
+    async def test_get_file_content_missing(self, fake, client):
+        assert await client.get_file_content("o", "r", "missing.md") is None
+
+
+class TestPrOperations:
+    @pytest.mark.asyncio
+    async def test_pr_state_merged(self, fake, client):
+        fake.route("GET", "/repos/o/r/pulls/5", {"state": "closed", "merged": True})
+        assert await client.get_pr_state("o", "r", 5) == "MERGED"
+
+    @pytest.mark.asyncio
+    async def test_ci_status_from_rollup(self, fake, client):
+        rollup = {
+            "data": {
+                "repository": {
+                    "pullRequest": {
+                        "commits": {
+                            "nodes": [
+                                {
+                                    "commit": {
+                                        "statusCheckRollup": {
+                                            "contexts": {
+                                                "nodes": [
+                                                    {
+                                                        "__typename": "CheckRun",
+                                                        "name": "build",
+                                                        "status": "COMPLETED",
+                                                        "conclusion": "FAILURE",
+                                                        "detailsUrl": "",
+                                                    }
+                                                ]
+                                            }
+                                        }
+                                    }
+                                }
+                            ]
+                        }
+                    }
+                }
+            }
+        }
+        fake.route("POST", "/graphql", rollup)
+        assert await client.get_ci_status("o", "r", 1) == CIStatus.FAILED
+        assert fake.requests[0]["body"]["variables"] == {"owner": "o", "repo": "r", "number": 1}
+
+    @pytest.mark.asyncio
+    async def test_review_status(self, fake, client):
+        fake.route(
+            "GET",
+            "/repos/o/r/pulls/1/reviews",
+            [{"user": {"login": "alice"}, "state": "APPROVED"}],
+        )
+        assert await client.get_review_status("o", "r", 1) == ReviewStatus.APPROVED
+
+    @pytest.mark.asyncio
+    async def test_diff_uses_diff_media_type(self, fake, client):
+        fake.route("GET", "/repos/o/r/pulls/3", b"diff --git a/x b/x\n")
+        assert (await client.get_pr_diff("o", "r", 3)).startswith("diff --git")
+        assert fake.requests[0]["headers"]["accept"] == "application/vnd.github.v3.diff"
+
+    @pytest.mark.asyncio
+    async def test_merge_raises_on_failure(self, fake, client):
+        fake.route("GET", "/repos/o/r/pulls/4", {"head": {"ref": "4/feature"}})
+        fake.route("PUT", "/repos/o/r/pulls/4/merge", {"message": "conflict"}, status=405)
+        with pytest.raises(RuntimeError, match="Failed to merge"):
+            await client.merge_pr("o", "r", 4)
+
+
+class TestFailedRunLog:
+    @pytest.mark.asyncio
+    async def test_failed_log_fetch_skips_job(self, fake, client):
+        fake.route(
+            "GET",
+            "/repos/o/r/actions/runs/9/jobs",
+            {
+                "jobs": [
+                    {"id": 1, "name": "test", "conclusion": "failure"},
+                    {"id": 2, "name": "lint", "conclusion": "failure"},
+                    {"id": 3, "name": "docs", "conclusion": "success"},
+                ]
+            },
+        )
+        fake.route(
+            "GET",
+            "/repos/o/r/actions/jobs/1/logs",
+            status=302,
+            headers={"Location": f"{fake.url}/expired-log"},
+        )
+        fake.route(
+            "GET",
+            "/repos/o/r/actions/jobs/2/logs",
+            status=302,
+            headers={"Location": f"{fake.url}/lint-log"},
+        )
+        fake.route("GET", "/lint-log", b"Error: line too long")
+
+        log = await client._failed_run_log("o", "r", "9")
+
+        assert log == "lint\nError: line too long"
+
+
+class TestCreateGithubClient:
+    def test_default_is_gh(self):
+        client = create_github_client(OttonateConfig(github_org="o"))
+        assert type(client) is GitHubClient
+
+    def test_http_transport(self, tmp_path):
+        config = OttonateConfig(
+            github_org="o",
+            github_transport="http",
+            github_token="t",
+            github_cache_path=tmp_path / "cache.sqlite",
+        )
+        client = create_github_client(config)
+        assert isinstance(client, HttpGitHubClient)
+        assert client._cache is not None
+        client.close()
+
+    def test_cache_disabled(self):
+        config = OttonateConfig(
+            github_org="o", github_transport="http", github_token="t", github_cache_max_mb=0
+        )
+        client = create_github_client(config)
+        assert client._cache is None
+        client.close()
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import pytest
+
+from ottonate.http_cache import ResponseCache
+
+
+@pytest.fixture
+def cache():
+    c = ResponseCache(":memory:", max_bytes=100)
+    yield c
+    c.close()
+
+
+class TestResponseCache:
+    def test_round_trip(self, cache):
+        cache.put("k", b"body", {"link": "<x>"}, etag='"e"', last_modified="Mon")
+        entry = cache.get("k")
+        assert entry.body == b"body"
+        assert entry.headers == {"link": "<x>"}
+        assert entry.conditional_headers() == {
+            "If-None-Match": '"e"',
+            "If-Modified-Since": "Mon",
+        }
+
+    def test_skips_responses_without_validators(self, cache):
+        cache.put("k", b"body", {})
+        assert cache.get("k") is None
+
+    def test_evicts_least_recently_used(self, cache):
+        cache.put("a", b"x" * 40, {}, etag="a")
+        cache.put("b", b"x" * 40, {}, etag="b")
+        cache.get("a")
+        cache.put("c", b"x" * 40, {}, etag="c")
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.size_bytes() <= 100
+
+    def test_oversized_body_not_stored(self, cache):
+        cache.put("k", b"x" * 200, {}, etag="e")
+        assert len(cache) == 0
+
+    def test_persists_to_disk(self, tmp_path):
+        path = tmp_path / "nested" / "cache.sqlite"
+        first = ResponseCache(path)
+        first.put("k", b"body", {}, etag="e")
+        first.close()
+        second = ResponseCache(path)
+        assert second.get("k").body == b"body"
+        second.close()
@@ -484,9 +484,9 @@ class TestSchedulerIdeaPolling:
     async def test_poll_detects_idea_prs(self, config):
         from ottonate.scheduler import Scheduler
 
-        with patch("ottonate.scheduler.GitHubClient") as mock_gh_cls:
+        with patch("ottonate.scheduler.create_github_client") as mock_create_gh:
             scheduler = Scheduler(config)
-            scheduler.github = mock_gh_cls.return_value
+            scheduler.github = mock_create_gh.return_value
             scheduler.pipeline = AsyncMock()
             scheduler.pipeline.handle_idea_pr = AsyncMock()
 
@@ -513,9 +513,9 @@ class TestSchedulerIdeaPolling:
     async def test_poll_skips_in_progress_labels(self, config):
         from ottonate.scheduler import Scheduler
 
-        with patch("ottonate.scheduler.GitHubClient") as mock_gh_cls:
+        with patch("ottonate.scheduler.create_github_client") as mock_create_gh:
             scheduler = Scheduler(config)
-            scheduler.github = mock_gh_cls.return_value
+            scheduler.github = mock_create_gh.return_value
             scheduler.pipeline = AsyncMock()
 
             scheduler.github.list_open_prs = AsyncMock(return_value=[
@@ -537,9 +537,9 @@ class TestSchedulerIdeaPolling:
         from ottonate.scheduler import Scheduler
 
         config.idea_poll_enabled = False
-        with patch("ottonate.scheduler.GitHubClient") as mock_gh_cls:
+        with patch("ottonate.scheduler.create_github_client") as mock_create_gh:
             scheduler = Scheduler(config)
-            scheduler.github = mock_gh_cls.return_value
+            scheduler.github = mock_create_gh.return_value
 
             await scheduler._poll_idea_prs("testorg")
 
@@ -549,9 +549,9 @@ class TestSchedulerIdeaPolling:
     async def test_poll_ignores_non_idea_prs(self, config):
         from ottonate.scheduler import Scheduler
 
-        with patch("ottonate.scheduler.GitHubClient") as mock_gh_cls:
+        with patch("ottonate.scheduler.create_github_client") as mock_create_gh:
             scheduler = Scheduler(config)
-            scheduler.github = mock_gh_cls.return_value
+            scheduler.github = mock_create_gh.return_value
             scheduler.pipeline = AsyncMock()
 
             scheduler.github.list_open_prs = AsyncMock(return_value=[
@@ -589,6 +589,13 @@ class TestEnsurePipelineLabels:
         assert Label.SPEC.value in labels
         assert Label.STUCK.value in labels
 
+    @pytest.mark.asyncio
+    async def test_skips_repo_already_synced(self, pipeline, mock_github):
+        await pipeline.ensure_pipeline_labels("testorg", "engineering")
+        await pipeline.ensure_pipeline_labels("testorg", "engineering")
+        await pipeline.ensure_pipeline_labels("testorg", "other")
+        assert mock_github.ensure_labels.call_count == 2
+
     @pytest.mark.asyncio
     async def test_handle_new_ensures_labels(
         self, pipeline, sample_ticket, sample_rules, mock_github, tmp_path
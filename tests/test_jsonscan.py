@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from ottonate.jsonscan import JsonScanner, Schema, find_json, scan_json
+
+
+class TestScanJson:
+    def test_skips_prose_braces(self):
+        text = 'Use {curly} placeholders.\n{"verdict": "pass", "note": "a } in a string"}'
+        assert scan_json(text) == [{"verdict": "pass", "note": "a } in a string"}]
+
+    def test_finds_every_top_level_value(self):
+        text = '[PLAN_COMPLETE] see [docs](x)\n```json\n[{"a": [1, 2]}]\n```\nthen {"b": 1}'
+        assert scan_json(text) == [[{"a": [1, 2]}], {"b": 1}]
+
+    def test_recovers_value_nested_in_invalid_candidate(self):
+        assert scan_json("{oops [1, 2] }") == [[1, 2]]
+
+    def test_unbalanced_prose_does_not_hide_later_json(self):
+        assert scan_json('a { without close, then {"ok": true}') == [{"ok": True}]
+
+    def test_recovers_objects_from_malformed_array(self):
+        text = '[{"a": 1}, {"b": 2 "c": 3}, {"d": 4}]'
+        assert scan_json(text) == [{"a": 1}, {"d": 4}]
+
+    def test_truncated_value_is_dropped(self):
+        assert scan_json('{"a": 1, "b": {"c"') == []
+
+
+class TestJsonScannerStreaming:
+    def test_values_complete_across_chunks(self):
+        scanner = JsonScanner()
+        assert scanner.feed('prefix {"k": "v\\') == []
+        assert scanner.feed('"x", "n": [1, ') == []
+        assert scanner.feed("2]} tail [3]") == [{"k": 'v"x', "n": [1, 2]}, [3]]
+        assert scanner.values == [{"k": 'v"x', "n": [1, 2]}, [3]]
+
+    def test_char_by_char_matches_whole_text(self):
+        text = 'x {"a": "{[", "b": [{"c": null}]} y {bad} [true]'
+        scanner = JsonScanner()
+        for char in text:
+            scanner.feed(char)
+        scanner.finish()
+        assert scanner.values == scan_json(text)
+
+
+class TestSchema:
+    def test_required_keys_and_types(self):
+        schema = Schema({"verdict": str})
+        assert schema.matches({"verdict": "pass", "extra": 1})
+        assert not schema.matches({"verdict": 1})
+        assert not schema.matches(["verdict"])
+
+    def test_array_items(self):
+        schema = Schema(items=dict)
+        assert schema.matches([{"a": 1}])
+        assert not schema.matches([])
+        assert not schema.matches([1, 2])
+
+    def test_find_json_last_and_first(self):
+        values = [{"verdict": "fail"}, {"other": 1}, {"verdict": "pass"}]
+        assert find_json(values, Schema({"verdict": str})) == {"verdict": "pass"}
+        assert find_json(values, Schema({"verdict": str}), last=False) == {"verdict": "fail"}
+        assert find_json(values, Schema({"missing": str})) is None
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from ottonate.labels import (
+    label_schema_version,
+    pipeline_labels,
+    sync_org_labels,
+    sync_repo_labels,
+)
+from ottonate.models import Label
+from ottonate.state import StateStore
+
+
+@pytest.fixture
+def state():
+    s = StateStore()
+    yield s
+    s.close()
+
+
+class TestLabelSchemaVersion:
+    def test_stable_across_ordering(self):
+        assert label_schema_version({"a": "fff", "b": "000"}) == label_schema_version(
+            {"b": "000", "a": "FFF"}
+        )
+
+    def test_changes_with_new_label_or_color(self):
+        base = label_schema_version({"a": "fff"})
+        assert label_schema_version({"a": "fff", "b": "000"}) != base
+        assert label_schema_version({"a": "000"}) != base
+
+    def test_pipeline_labels_include_entry_label(self):
+        labels = pipeline_labels("otto")
+        assert labels["otto"] == "6f42c1"
+        assert Label.MERGE_READY.value in labels
+
+
+class TestSyncRepoLabels:
+    @pytest.mark.asyncio
+    async def test_cached_until_schema_changes(self, mock_github, state):
+        mock_github.ensure_labels = AsyncMock(return_value=["otto"])
+
+        assert await sync_repo_labels(mock_github, state, "o", "r", {"otto": "6f42c1"}) == ["otto"]
+        assert await sync_repo_labels(mock_github, state, "o", "r", {"otto": "6f42c1"}) is None
+        await sync_repo_labels(mock_github, state, "o", "r", {"otto": "6f42c1", "x": "000000"})
+        assert mock_github.ensure_labels.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_force_resyncs(self, mock_github, state):
+        mock_github.ensure_labels = AsyncMock(return_value=[])
+        await sync_repo_labels(mock_github, state, "o", "r", {"otto": "6f42c1"})
+        await sync_repo_labels(mock_github, state, "o", "r", {"otto": "6f42c1"}, force=True)
+        assert mock_github.ensure_labels.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_create_retried_on_next_sync(self, mock_github, state):
+        labels = {"otto": "6f42c1", "x": "000000"}
+        mock_github.ensure_labels = AsyncMock(
+            side_effect=[RuntimeError("Failed to create labels in o/r: x"), ["x"]]
+        )
+
+        with pytest.raises(RuntimeError):
+            await sync_repo_labels(mock_github, state, "o", "r", labels)
+        assert not state.labels_synced("o/r", label_schema_version(labels))
+        assert await sync_repo_labels(mock_github, state, "o", "r", labels) == ["x"]
+        assert state.labels_synced("o/r", label_schema_version(labels))
+
+
+class TestSyncOrgLabels:
+    @pytest.mark.asyncio
+    async def test_syncs_every_repo_with_bounded_parallelism(self, mock_github, state):
+        running = 0
+        peak = 0
+
+        async def _ensure(owner, repo, labels):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return list(labels)
+
+        mock_github.list_org_repos = AsyncMock(return_value=["a", "b", "c", "d", "e"])
+        mock_github.ensure_labels = AsyncMock(side_effect=_ensure)
+        state.mark_labels_synced("o/e", label_schema_version({"otto": "6f42c1"}))
+
+        results = await sync_org_labels(mock_github, state, "o", {"otto": "6f42c1"}, concurrency=2)
+
+        assert results == {"a": ["otto"], "b": ["otto"], "c": ["otto"], "d": ["otto"], "e": None}
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_repo_reported_without_stopping_others(self, mock_github, state):
+        error = RuntimeError("Failed to create labels in o/a: otto")
+        mock_github.ensure_labels = AsyncMock(side_effect=[error, ["otto"]])
+        results = await sync_org_labels(
+            mock_github, state, "o", {"otto": "6f42c1"}, repos=["a", "b"], concurrency=1
+        )
+        assert results == {"a": error, "b": ["otto"]}
+
+    @pytest.mark.asyncio
+    async def test_explicit_repos_skip_listing(self, mock_github, state):
+        mock_github.ensure_labels = AsyncMock(return_value=[])
+        results = await sync_org_labels(mock_github, state, "o", {"otto": "6f42c1"}, repos=["x"])
+        assert results == {"x": []}
+        mock_github.list_org_repos.assert_not_called()
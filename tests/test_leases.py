@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from ottonate.leases import (
+    LeaseManager,
+    MemoryLeaseBackend,
+    SqliteLeaseBackend,
+    create_lease_backend,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        b = MemoryLeaseBackend()
+    else:
+        b = SqliteLeaseBackend(tmp_path / "leases.sqlite")
+    yield b
+    b.close()
+
+
+class TestLeaseBackend:
+    def test_exclusive_until_released(self, backend):
+        assert backend.acquire("o/r#1", "w1", 60)
+        assert not backend.acquire("o/r#1", "w2", 60)
+        assert backend.acquire("o/r#1", "w1", 60)
+        backend.release("o/r#1", "w1")
+        assert backend.acquire("o/r#1", "w2", 60)
+
+    def test_release_by_other_owner_is_ignored(self, backend):
+        backend.acquire("o/r#1", "w1", 60)
+        backend.release("o/r#1", "w2")
+        assert [lease.owner for lease in backend.active()] == ["w1"]
+
+    def test_expired_lease_taken_over(self, backend):
+        backend.acquire("o/r#1", "w1", 0.01)
+        time.sleep(0.02)
+        assert backend.acquire("o/r#1", "w2", 60)
+        assert backend.renew(["o/r#1"], "w1", 60) == set()
+
+    def test_renew_only_own_leases(self, backend):
+        backend.acquire("o/r#1", "w1", 60)
+        backend.acquire("o/r#2", "w2", 60)
+        assert backend.renew(["o/r#1", "o/r#2"], "w1", 60) == {"o/r#1"}
+
+
+class TestSqliteSharedFile:
+    def test_two_workers_share_one_table(self, tmp_path):
+        path = tmp_path / "leases.sqlite"
+        a, b = SqliteLeaseBackend(path), SqliteLeaseBackend(path)
+        try:
+            assert a.acquire("o/r#1", "w1", 60)
+            assert not b.acquire("o/r#1", "w2", 60)
+            assert {lease.key for lease in b.active()} == {"o/r#1"}
+        finally:
+            a.close()
+            b.close()
+
+
+class TestLeaseManager:
+    def test_heartbeat_reports_lost_leases(self):
+        backend = MemoryLeaseBackend()
+        worker = LeaseManager(backend, "w1", ttl_s=0.01)
+        other = LeaseManager(backend, "w2", ttl_s=60)
+        assert worker.acquire("o/r#1")
+        time.sleep(0.02)
+        assert other.acquire("o/r#1")
+
+        assert worker.heartbeat() == {"o/r#1"}
+        assert worker.held == set()
+        assert worker.held_elsewhere() == {"o/r#1"}
+
+    def test_release_all(self):
+        backend = MemoryLeaseBackend()
+        worker = LeaseManager(backend, "w1", ttl_s=60)
+        worker.acquire("o/r#1")
+        worker.acquire("o/r#2")
+        worker.release_all()
+        assert backend.active() == []
+
+    def test_factory(self, config, tmp_path):
+        assert isinstance(create_lease_backend(config), MemoryLeaseBackend)
+        config.lease_backend = "sqlite"
+        config.lease_db_path = tmp_path / "leases.sqlite"
+        backend = create_lease_backend(config)
+        assert isinstance(backend, SqliteLeaseBackend)
+        backend.close()
@@ -1,11 +1,23 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import time
 from unittest.mock import AsyncMock, patch
 
 import pytest
+from claude_agent_sdk import AssistantMessage, ResultMessage, SystemMessage, TextBlock
 
 from ottonate.metrics import IssueMetrics
-from ottonate.models import CIStatus, Label, ReviewStatus, StageResult, Ticket
+from ottonate.models import (
+    CIStatus,
+    Label,
+    ReviewComment,
+    ReviewStatus,
+    StageResult,
+    Ticket,
+    TicketSnapshot,
+)
 from ottonate.pipeline import (
     Pipeline,
     _extract_plan,
@@ -14,7 +26,10 @@ from ottonate.pipeline import (
     _parse_review_verdict,
     _parse_self_improvement,
     _slugify_branch,
+    run_agent,
 )
+from ottonate.ratelimit import AgentRateLimiter
+from ottonate.state import StateStore
 
 
 @pytest.fixture
@@ -49,6 +64,13 @@ class TestParseQualityVerdict:
     def test_invalid_json(self):
         assert _parse_quality_verdict("not json") == "fail_escalate"
 
+    def test_ignores_braces_in_prose(self):
+        text = 'Checked the {placeholder} handling.\n```json\n{"verdict": "pass"}\n```'
+        assert _parse_quality_verdict(text) == "pass"
+
+    def test_prefers_streamed_values(self):
+        assert _parse_quality_verdict("", [{"verdict": "fail_retryable"}]) == "fail_retryable"
+
 
 class TestParseReviewVerdict:
     def test_clean(self):
@@ -57,6 +79,10 @@ class TestParseReviewVerdict:
     def test_default(self):
         assert _parse_review_verdict("broken") == "issues_found"
 
+    def test_last_verdict_wins(self):
+        text = 'Draft: {"verdict": "issues_found"}\nAfter fixes: {"verdict": "clean"}'
+        assert _parse_review_verdict(text) == "clean"
+
 
 class TestExtractPrNumber:
     def test_from_url(self):
@@ -266,6 +292,56 @@ class TestHandlePlanReview:
         mock_github.add_comment.assert_called()
 
 
+class TestSessionResume:
+    @pytest.mark.asyncio
+    async def test_replan_resumes_planner_session(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        sample_ticket.plan = "the plan"
+        pipeline.state.save_session(sample_ticket.issue_ref, "planning", "plan-session")
+        gate = _agent_result('{"verdict": "fail_retryable", "feedback": "add tests"}')
+        replan = StageResult(text="new plan [PLAN_COMPLETE]", session_id="plan-session-2")
+        run = AsyncMock(side_effect=[gate, replan])
+
+        with patch.object(pipeline, "_run", run):
+            await pipeline._handle_plan_review(sample_ticket, sample_rules)
+
+        args, kwargs = run.call_args
+        assert kwargs["resume"] == "plan-session"
+        assert "add tests" in args[1]
+        assert "### Description" not in args[1]
+        assert pipeline.state.session(sample_ticket.issue_ref, "planning") == "plan-session-2"
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_fresh_session(self, pipeline, sample_ticket):
+        pipeline.state.save_session(sample_ticket.issue_ref, "ci_fix", "gone")
+        run = AsyncMock(side_effect=[RuntimeError("no such session"), _agent_result("fixed")])
+
+        with patch.object(pipeline, "_run", run):
+            result = await pipeline._run_resumable(
+                sample_ticket, "ci_fix", "otto-ci-fixer", "full prompt", "just the logs"
+            )
+
+        assert result.text == "fixed"
+        assert run.call_args_list[1].args[1] == "full prompt"
+        assert "resume" not in run.call_args_list[1].kwargs
+        assert pipeline.state.session(sample_ticket.issue_ref, "ci_fix") == "s1"
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_config(self, pipeline, sample_ticket):
+        pipeline.config.agent_session_resume = False
+        pipeline.state.save_session(sample_ticket.issue_ref, "ci_fix", "old")
+        run = AsyncMock(return_value=_agent_result("fixed"))
+
+        with patch.object(pipeline, "_run", run):
+            await pipeline._run_resumable(
+                sample_ticket, "ci_fix", "otto-ci-fixer", "full prompt", "just the logs"
+            )
+
+        run.assert_called_once()
+        assert run.call_args.args[1] == "full prompt"
+
+
 class TestHandlePlan:
     @pytest.mark.asyncio
     async def test_implementer_creates_pr(self, pipeline, sample_ticket, sample_rules, mock_github):
@@ -314,6 +390,9 @@ class TestHandlePr:
             await pipeline._handle_pr(sample_ticket, sample_rules)
 
         mock_github.swap_label.assert_any_call("testorg", "test-repo", 42, Label.CI_FIX, Label.PR)
+        assert mock_github.get_ci_failure_logs.call_args.kwargs == {
+            "limit_tokens": pipeline.config.prompt_budget("ci_fix")
+        }
 
     @pytest.mark.asyncio
     async def test_ci_pending_noop(self, pipeline, sample_ticket, sample_rules, mock_github):
@@ -322,6 +401,46 @@ class TestHandlePr:
 
         await pipeline._handle_pr(sample_ticket, sample_rules)
         mock_github.swap_label.assert_not_called()
+        assert pipeline.ci_watch.watching(sample_ticket.issue_ref)
+
+    @pytest.mark.asyncio
+    async def test_ci_done_wakes_watch(self, pipeline, sample_ticket, sample_rules, mock_github):
+        sample_ticket.pr_number = 10
+        pipeline.ci_watch.watch(sample_ticket.issue_ref, "abc")
+        mock_github.get_ci_status = AsyncMock(return_value=CIStatus.PASSED)
+
+        await pipeline._handle_pr(sample_ticket, sample_rules)
+        assert not pipeline.ci_watch.watching(sample_ticket.issue_ref)
+
+    @pytest.mark.asyncio
+    async def test_uses_snapshot_pr_and_ci(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        sample_ticket.snapshot = TicketSnapshot(
+            pr_number=10, pr_state="OPEN", ci_status=CIStatus.PASSED
+        )
+
+        await pipeline._handle_pr(sample_ticket, sample_rules)
+
+        assert sample_ticket.pr_number == 10
+        mock_github.find_pr.assert_not_called()
+        mock_github.get_ci_status.assert_not_called()
+        mock_github.swap_label.assert_called_with(
+            "testorg", "test-repo", 42, Label.PR, Label.SELF_REVIEW
+        )
+
+    @pytest.mark.asyncio
+    async def test_snapshot_for_other_pr_falls_back(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        sample_ticket.pr_number = 11
+        sample_ticket.snapshot = TicketSnapshot(pr_number=10, ci_status=CIStatus.PASSED)
+        mock_github.get_ci_status = AsyncMock(return_value=CIStatus.PENDING)
+
+        await pipeline._handle_pr(sample_ticket, sample_rules)
+
+        mock_github.get_ci_status.assert_awaited_once_with("testorg", "test-repo", 11)
+        mock_github.swap_label.assert_not_called()
 
 
 class TestHandleReview:
@@ -336,6 +455,22 @@ class TestHandleReview:
             "testorg", "test-repo", 42, Label.REVIEW, Label.MERGE_READY
         )
 
+    @pytest.mark.asyncio
+    async def test_responder_escalation_runs_to_end(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        sample_ticket.pr_number = 10
+        mock_github.get_review_status = AsyncMock(return_value=ReviewStatus.CHANGES_REQUESTED)
+        comment = ReviewComment(id=1, author="alice", body="Rethink the design")
+        mock_github.get_unaddressed_comments = AsyncMock(return_value=[comment])
+        run = AsyncMock(return_value=_agent_result("[REVIEW_ESCALATE] needs a design call"))
+
+        with patch("ottonate.pipeline.run_agent", run):
+            await pipeline._handle_review(sample_ticket, sample_rules)
+
+        assert run.call_args.kwargs["stop_when"] is None
+        assert "stuck" in [h["event"] for h in pipeline.state.history(sample_ticket.issue_ref)]
+
 
 class TestHandleMergeReady:
     @pytest.mark.asyncio
@@ -418,6 +553,120 @@ class TestHandleMergeReady:
         )
 
 
+class TestPromptBudget:
+    @pytest.mark.asyncio
+    async def test_self_review_diff_trimmed_and_recorded(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        pipeline.config.prompt_stage_budgets = {"self_review": 100}
+        sample_ticket.pr_number = 10
+        sample_ticket.plan = "the plan"
+        diff = "".join(f"diff --git a/f{i}.py b/f{i}.py\n" + "+x\n" * 50 for i in range(5))
+        mock_github.get_pr_diff = AsyncMock(return_value=diff)
+        run = AsyncMock(return_value=_agent_result('{"verdict": "clean"}'))
+
+        with patch("ottonate.pipeline.run_agent", run):
+            await pipeline._handle_self_review(sample_ticket, sample_rules)
+
+        prompt = run.call_args.args[1]
+        assert "diff --git a/f0.py" in prompt
+        assert "diff --git a/f4.py" not in prompt
+        assert "f4.py]" in prompt
+        meta = json.loads(pipeline.state.history(sample_ticket.issue_ref)[-1]["detail"])
+        assert meta["context_trimmed"]["diff"] > 0
+
+    @pytest.mark.asyncio
+    async def test_plan_retry_rules_trimmed(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        pipeline.config.prompt_stage_budgets = {"planning": 100}
+        sample_ticket.plan = "the plan"
+        sample_rules.agent_context = "".join(f"rule {i}\n" for i in range(200))
+        gate = _agent_result('{"verdict": "fail_retryable", "feedback": "add tests"}')
+        run = AsyncMock(side_effect=[gate, _agent_result("new plan [PLAN_COMPLETE]")])
+
+        with patch("ottonate.pipeline.run_agent", run):
+            await pipeline._handle_plan_review(sample_ticket, sample_rules)
+
+        prompt = run.call_args.args[1]
+        assert "add tests" in prompt
+        assert "rule 0\n" in prompt
+        assert "rule 199" not in prompt
+        assert "chars omitted ...]" in prompt
+
+
+class TestChunkedSelfReview:
+    @staticmethod
+    def _large_diff() -> str:
+        return "".join(
+            f"diff --git a/d{i}/f{i}.py b/d{i}/f{i}.py\n" + "+x\n" * 100 for i in range(4)
+        )
+
+    @pytest.mark.asyncio
+    async def test_chunks_reviewed_and_clean_merged(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        pipeline.config.self_review_chunk_tokens = 100
+        sample_ticket.pr_number = 10
+        sample_ticket.plan = "the plan"
+        mock_github.get_pr_diff = AsyncMock(return_value=self._large_diff())
+        run = AsyncMock(return_value=_agent_result('{"verdict": "clean"}'))
+
+        with patch("ottonate.pipeline.run_agent", run):
+            await pipeline._handle_self_review(sample_ticket, sample_rules)
+
+        assert run.call_count == 4
+        prompts = [call.args[1] for call in run.call_args_list]
+        assert any("part 1 of 4: d0/f0.py" in p for p in prompts)
+        assert all(p.count("diff --git") == 1 for p in prompts)
+        mock_github.swap_label.assert_called_once_with(
+            "testorg", "test-repo", 42, Label.SELF_REVIEW, Label.REVIEW
+        )
+
+    @pytest.mark.asyncio
+    async def test_one_chunk_with_issues_sends_merged_issues_to_implementer(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        pipeline.config.self_review_chunk_tokens = 100
+        sample_ticket.pr_number = 10
+        sample_ticket.plan = "the plan"
+        mock_github.get_pr_diff = AsyncMock(return_value=self._large_diff())
+
+        async def review(agent, prompt, *args, **kwargs):
+            if agent == "otto-implementer":
+                return _agent_result("fixed")
+            if "d2/f2.py" in prompt:
+                return _agent_result(
+                    '{"verdict": "issues_found", "issues": [{"description": "off by one"}]}'
+                )
+            return _agent_result('{"verdict": "clean"}')
+
+        with patch("ottonate.pipeline.run_agent", AsyncMock(side_effect=review)) as run:
+            await pipeline._handle_self_review(sample_ticket, sample_rules)
+
+        fix_prompt = run.call_args_list[-1].args[1]
+        assert run.call_args_list[-1].args[0] == "otto-implementer"
+        assert "off by one" in fix_prompt
+        mock_github.swap_label.assert_any_call(
+            "testorg", "test-repo", 42, Label.SELF_REVIEW, Label.IMPLEMENTING
+        )
+
+    @pytest.mark.asyncio
+    async def test_small_diff_single_session(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        sample_ticket.pr_number = 10
+        sample_ticket.plan = "the plan"
+        mock_github.get_pr_diff = AsyncMock(return_value=self._large_diff())
+        run = AsyncMock(return_value=_agent_result('{"verdict": "clean"}'))
+
+        with patch("ottonate.pipeline.run_agent", run):
+            await pipeline._handle_self_review(sample_ticket, sample_rules)
+
+        assert run.call_count == 1
+        assert "part " not in run.call_args.args[1]
+
+
 class TestSpecReview:
     @pytest.mark.asyncio
     async def test_merged_pr_transitions_to_approved(
@@ -514,6 +763,95 @@ class TestCreateStoriesFromBacklog:
             "https://github.com/testorg/target-repo/issues/99",
         )
 
+    @pytest.mark.asyncio
+    async def test_parallel_creation_keeps_backlog_order(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        sample_ticket.project_id = "7"
+        stories = [{"title": f"Story {i}", "repo": "r", "description": ""} for i in range(4)]
+        mock_github.get_comments = AsyncMock(
+            return_value=[f"## Generated Backlog\n\n```json\n{json.dumps(stories)}\n```"]
+        )
+
+        async def _create(owner, repo, title, body, labels):
+            # Later stories finish first.
+            index = int(title.split()[-1])
+            await asyncio.sleep(0.01 * (4 - index))
+            return 100 + index
+
+        mock_github.create_issue = AsyncMock(side_effect=_create)
+        with patch.object(pipeline, "_enrich_story", return_value=None):
+            refs = await pipeline._create_stories_from_backlog(sample_ticket, sample_rules)
+
+        assert refs == [f"testorg/r#{100 + i}" for i in range(4)]
+
+    @pytest.mark.asyncio
+    async def test_retries_failed_creation(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        sample_ticket.project_id = "7"
+        mock_github.get_comments = AsyncMock(
+            return_value=['## Generated Backlog\n\n```json\n[{"title": "A"}]\n```']
+        )
+        mock_github.create_issue = AsyncMock(side_effect=[RuntimeError("502"), 5])
+        with (
+            patch.object(pipeline, "_enrich_story", return_value=None),
+            patch("ottonate.pipeline.STORY_RETRY_DELAY_S", 0),
+        ):
+            refs = await pipeline._create_stories_from_backlog(sample_ticket, sample_rules)
+
+        assert refs == ["testorg/test-repo#5"]
+        assert mock_github.create_issue.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_restart_does_not_duplicate_stories(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        sample_ticket.project_id = "7"
+        mock_github.get_comments = AsyncMock(
+            return_value=['## Generated Backlog\n\n```json\n[{"title": "A"}, {"title": "B"}]\n```']
+        )
+        pipeline.state.record_story(sample_ticket.issue_ref, 0, "testorg/test-repo#1", "A")
+        mock_github.create_issue = AsyncMock(return_value=2)
+        with patch.object(pipeline, "_enrich_story", return_value=None) as enrich:
+            refs = await pipeline._create_stories_from_backlog(sample_ticket, sample_rules)
+
+        assert refs == ["testorg/test-repo#1", "testorg/test-repo#2"]
+        mock_github.create_issue.assert_called_once()
+        assert enrich.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_batch_enrichment_falls_back_per_story(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        pipeline.config.story_enrichment_batch_size = 3
+        sample_ticket.project_id = "7"
+        stories = [{"title": t, "description": ""} for t in ("A", "B", "C")]
+        mock_github.get_comments = AsyncMock(
+            return_value=[f"## Generated Backlog\n\n```json\n{json.dumps(stories)}\n```"]
+        )
+        mock_github.get_file_content = AsyncMock(return_value="the spec")
+        mock_github.create_issue = AsyncMock(side_effect=[1, 2, 3])
+        batch = json.dumps(
+            [
+                {"index": 0, "title": "A+", "description": "a"},
+                {"index": 2, "title": "C+", "description": "c"},
+            ]
+        )
+        run = AsyncMock(return_value=_agent_result(batch))
+
+        with (
+            patch.object(pipeline, "_run", run),
+            patch.object(pipeline, "_enrich_story", return_value=None) as enrich,
+        ):
+            await pipeline._create_stories_from_backlog(sample_ticket, sample_rules)
+
+        run.assert_called_once()
+        assert "the spec" in run.call_args[0][1]
+        enrich.assert_called_once_with(stories[1])
+        titles = sorted(call.args[2] for call in mock_github.create_issue.call_args_list)
+        assert titles == ["A+", "B", "C+"]
+
 
 class TestGetPlan:
     @pytest.mark.asyncio
@@ -605,6 +943,18 @@ class TestHandleRetro:
         assert call_args[1] == "ottonate"
         assert "CI fixer" in call_args[2]
 
+    @pytest.mark.asyncio
+    async def test_deferred_when_github_budget_low(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        mock_github.budget.update("core", 5000, 100, time.time() + 600)
+
+        with patch("ottonate.pipeline.build_issue_metrics") as metrics:
+            await pipeline._handle_retro(sample_ticket, sample_rules)
+
+        metrics.assert_not_called()
+        mock_github.remove_label.assert_not_called()
+
 
 class TestParseSelfImprovement:
     def test_parses_json(self):
@@ -631,3 +981,251 @@ class TestRetryTracking:
     def test_separate_tickets(self, pipeline):
         pipeline._check_retries("T-1", "plan", 1)
         assert pipeline._check_retries("T-2", "plan", 1) is True
+
+    def test_survives_pipeline_restart(self, config, mock_github, tmp_path):
+        path = tmp_path / "state.sqlite"
+        first = Pipeline(config, mock_github, state=StateStore(path))
+        first._check_retries("T-1", "ci_fix", 1)
+        first.state.close()
+
+        second = Pipeline(config, mock_github, state=StateStore(path))
+        assert second._check_retries("T-1", "ci_fix", 1) is False
+
+
+class TestStatePersistence:
+    @pytest.mark.asyncio
+    async def test_stored_plan_skips_comment_scrape(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        sample_ticket.labels = {"otto", Label.SELF_REVIEW.value}
+        sample_ticket.pr_number = 10
+        pipeline.state.save_context(
+            Ticket(owner="testorg", repo="test-repo", issue_number=42, labels=set(), plan="p")
+        )
+        mock_github.get_pr_diff = AsyncMock(return_value="diff")
+
+        with patch.object(pipeline, "_run", return_value=_agent_result('{"verdict": "clean"}')):
+            await pipeline.handle(sample_ticket, sample_rules)
+
+        assert sample_ticket.plan == "p"
+        mock_github.get_comments.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_discovered_pr_number_is_persisted(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        sample_ticket.labels = {"otto", Label.PR.value}
+        mock_github.find_pr = AsyncMock(return_value=(55, "OPEN"))
+        mock_github.get_ci_status = AsyncMock(return_value=CIStatus.PENDING)
+
+        await pipeline.handle(sample_ticket, sample_rules)
+
+        fresh = Ticket(owner="testorg", repo="test-repo", issue_number=42, labels=set())
+        pipeline.state.load_context(fresh)
+        assert fresh.pr_number == 55
+
+    @pytest.mark.asyncio
+    async def test_closed_stored_pr_is_replaced(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        sample_ticket.labels = {"otto", Label.PR.value}
+        pipeline.state.save_context(
+            Ticket(owner="testorg", repo="test-repo", issue_number=42, labels=set(), pr_number=55)
+        )
+        mock_github.get_pr_state = AsyncMock(return_value="CLOSED")
+        mock_github.find_pr = AsyncMock(return_value=(56, "OPEN"))
+        mock_github.get_ci_status = AsyncMock(return_value=CIStatus.PENDING)
+
+        await pipeline.handle(sample_ticket, sample_rules)
+
+        assert mock_github.get_ci_status.call_args.args[2] == 56
+        fresh = Ticket(owner="testorg", repo="test-repo", issue_number=42, labels=set())
+        pipeline.state.load_context(fresh)
+        assert fresh.pr_number == 56
+
+    @pytest.mark.asyncio
+    async def test_closed_stored_pr_without_replacement_is_forgotten(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        sample_ticket.labels = {"otto", Label.PR.value}
+        pipeline.state.save_context(
+            Ticket(owner="testorg", repo="test-repo", issue_number=42, labels=set(), pr_number=55)
+        )
+        mock_github.get_pr_state = AsyncMock(return_value="CLOSED")
+        mock_github.find_pr = AsyncMock(return_value=(55, "CLOSED"))
+
+        await pipeline.handle(sample_ticket, sample_rules)
+
+        mock_github.get_ci_status.assert_not_called()
+        fresh = Ticket(owner="testorg", repo="test-repo", issue_number=42, labels=set())
+        pipeline.state.load_context(fresh)
+        assert fresh.pr_number is None
+        assert [h["event"] for h in pipeline.state.history(sample_ticket.issue_ref)] == ["stuck"]
+
+    @pytest.mark.asyncio
+    async def test_stuck_recorded_in_history(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        sample_ticket.labels = {"otto", Label.PR.value}
+        mock_github.find_pr = AsyncMock(return_value=(None, None))
+
+        await pipeline.handle(sample_ticket, sample_rules)
+
+        events = [h["event"] for h in pipeline.state.history(sample_ticket.issue_ref)]
+        assert events == ["stuck"]
+
+
+class TestAgentSlots:
+    @pytest.mark.asyncio
+    async def test_agent_runs_capped_by_max_concurrent_tickets(self, config, mock_github):
+        config.max_concurrent_tickets = 2
+        pipeline = Pipeline(config, mock_github)
+        active = 0
+        peak = 0
+
+        async def _fake_run_agent(*args, **kwargs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return _agent_result()
+
+        with patch("ottonate.pipeline.run_agent", side_effect=_fake_run_agent):
+            await asyncio.gather(*(pipeline._run("otto-planner", "p", "/tmp") for _ in range(5)))
+
+        assert peak == 2
+
+
+class TestRunAgent:
+    @pytest.mark.asyncio
+    async def test_scans_json_as_text_streams(self):
+        async def _query(prompt, options):
+            yield AssistantMessage(content=[TextBlock('Reviewed. {"verdict": ')], model="m")
+            yield AssistantMessage(content=[TextBlock('"clean"} done')], model="m")
+            yield ResultMessage(
+                subtype="success",
+                duration_ms=1,
+                duration_api_ms=1,
+                is_error=False,
+                num_turns=2,
+                session_id="s",
+            )
+
+        with patch("ottonate.pipeline.query", _query):
+            result = await run_agent("otto-reviewer", "review", "/tmp")
+
+        assert result.json_values == [{"verdict": "clean"}]
+        assert _parse_review_verdict(result.text, result.json_values) == "clean"
+
+    @pytest.mark.asyncio
+    async def test_stops_once_outcome_is_final(self):
+        consumed = []
+
+        async def _query(prompt, options):
+            yield SystemMessage(subtype="init", data={"session_id": "sess-1"})
+            for text in ('Looks fine. {"verdict": "pass"}', "Let me double-check..."):
+                consumed.append(text)
+                yield AssistantMessage(content=[TextBlock(text)], model="m")
+
+        with patch("ottonate.pipeline.query", _query):
+            result = await run_agent(
+                "otto-quality-gate",
+                "gate",
+                "/tmp",
+                stop_when=lambda text, values: any("verdict" in v for v in values),
+            )
+
+        assert result.stopped_early
+        assert len(consumed) == 1
+        assert result.session_id == "sess-1"
+        assert _parse_quality_verdict(result.text, result.json_values) == "pass"
+
+    @pytest.mark.asyncio
+    async def test_early_stop_reports_turns_and_usage_without_result(self):
+        usage = {"input_tokens": 100, "output_tokens": 20}
+
+        async def _query(prompt, options):
+            yield AssistantMessage(
+                content=[TextBlock("Checking.")], model="m", usage=usage, message_id="m1"
+            )
+            yield AssistantMessage(
+                content=[TextBlock("Still checking."), TextBlock("More.")],
+                model="m",
+                usage=usage,
+                message_id="m2",
+            )
+            yield AssistantMessage(
+                content=[TextBlock('{"verdict": "pass"}')],
+                model="m",
+                usage=usage,
+                message_id="m2",
+            )
+            yield AssistantMessage(content=[TextBlock("unreached")], model="m")
+
+        limiter = AgentRateLimiter(default_session_tokens=1_000)
+        with (
+            patch("ottonate.pipeline.query", _query),
+            patch.object(limiter, "record_usage") as record,
+        ):
+            result = await run_agent(
+                "otto-quality-gate",
+                "gate",
+                "/tmp",
+                limiter=limiter,
+                stop_when=lambda text, values: bool(values),
+            )
+
+        assert result.stopped_early
+        assert result.turns_used == 2
+        assert result.cost_usd is None
+        record.assert_called_once_with(240, 1_000)
+
+    @pytest.mark.asyncio
+    async def test_duration_excludes_limiter_wait(self):
+        async def _query(prompt, options):
+            yield AssistantMessage(content=[TextBlock("done")], model="m")
+
+        async def _slow_acquire():
+            await asyncio.sleep(0.2)
+            return 0
+
+        limiter = AgentRateLimiter()
+        with (
+            patch("ottonate.pipeline.query", _query),
+            patch.object(limiter, "acquire", _slow_acquire),
+        ):
+            result = await run_agent("otto-reviewer", "review", "/tmp", limiter=limiter)
+
+        assert result.duration_s < 0.1
+
+    @pytest.mark.asyncio
+    async def test_early_stop_without_usage_settles_reservation_as_unknown(self):
+        async def _query(prompt, options):
+            yield AssistantMessage(content=[TextBlock('{"verdict": "pass"}')], model="m")
+
+        limiter = AgentRateLimiter(default_session_tokens=1_000)
+        with (
+            patch("ottonate.pipeline.query", _query),
+            patch.object(limiter, "record_usage") as record,
+        ):
+            result = await run_agent(
+                "otto-quality-gate", "gate", "/tmp", limiter=limiter, stop_when=lambda t, v: True
+            )
+
+        assert result.turns_used == 1
+        record.assert_called_once_with(None, 1_000)
+
+    @pytest.mark.asyncio
+    async def test_gate_runs_with_completion_check(
+        self, pipeline, sample_ticket, sample_rules, mock_github
+    ):
+        sample_ticket.plan = "the plan"
+        with patch("ottonate.pipeline.run_agent", new_callable=AsyncMock) as run:
+            run.return_value = _agent_result('{"verdict": "pass"}')
+            await pipeline._handle_plan_review(sample_ticket, sample_rules)
+            assert run.call_args.kwargs["stop_when"] is not None
+
+            pipeline.config.agent_early_stop = False
+            await pipeline._handle_plan_review(sample_ticket, sample_rules)
+            assert run.call_args.kwargs["stop_when"] is None
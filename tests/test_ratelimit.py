@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from ottonate.ratelimit import AgentRateLimiter, TokenBucket, usage_tokens
+
+
+class TestTokenBucket:
+    def test_unlimited_never_waits(self):
+        bucket = TokenBucket(None)
+        bucket.take(1_000_000)
+        assert bucket.wait_time(1_000_000) == 0
+
+    def test_wait_after_drain(self):
+        bucket = TokenBucket(60)
+        bucket.take(60)
+        assert bucket.wait_time(1) == pytest.approx(1, abs=0.05)
+
+    def test_oversized_request_capped_at_capacity(self):
+        bucket = TokenBucket(10)
+        assert bucket.wait_time(1_000) == 0
+
+
+class TestAgentRateLimiter:
+    @pytest.mark.asyncio
+    async def test_acquire_reserves_estimate(self):
+        limiter = AgentRateLimiter(requests_per_min=10, tokens_per_min=1_000_000)
+        reserved = await limiter.acquire()
+        assert reserved == limiter.estimated_session_tokens
+        assert limiter.requests.tokens == pytest.approx(9, abs=0.01)
+
+    def test_record_usage_updates_estimate(self):
+        limiter = AgentRateLimiter(default_session_tokens=1_000)
+        limiter.record_usage(3_000, reserved=1_000)
+        assert limiter.estimated_session_tokens == 2_000
+
+    def test_unknown_usage_keeps_reservation_and_estimate(self):
+        limiter = AgentRateLimiter(tokens_per_min=10_000, default_session_tokens=1_000)
+        before = limiter.tokens.tokens
+        limiter.record_usage(None, reserved=1_000)
+        assert limiter.estimated_session_tokens == 1_000
+        assert limiter.tokens.tokens == pytest.approx(before, abs=1)
+        assert sum(tokens for _, tokens in limiter._usage) == 1_000
+
+    def test_rate_limit_halves_configured_rate_once_per_burst(self):
+        limiter = AgentRateLimiter(requests_per_min=20)
+        limiter.on_rate_limit(30)
+        limiter.on_rate_limit(30)
+        assert limiter.requests.rate_per_min == 10
+        assert limiter.paused_until > time.monotonic()
+
+    @pytest.mark.asyncio
+    async def test_unconfigured_rate_tuned_from_observed(self):
+        limiter = AgentRateLimiter()
+        for _ in range(8):
+            await limiter.acquire()
+        limiter.on_rate_limit(0)
+        assert limiter.requests.rate_per_min == 4
+        assert limiter.tokens.rate_per_min is None
+
+    def test_success_recovers_to_ceiling(self):
+        limiter = AgentRateLimiter(requests_per_min=20)
+        limiter.on_rate_limit(0)
+        for _ in range(20):
+            limiter.on_success()
+        assert limiter.requests.rate_per_min == 20
+
+    @pytest.mark.asyncio
+    async def test_pause_delays_acquire(self):
+        limiter = AgentRateLimiter()
+        limiter.paused_until = time.monotonic() + 0.05
+        start = time.monotonic()
+        await limiter.acquire()
+        assert time.monotonic() - start >= 0.04
+
+
+def test_usage_tokens_excludes_cache_reads():
+    usage = {
+        "input_tokens": 100,
+        "output_tokens": 50,
+        "cache_creation_input_tokens": 10,
+        "cache_read_input_tokens": 10_000,
+    }
+    assert usage_tokens(usage) == 160
+    assert usage_tokens(None) == 0
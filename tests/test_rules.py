@@ -8,6 +8,7 @@ from ottonate.config import OttonateConfig
 from ottonate.github import GitHubClient
 from ottonate.rules import (
     ResolvedRules,
+    RulesCache,
     _merge_agent_context,
     _merge_config,
     _parse_repo_catalog,
@@ -182,3 +183,96 @@ class TestLoadRules:
         rules = await load_rules("testorg", "my-repo", config, mock_github)
         assert "Microservices" in rules.architecture_context
         assert len(rules.repo_catalog) >= 1
+
+    @pytest.mark.asyncio
+    async def test_scheduling_caps_from_config(self, config, mock_github):
+        async def _mock_content(owner, repo, path, ref="main"):
+            if repo == "engineering" and path == ".ottonate/config.yml":
+                return "scheduling:\n  max_concurrent: 3\n  weight: 2"
+            if repo == "my-repo" and path == ".ottonate/config.yml":
+                return "scheduling:\n  max_concurrent: 1"
+            return None
+
+        mock_github.get_file_content = AsyncMock(side_effect=_mock_content)
+        rules = await load_rules("testorg", "my-repo", config, mock_github)
+        assert rules.max_concurrent == 1
+        assert rules.share_weight == 2
+
+    @pytest.mark.asyncio
+    async def test_invalid_scheduling_values_ignored(self, config, mock_github):
+        async def _mock_content(owner, repo, path, ref="main"):
+            if repo == "my-repo" and path == ".ottonate/config.yml":
+                return "scheduling:\n  max_concurrent: lots\n  weight: -1"
+            return None
+
+        mock_github.get_file_content = AsyncMock(side_effect=_mock_content)
+        rules = await load_rules("testorg", "my-repo", config, mock_github)
+        assert rules.max_concurrent == 0
+        assert rules.share_weight == 1.0
+
+
+class TestRulesCache:
+    @pytest.fixture
+    def github(self, mock_github):
+        mock_github.get_file_content = AsyncMock(return_value=None)
+        mock_github.get_default_branch = AsyncMock(return_value="main")
+        mock_github.get_branch_sha = AsyncMock(
+            side_effect=lambda owner, repo, branch: f"{repo}-sha1"
+        )
+        return mock_github
+
+    @pytest.mark.asyncio
+    async def test_reuses_rules_within_ttl(self, config, github):
+        cache = RulesCache(ttl_s=300)
+        first = await load_rules("testorg", "my-repo", config, github, cache=cache)
+        fetches = github.get_file_content.await_count
+        second = await load_rules("testorg", "my-repo", config, github, cache=cache)
+
+        assert second is first
+        assert github.get_file_content.await_count == fetches
+        assert github.get_branch_sha.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_org_layer_shared_across_repos(self, config, github):
+        cache = RulesCache(ttl_s=300)
+        await load_rules("testorg", "repo-a", config, github, cache=cache)
+        await load_rules("testorg", "repo-b", config, github, cache=cache)
+
+        eng_fetches = [
+            c for c in github.get_file_content.await_args_list if c.args[1] == "engineering"
+        ]
+        assert len(eng_fetches) == 4
+        assert all(c.args[3] == "engineering-sha1" for c in eng_fetches)
+
+    @pytest.mark.asyncio
+    async def test_unchanged_sha_after_ttl_skips_refetch(self, config, github):
+        cache = RulesCache(ttl_s=0)
+        await load_rules("testorg", "my-repo", config, github, cache=cache)
+        fetches = github.get_file_content.await_count
+        await load_rules("testorg", "my-repo", config, github, cache=cache)
+
+        assert github.get_file_content.await_count == fetches
+        assert github.get_branch_sha.await_count == 4
+
+    @pytest.mark.asyncio
+    async def test_engineering_sha_change_invalidates(self, config, github):
+        cache = RulesCache(ttl_s=0)
+        await load_rules("testorg", "my-repo", config, github, cache=cache)
+
+        github.get_branch_sha = AsyncMock(
+            side_effect=lambda owner, repo, branch: (
+                f"{repo}-sha2" if repo == "engineering" else f"{repo}-sha1"
+            )
+        )
+
+        async def _content(owner, repo, path, ref="main"):
+            if repo == "engineering" and path == ".ottonate/config.yml":
+                return "notify_team: new-team"
+            return None
+
+        github.get_file_content = AsyncMock(side_effect=_content)
+        rules = await load_rules("testorg", "my-repo", config, github, cache=cache)
+
+        assert rules.notify_team == "new-team"
+        refs = {c.args[3] for c in github.get_file_content.await_args_list}
+        assert refs == {"engineering-sha2", "my-repo-sha1"}
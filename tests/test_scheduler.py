@@ -5,15 +5,17 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from ottonate.models import Label
+from ottonate.ci_watch import CIWatcher
+from ottonate.models import CIStatus, Label, Ticket, TicketSnapshot
+from ottonate.rules import ResolvedRules
 from ottonate.scheduler import Scheduler
 
 
 @pytest.fixture
 def scheduler(config):
-    with patch("ottonate.scheduler.GitHubClient") as mock_gh_cls:
+    with patch("ottonate.scheduler.create_github_client") as mock_create_gh:
         s = Scheduler(config)
-        s.github = mock_gh_cls.return_value
+        s.github = mock_create_gh.return_value
         s.pipeline = MagicMock()
         s.pipeline.handle = AsyncMock()
         s.pipeline.handle_new = AsyncMock()
@@ -82,3 +84,317 @@ class TestPollAndDispatch:
 
         await scheduler._poll_and_dispatch()
         scheduler.github.search_issues.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_attaches_batched_snapshots(self, scheduler):
+        snapshot = TicketSnapshot(body="desc", pr_number=7)
+        scheduler.github.search_issues = AsyncMock(
+            return_value=[
+                {
+                    "repository": {"name": "test-repo"},
+                    "number": 42,
+                    "labels": [{"name": "otto"}, {"name": Label.PR.value}],
+                    "title": "test",
+                },
+                {
+                    "repository": {"name": "test-repo"},
+                    "number": 43,
+                    "labels": [{"name": "otto"}, {"name": Label.PR.value}],
+                    "title": "other",
+                },
+            ]
+        )
+        scheduler.github.get_ticket_snapshots = AsyncMock(
+            return_value={("test-repo", 42): snapshot}
+        )
+        scheduler.config.idea_poll_enabled = False
+        dispatched = []
+
+        async def _capture(ticket, *, new_ticket=False):
+            dispatched.append(ticket)
+
+        with patch.object(scheduler, "_handle_ticket", side_effect=_capture):
+            await scheduler._poll_and_dispatch()
+            await scheduler.dispatcher.join()
+
+        scheduler.github.get_ticket_snapshots.assert_awaited_once_with(
+            "testorg", [("test-repo", 42), ("test-repo", 43)], batch_size=20
+        )
+        by_number = {t.issue_number: t for t in dispatched}
+        assert by_number[42].snapshot is snapshot
+        assert by_number[43].snapshot is None
+
+    @pytest.mark.asyncio
+    async def test_snapshot_failure_still_dispatches(self, scheduler):
+        scheduler.github.search_issues = AsyncMock(
+            return_value=[
+                {
+                    "repository": {"name": "test-repo"},
+                    "number": 42,
+                    "labels": [{"name": "otto"}, {"name": Label.PR.value}],
+                    "title": "test",
+                }
+            ]
+        )
+        scheduler.github.get_ticket_snapshots = AsyncMock(side_effect=RuntimeError("boom"))
+        scheduler.config.idea_poll_enabled = False
+        dispatched = []
+
+        async def _capture(ticket, *, new_ticket=False):
+            dispatched.append(ticket)
+
+        with patch.object(scheduler, "_handle_ticket", side_effect=_capture):
+            await scheduler._poll_and_dispatch()
+            await scheduler.dispatcher.join()
+
+        assert [t.issue_number for t in dispatched] == [42]
+        assert dispatched[0].snapshot is None
+
+
+class TestCIWatch:
+    @staticmethod
+    def _pr_issue() -> list[dict]:
+        return [
+            {
+                "repository": {"name": "test-repo"},
+                "number": 42,
+                "labels": [{"name": "otto"}, {"name": Label.PR.value}],
+                "title": "test",
+            }
+        ]
+
+    async def _poll(self, scheduler) -> list[Ticket]:
+        dispatched = []
+
+        async def _capture(ticket, *, new_ticket=False):
+            dispatched.append(ticket)
+
+        with patch.object(scheduler, "_handle_ticket", side_effect=_capture):
+            await scheduler._poll_and_dispatch()
+            await scheduler.dispatcher.join()
+        return dispatched
+
+    @pytest.mark.asyncio
+    async def test_waiting_pr_skipped_without_github_calls(self, scheduler):
+        scheduler.config.idea_poll_enabled = False
+        scheduler.github.search_issues = AsyncMock(return_value=self._pr_issue())
+        scheduler.github.get_ticket_snapshots = AsyncMock(return_value={})
+        scheduler.ci_watch.watch("testorg/test-repo#42", "abc")
+
+        assert await self._poll(scheduler) == []
+        scheduler.github.get_ticket_snapshots.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_due_pr_still_pending_not_dispatched(self, scheduler):
+        scheduler.config.idea_poll_enabled = False
+        scheduler.github.search_issues = AsyncMock(return_value=self._pr_issue())
+        snapshot = TicketSnapshot(pr_number=7, pr_head_sha="abc", ci_status=CIStatus.PENDING)
+        scheduler.github.get_ticket_snapshots = AsyncMock(
+            return_value={("test-repo", 42): snapshot}
+        )
+        scheduler.ci_watch = CIWatcher(initial_delay_s=0)
+        scheduler.ci_watch.watch("testorg/test-repo#42", "abc")
+
+        assert await self._poll(scheduler) == []
+        assert scheduler.ci_watch.watching("testorg/test-repo#42")
+
+    @pytest.mark.asyncio
+    async def test_due_pr_with_finished_ci_dispatched(self, scheduler):
+        scheduler.config.idea_poll_enabled = False
+        scheduler.github.search_issues = AsyncMock(return_value=self._pr_issue())
+        snapshot = TicketSnapshot(pr_number=7, pr_head_sha="abc", ci_status=CIStatus.PASSED)
+        scheduler.github.get_ticket_snapshots = AsyncMock(
+            return_value={("test-repo", 42): snapshot}
+        )
+        scheduler.ci_watch = CIWatcher(initial_delay_s=0)
+        scheduler.ci_watch.watch("testorg/test-repo#42", "abc")
+
+        assert [t.issue_number for t in await self._poll(scheduler)] == [42]
+
+    @pytest.mark.asyncio
+    async def test_watch_dropped_when_ticket_leaves_pr_stage(self, scheduler):
+        scheduler.config.idea_poll_enabled = False
+        issues = self._pr_issue()
+        issues[0]["labels"] = [{"name": "otto"}, {"name": Label.SELF_REVIEW.value}]
+        scheduler.github.search_issues = AsyncMock(return_value=issues)
+        scheduler.github.get_ticket_snapshots = AsyncMock(return_value={})
+        scheduler.ci_watch.watch("testorg/test-repo#42", "abc")
+
+        assert [t.issue_number for t in await self._poll(scheduler)] == [42]
+        assert not scheduler.ci_watch.watching("testorg/test-repo#42")
+
+    @pytest.mark.asyncio
+    async def test_webhook_enqueue_wakes_waiting_pr(self, scheduler):
+        scheduler.ci_watch.watch("testorg/test-repo#42", "abc")
+        scheduler.github.get_issue = AsyncMock(
+            return_value={
+                "title": "t",
+                "state": "OPEN",
+                "labels": [{"name": "otto"}, {"name": Label.PR.value}],
+            }
+        )
+        with patch.object(scheduler, "_handle_ticket", new_callable=AsyncMock):
+            assert await scheduler.enqueue("testorg", "test-repo", 42) == 1
+            await scheduler.dispatcher.join()
+
+        assert not scheduler.ci_watch.watching("testorg/test-repo#42")
+
+
+class TestEnqueue:
+    @pytest.mark.asyncio
+    async def test_dispatches_actionable_ticket(self, scheduler):
+        scheduler.github.get_issue = AsyncMock(
+            return_value={
+                "title": "t",
+                "state": "OPEN",
+                "labels": [{"name": "otto"}, {"name": Label.PR.value}],
+            }
+        )
+        with patch.object(scheduler, "_handle_ticket", new_callable=AsyncMock) as handle:
+            assert await scheduler.enqueue("testorg", "test-repo", 42) == 1
+            await scheduler.dispatcher.join()
+
+        ticket = handle.call_args.args[0]
+        assert ticket.issue_ref == "testorg/test-repo#42"
+        assert handle.call_args.kwargs == {"new_ticket": False}
+
+    @pytest.mark.asyncio
+    async def test_ignores_issue_without_entry_label(self, scheduler):
+        scheduler.github.get_issue = AsyncMock(
+            return_value={"title": "t", "state": "OPEN", "labels": [{"name": "bug"}]}
+        )
+        with patch.object(scheduler, "_handle_ticket", new_callable=AsyncMock) as handle:
+            assert await scheduler.enqueue("testorg", "test-repo", 42) == 0
+        handle.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_in_flight_ticket_is_requeued_after_run(self, scheduler):
+        scheduler._in_flight.add("testorg/test-repo#42")
+        scheduler.github.get_issue = AsyncMock()
+
+        assert await scheduler.enqueue("testorg", "test-repo", 42) == 0
+        scheduler.github.get_issue.assert_not_called()
+        assert "testorg/test-repo#42" in scheduler._pending
+
+    @pytest.mark.asyncio
+    async def test_pending_ticket_requeued_through_dispatcher(self, scheduler):
+        scheduler.github.get_issue = AsyncMock(
+            return_value={
+                "title": "t",
+                "state": "OPEN",
+                "labels": [{"name": "otto"}, {"name": Label.REVIEW.value}],
+            }
+        )
+        ticket = Ticket(
+            owner="testorg", repo="test-repo", issue_number=42, labels={"otto", Label.PR.value}
+        )
+
+        async def _handle(ticket, rules):
+            if scheduler.pipeline.handle.await_count == 1:
+                await scheduler.enqueue("testorg", "test-repo", 42)
+
+        scheduler.pipeline.handle = AsyncMock(side_effect=_handle)
+        with (
+            patch.object(scheduler, "_ensure_workspace", new_callable=AsyncMock),
+            patch("ottonate.scheduler.load_rules", AsyncMock(return_value=ResolvedRules())),
+        ):
+            scheduler._spawn(ticket, new_ticket=False)
+            await scheduler.dispatcher.join()
+
+        assert scheduler.pipeline.handle.await_count == 2
+        rerun = scheduler.pipeline.handle.await_args.args[0]
+        assert rerun.agent_label == Label.REVIEW
+        assert not scheduler._pending
+
+
+class TestFairShare:
+    @pytest.mark.asyncio
+    async def test_repo_cap_from_rules_applied_to_flow(self, scheduler):
+        rules = ResolvedRules(max_concurrent=1, share_weight=2)
+        handled = []
+
+        async def _capture(ticket, *, new_ticket=False):
+            handled.append(ticket.issue_number)
+
+        with (
+            patch.object(scheduler._rules_cache, "peek", return_value=rules),
+            patch.object(scheduler, "_handle_ticket", side_effect=_capture),
+        ):
+            for number in (1, 2):
+                scheduler._spawn(
+                    Ticket(owner="testorg", repo="test-repo", issue_number=number, labels={"otto"}),
+                    new_ticket=True,
+                )
+            await scheduler.dispatcher.join()
+
+        flow = scheduler.dispatcher._flows["testorg/test-repo"]
+        assert (flow.max_running, flow.weight) == (1, 2)
+        assert handled == [1, 2]
+
+
+class TestLeases:
+    @pytest.mark.asyncio
+    async def test_skips_ticket_leased_by_other_worker(self, scheduler):
+        scheduler.leases.backend.acquire("testorg/test-repo#42", "other-worker", 60)
+        scheduler.github.get_issue = AsyncMock(
+            return_value={
+                "title": "t",
+                "state": "OPEN",
+                "labels": [{"name": "otto"}, {"name": Label.PR.value}],
+            }
+        )
+        with patch.object(scheduler, "_handle_ticket", new_callable=AsyncMock) as handle:
+            assert await scheduler.enqueue("testorg", "test-repo", 42) == 0
+        handle.assert_not_called()
+        assert "testorg/test-repo#42" not in scheduler._in_flight
+
+    @pytest.mark.asyncio
+    async def test_lease_kept_after_run(self, scheduler):
+        scheduler.pipeline.handle = AsyncMock()
+        ticket = Ticket(
+            owner="testorg", repo="test-repo", issue_number=42, labels={"otto", Label.PR.value}
+        )
+        with (
+            patch("ottonate.scheduler.load_rules", new_callable=AsyncMock),
+            patch.object(scheduler, "_ensure_workspace", new_callable=AsyncMock),
+        ):
+            assert scheduler._spawn(ticket, new_ticket=False)
+            await scheduler.dispatcher.join()
+
+        assert scheduler.leases.held == {"testorg/test-repo#42"}
+        assert "testorg/test-repo#42" not in scheduler._in_flight
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "issues",
+        [
+            [],  # closed or entry label removed
+            [
+                {
+                    "repository": {"name": "test-repo"},
+                    "number": 42,
+                    "labels": [{"name": "otto"}, {"name": Label.STUCK.value}],
+                    "title": "t",
+                }
+            ],
+        ],
+    )
+    async def test_poll_releases_lease_of_idle_ticket(self, scheduler, issues):
+        scheduler.config.idea_poll_enabled = False
+        scheduler.leases.acquire("testorg/test-repo#42")
+        scheduler.leases.acquire("testorg/test-repo#43")
+        scheduler.github.search_issues = AsyncMock(
+            return_value=[
+                *issues,
+                {
+                    "repository": {"name": "test-repo"},
+                    "number": 43,
+                    "labels": [{"name": "otto"}, {"name": Label.IMPLEMENTING.value}],
+                    "title": "busy",
+                },
+            ]
+        )
+
+        await scheduler._poll_and_dispatch()
+
+        assert scheduler.leases.held == {"testorg/test-repo#43"}
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import pytest
+
+from ottonate.models import Ticket
+from ottonate.state import StateStore
+
+
+@pytest.fixture
+def store():
+    s = StateStore()
+    yield s
+    s.close()
+
+
+def _ticket(**kwargs) -> Ticket:
+    return Ticket(owner="o", repo="r", issue_number=1, labels=set(), **kwargs)
+
+
+class TestTicketContext:
+    def test_round_trip(self, store):
+        store.save_context(_ticket(pr_number=7, plan="the plan"))
+        ticket = _ticket()
+        store.load_context(ticket)
+        assert ticket.pr_number == 7
+        assert ticket.plan == "the plan"
+        assert ticket.spec_pr_number is None
+
+    def test_unset_fields_keep_stored_values(self, store):
+        store.save_context(_ticket(pr_number=7))
+        store.save_context(_ticket(spec_pr_number=3))
+        ticket = _ticket()
+        store.load_context(ticket)
+        assert (ticket.pr_number, ticket.spec_pr_number) == (7, 3)
+
+    def test_load_does_not_override_live_values(self, store):
+        store.save_context(_ticket(pr_number=7))
+        ticket = _ticket(pr_number=9)
+        store.load_context(ticket)
+        assert ticket.pr_number == 9
+
+    def test_clear_forgets_stored_field(self, store):
+        store.save_context(_ticket(pr_number=7, plan="the plan"))
+        store.clear_context("o/r#1", "pr_number")
+        ticket = _ticket()
+        store.load_context(ticket)
+        assert ticket.pr_number is None
+        assert ticket.plan == "the plan"
+        with pytest.raises(ValueError):
+            store.clear_context("o/r#1", "labels")
+
+
+class TestAttemptsAndHistory:
+    def test_increment(self, store):
+        assert store.increment_attempt("o/r#1", "ci_fix") == 1
+        assert store.increment_attempt("o/r#1", "ci_fix") == 2
+        assert store.increment_attempt("o/r#1", "plan") == 1
+        assert store.attempts("o/r#1") == {"ci_fix": 2, "plan": 1}
+
+    def test_history_in_order(self, store):
+        store.record("o/r#1", "planning", "completed")
+        store.record("o/r#1", "stuck", "stuck", "no plan")
+        events = [(h["stage"], h["event"], h["detail"]) for h in store.history("o/r#1")]
+        assert events == [("planning", "completed", ""), ("stuck", "stuck", "no plan")]
+
+    def test_survives_restart(self, tmp_path):
+        path = tmp_path / "state" / "state.sqlite"
+        first = StateStore(path)
+        first.increment_attempt("o/r#1", "review")
+        first.save_context(_ticket(plan="p"))
+        first.close()
+
+        second = StateStore(path)
+        assert second.increment_attempt("o/r#1", "review") == 2
+        ticket = _ticket()
+        second.load_context(ticket)
+        assert ticket.plan == "p"
+        second.close()
+
+
+class TestSessions:
+    def test_latest_session_per_stage(self, store):
+        assert store.session("o/r#1", "planning") is None
+        store.save_session("o/r#1", "planning", "a")
+        store.save_session("o/r#1", "planning", "b")
+        store.save_session("o/r#1", "ci_fix", "c")
+        assert store.session("o/r#1", "planning") == "b"
+        assert store.session("o/r#1", "ci_fix") == "c"
+
+
+class TestStories:
+    def test_records_filed_stories(self, store):
+        store.record_story("o/r#1", 0, "o/a#10", "A")
+        store.record_story("o/r#1", 2, "o/b#11", "C")
+        store.record_story("o/r#2", 0, "o/a#12", "X")
+        assert store.created_stories("o/r#1") == {0: ("o/a#10", "A"), 2: ("o/b#11", "C")}
+
+
+class TestLabelSync:
+    def test_synced_only_at_recorded_version(self, store):
+        assert not store.labels_synced("o/r", "v1")
+        store.mark_labels_synced("o/r", "v1")
+        assert store.labels_synced("o/r", "v1")
+        assert not store.labels_synced("o/r", "v2")
+        assert not store.labels_synced("o/other", "v1")
@@ -0,0 +1,134 @@
+"""Tests for the webhook receiver, driven by recorded GitHub payloads."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ottonate.dispatch import PoolStats
+from ottonate.webhooks import create_webhook_app, parse_event, sign, verify_signature
+
+FIXTURES = Path(__file__).parent / "fixtures" / "webhooks"
+SECRET = "s3cret"
+
+
+def _payload(name: str) -> dict:
+    return json.loads((FIXTURES / f"{name}.json").read_text())
+
+
+@pytest.fixture
+def scheduler(config):
+    s = MagicMock()
+    s.config = config
+    s.enqueue = AsyncMock(return_value=1)
+    s.enqueue_idea_pr = AsyncMock(return_value=1)
+    return s
+
+
+@pytest.fixture
+def client(scheduler):
+    return TestClient(create_webhook_app(scheduler, SECRET))
+
+
+def _post(client, event: str, name: str, secret: str = SECRET):
+    body = (FIXTURES / f"{name}.json").read_bytes()
+    return client.post(
+        "/webhook",
+        content=body,
+        headers={
+            "Content-Type": "application/json",
+            "X-GitHub-Event": event,
+            "X-Hub-Signature-256": sign(secret, body),
+        },
+    )
+
+
+class TestVerifySignature:
+    def test_valid(self):
+        assert verify_signature(SECRET, b"{}", sign(SECRET, b"{}"))
+
+    def test_wrong_secret(self):
+        assert not verify_signature(SECRET, b"{}", sign("other", b"{}"))
+
+    def test_missing_secret_rejects(self):
+        assert not verify_signature("", b"{}", sign("", b"{}"))
+
+
+class TestParseEvent:
+    def test_issue_labeled(self):
+        event = parse_event("issues", _payload("issues_labeled"))
+        assert event.tickets == [("testorg", "test-repo", 42)]
+
+    def test_pr_maps_branch_and_closing_refs(self):
+        event = parse_event("pull_request", _payload("pull_request_opened"))
+        assert event.tickets == [("testorg", "test-repo", 42), ("testorg", "test-repo", 43)]
+        assert event.idea_prs == []
+
+    def test_check_suite_completed(self):
+        event = parse_event("check_suite", _payload("check_suite_completed"))
+        assert event.tickets == [("testorg", "test-repo", 42)]
+
+    def test_check_suite_requested_ignored(self):
+        payload = _payload("check_suite_completed")
+        payload["action"] = "requested"
+        assert parse_event("check_suite", payload).tickets == []
+
+    def test_engineering_repo_pr_is_idea_candidate(self):
+        payload = _payload("pull_request_opened")
+        payload["repository"]["name"] = "engineering"
+        event = parse_event("pull_request", payload, engineering_repo="engineering")
+        assert event.idea_prs == [("testorg", "engineering", 77)]
+
+    def test_issue_event_for_pull_request_ignored(self):
+        payload = _payload("issues_labeled")
+        payload["issue"]["pull_request"] = {"url": "..."}
+        assert parse_event("issues", payload).tickets == []
+
+
+class TestReceiver:
+    def test_enqueues_affected_ticket(self, client, scheduler):
+        response = _post(client, "issues", "issues_labeled")
+        assert response.status_code == 202
+        assert response.json() == {"queued": 1}
+        scheduler.enqueue.assert_awaited_once_with("testorg", "test-repo", 42)
+
+    def test_review_event(self, client, scheduler):
+        response = _post(client, "pull_request_review", "pull_request_review_submitted")
+        assert response.status_code == 202
+        scheduler.enqueue.assert_awaited_once_with("testorg", "test-repo", 42)
+
+    def test_rejects_bad_signature(self, client, scheduler):
+        response = _post(client, "issues", "issues_labeled", secret="wrong")
+        assert response.status_code == 401
+        scheduler.enqueue.assert_not_called()
+
+    def test_ping(self, client, scheduler):
+        body = b'{"zen": "Keep it logically awesome."}'
+        response = client.post(
+            "/webhook",
+            content=body,
+            headers={"X-GitHub-Event": "ping", "X-Hub-Signature-256": sign(SECRET, body)},
+        )
+        assert response.status_code == 202
+        scheduler.enqueue.assert_not_called()
+
+    def test_queue_stats(self, client, scheduler):
+        scheduler.dispatcher.stats.return_value = {
+            "agent": PoolStats(
+                workers=3,
+                queued=2,
+                running=3,
+                completed=7,
+                oldest_wait_s=4.5,
+                avg_wait_s=1.0,
+                max_wait_s=9.0,
+            )
+        }
+        scheduler.dispatcher.flow_stats.return_value = {}
+        response = client.get("/queue")
+        assert response.status_code == 200
+        assert response.json()["pools"]["agent"]["queued"] == 2
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import os
+import subprocess
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+
+from ottonate.config import OttonateConfig
+from ottonate.github import GitHubClient
+from ottonate.models import TicketSnapshot
+from ottonate.workspaces import WorkspaceManager, _run
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    repo = tmp_path / "upstream"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "main")
+    (repo / "README.md").write_text("v1\n")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-q", "-m", "init")
+    return repo
+
+
+@pytest.fixture
+def manager(tmp_path, upstream, monkeypatch):
+    config = OttonateConfig(github_org="o", workspace_dir=tmp_path / "ws")
+    m = WorkspaceManager(config)
+    clones: list[str] = []
+
+    async def _clone_bare(full_repo: str, dest: Path) -> None:
+        clones.append(full_repo)
+        await _run("git", "clone", "-q", "--bare", str(upstream), str(dest))
+
+    monkeypatch.setattr(m, "_clone_bare", _clone_bare)
+    m.clones = clones
+    return m
+
+
+class TestWorktrees:
+    @pytest.mark.asyncio
+    async def test_tickets_share_one_mirror(self, manager):
+        first = manager.ticket_path("o", "r", 1)
+        second = manager.ticket_path("o", "r", 2)
+
+        assert await manager.ensure("o", "r", first) is True
+        assert await manager.ensure("o", "r", second) is True
+
+        assert manager.clones == ["o/r"]
+        assert (first / "README.md").read_text() == "v1\n"
+        assert (first / ".git").is_file()
+        assert manager.mirror_path("o", "r").is_dir()
+
+    @pytest.mark.asyncio
+    async def test_existing_workspace_untouched(self, manager):
+        path = manager.ticket_path("o", "r", 1)
+        await manager.ensure("o", "r", path)
+        assert await manager.ensure("o", "r", path) is False
+
+    @pytest.mark.asyncio
+    async def test_new_worktree_sees_upstream_commits(self, manager, upstream):
+        await manager.ensure("o", "r", manager.ticket_path("o", "r", 1))
+        (upstream / "README.md").write_text("v2\n")
+        _git(upstream, "commit", "-q", "-am", "update")
+
+        path = manager.ticket_path("o", "r", 2)
+        await manager.ensure("o", "r", path)
+        assert (path / "README.md").read_text() == "v2\n"
+
+    @pytest.mark.asyncio
+    async def test_mirror_has_no_stale_local_branches(self, manager):
+        await manager.ensure("o", "r", manager.ticket_path("o", "r", 1))
+        heads = _git(manager.mirror_path("o", "r"), "for-each-ref", "refs/heads/")
+        assert heads == ""
+
+    @pytest.mark.asyncio
+    async def test_remove_unregisters_worktree(self, manager):
+        path = manager.ticket_path("o", "r", 1)
+        await manager.ensure("o", "r", path)
+        await manager.remove(path)
+
+        assert not path.exists()
+        worktrees = _git(manager.mirror_path("o", "r"), "worktree", "list")
+        assert str(path) not in worktrees
+
+
+def _make_workspace(root: Path, name: str, size: int, mtime: float) -> Path:
+    path = root / name
+    path.mkdir(parents=True)
+    (path / "data").write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def gc_github():
+    gh = AsyncMock(spec=GitHubClient)
+    gh.get_ticket_snapshots = AsyncMock(
+        return_value={
+            ("my_repo", 1): TicketSnapshot(state="CLOSED", labels={"otto"}),
+            ("my_repo", 2): TicketSnapshot(state="OPEN", labels={"otto", "agentPR"}),
+            ("my_repo", 3): TicketSnapshot(state="OPEN", labels=set()),
+        }
+    )
+    gh.get_pr_state = AsyncMock(return_value="MERGED")
+    return gh
+
+
+class TestGarbageCollection:
+    @pytest.fixture
+    def root(self, tmp_path):
+        root = tmp_path / "ws"
+        _make_workspace(root, "o_my_repo_1", 100, 1000)
+        _make_workspace(root, "o_my_repo_2", 100, 2000)
+        _make_workspace(root, "o_my_repo_3", 100, 3000)
+        _make_workspace(root, "idea_o_engineering_9", 50, 4000)
+        _make_workspace(root, "engineering", 10, 5000)
+        return root
+
+    def _manager(self, root: Path, **kwargs) -> WorkspaceManager:
+        return WorkspaceManager(OttonateConfig(github_org="o", workspace_dir=root, **kwargs))
+
+    def test_lists_ticket_and_idea_workspaces(self, root):
+        found = {(w.ref, w.is_idea) for w in self._manager(root).list_workspaces()}
+        assert found == {
+            ("o/my_repo#1", False),
+            ("o/my_repo#2", False),
+            ("o/my_repo#3", False),
+            ("o/engineering#9", True),
+        }
+
+    @pytest.mark.asyncio
+    async def test_dry_run_reports_finished(self, root, gc_github):
+        report = await self._manager(root).gc(gc_github, dry_run=True)
+
+        reasons = {p.name: reason for p, reason, _ in report.removed}
+        assert reasons == {
+            "o_my_repo_1": "issue closed",
+            "o_my_repo_3": "pipeline complete",
+            "idea_o_engineering_9": "idea PR merged",
+        }
+        assert report.reclaimed_bytes == 250
+        assert (root / "o_my_repo_1").exists()
+        gc_github.get_ticket_snapshots.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_removes_finished_but_not_protected(self, root, gc_github):
+        await self._manager(root).gc(gc_github, protected={"o/my_repo#1"})
+
+        assert (root / "o_my_repo_1").exists()
+        assert (root / "o_my_repo_2").exists()
+        assert not (root / "o_my_repo_3").exists()
+        assert not (root / "idea_o_engineering_9").exists()
+        assert (root / "engineering").exists()
+
+    @pytest.mark.asyncio
+    async def test_quota_evicts_least_recently_used(self, root, gc_github):
+        gc_github.get_ticket_snapshots = AsyncMock(return_value={})
+        gc_github.get_pr_state = AsyncMock(return_value="OPEN")
+        manager = self._manager(root, workspace_quota_gb=200 / 1024**3)
+
+        report = await manager.gc(gc_github)
+
+        assert [(p.name, reason) for p, reason, _ in report.removed] == [
+            ("o_my_repo_1", "quota"),
+            ("o_my_repo_2", "quota"),
+        ]
+        assert report.kept_bytes == 150
+
+    @pytest.mark.asyncio
+    async def test_quota_never_evicts_open_pr_workspaces(self, root, gc_github):
+        open_pr = TicketSnapshot(state="OPEN", labels={"otto", "agentPR"}, pr_state="OPEN")
+        gc_github.get_ticket_snapshots = AsyncMock(return_value={("my_repo", 1): open_pr})
+        gc_github.get_pr_state = AsyncMock(return_value="OPEN")
+        manager = self._manager(root, workspace_quota_gb=100 / 1024**3)
+
+        report = await manager.gc(gc_github)
+
+        assert [(p.name, reason) for p, reason, _ in report.removed] == [
+            ("o_my_repo_2", "quota"),
+            ("o_my_repo_3", "quota"),
+        ]
+        assert (root / "o_my_repo_1").exists()
+        assert (root / "idea_o_engineering_9").exists()